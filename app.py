@@ -1,22 +1,38 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file
+import time
+# Measured from here so the startup report covers importing Flask and the processor modules
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file, Response, stream_with_context, g
+import gc
 import logging
 import json
+import hashlib
+import hmac
+import ipaddress
 import sys
 import io
 import os
 import re
 import tempfile
+import threading
 import traceback
-from docx import Document
-from processor.text_processor import TextProcessor
 from prompt_manager import PromptManager
 from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, ADMIN_PASSWORD
 from processor.translators.azure_translator import AzureTranslator
+from processor.cache import TTLCache
+from processor.single_flight import SingleFlight
+from processor.analysis_sessions import AnalysisSessions
+from processor import metrics
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", os.urandom(24))
 prompt_manager = PromptManager()
 
+# Values already set in the environment take precedence over config.py, so the app can be
+# pointed at another endpoint (e.g. benchmarks/mock_azure_server.py) without editing it
+AZURE_OPENAI_API_KEY = os.environ.get('AZURE_OPENAI_API_KEY') or AZURE_OPENAI_API_KEY
+AZURE_OPENAI_ENDPOINT = os.environ.get('AZURE_OPENAI_ENDPOINT') or AZURE_OPENAI_ENDPOINT
+
 # Make the configuration available via os.environ if needed by other components
 os.environ['AZURE_OPENAI_API_KEY'] = AZURE_OPENAI_API_KEY
 os.environ['AZURE_OPENAI_ENDPOINT'] = AZURE_OPENAI_ENDPOINT
@@ -28,8 +44,32 @@ if not AZURE_OPENAI_API_KEY:
 if not AZURE_OPENAI_ENDPOINT:
     app.logger.warning("AZURE_OPENAI_ENDPOINT is not set in config.py. LLM functionality will not work.")
 
-# Initialize text processor with API credentials
-text_processor = TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT)
+# The text processor (translators, parser, caches) is created on first use, or up
+# front by warm_up() when gunicorn preloads the app (see gunicorn.conf.py)
+_text_processor = None
+_text_processor_lock = threading.Lock()
+
+
+def get_text_processor():
+    """Get the process-wide TextProcessor, creating it on first use."""
+    global _text_processor
+    if _text_processor is None:
+        with _text_processor_lock:
+            if _text_processor is None:
+                from processor.text_processor import TextProcessor
+                # Shares the app's PromptManager so prompts are loaded once and
+                # edits made through /prompts reach the translators
+                _text_processor = TextProcessor(
+                    api_key=AZURE_OPENAI_API_KEY,
+                    endpoint=AZURE_OPENAI_ENDPOINT,
+                    prompt_manager=prompt_manager
+                )
+    return _text_processor
+
+# Idempotent /translate support: concurrent retries share one run, and finished
+# results are kept briefly so a retry after a dropped connection can pick them up
+translate_flight = SingleFlight()
+completed_translations = TTLCache(maxsize=1024, ttl=600)
 
 # Set up logging
 app.logger.setLevel(logging.DEBUG)
@@ -37,20 +77,76 @@ handler = logging.StreamHandler(sys.stdout)
 handler.setLevel(logging.DEBUG)
 app.logger.addHandler(handler)
 
-# Check for document processing libraries
-try:
-    import mammoth
-    MAMMOTH_AVAILABLE = True
-except ImportError:
-    MAMMOTH_AVAILABLE = False
-    app.logger.warning("mammoth library not available. Word document processing will be limited.")
-    
-try:
-    from pdfminer.high_level import extract_text as pdf_extract_text
-    PDFMINER_AVAILABLE = True
-except ImportError:
-    PDFMINER_AVAILABLE = False
-    app.logger.warning("pdfminer.six library not available. PDF processing will be limited.")
+# Startup timings and memory, reported by /startup-report
+import_seconds = time.perf_counter() - IMPORT_STARTED
+startup_info = {
+    'import_seconds': round(import_seconds, 3),
+    'warm_up_seconds': None,
+    'warmed_up_in_pid': None
+}
+
+
+def warm_up():
+    """
+    Create everything the request handlers share (text processor, translators, parser,
+    compiled friction patterns) before serving. Under gunicorn with preload_app this
+    runs once in the master, so forked workers share the memory instead of each
+    building its own copy on their first request.
+    """
+    started = time.perf_counter()
+    get_text_processor().sentence_parser.parse_spans("Warm up.")
+    startup_info['warm_up_seconds'] = round(time.perf_counter() - started, 3)
+    startup_info['warmed_up_in_pid'] = os.getpid()
+    app.logger.info(
+        f"Startup: import {startup_info['import_seconds']}s, warm-up {startup_info['warm_up_seconds']}s, "
+        f"RSS {_memory_usage()['rss_bytes'] / (1024 * 1024):.1f} MiB"
+    )
+
+
+def _memory_usage():
+    """
+    Get the resident and shared memory of this process in bytes. Shared pages include
+    those a preloaded master still shares with the worker after fork.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            fields = statm.read().split()
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        return {'rss_bytes': int(fields[1]) * page_size, 'shared_bytes': int(fields[2]) * page_size}
+    except (OSError, ValueError, IndexError):
+        # No /proc (e.g. macOS): fall back to the peak resident size
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return {'rss_bytes': peak if sys.platform == 'darwin' else peak * 1024, 'shared_bytes': None}
+
+
+# Document processing libraries are imported the first time a document needs them
+_document_libraries = {}
+
+
+def _load_mammoth():
+    """Get the mammoth module, or None if it is not installed."""
+    if 'mammoth' not in _document_libraries:
+        try:
+            import mammoth
+            _document_libraries['mammoth'] = mammoth
+        except ImportError:
+            _document_libraries['mammoth'] = None
+            app.logger.warning("mammoth library not available. Word document processing will be limited.")
+    return _document_libraries['mammoth']
+
+
+def _load_pdf_extract_text():
+    """Get pdfminer's extract_text function, or None if pdfminer.six is not installed."""
+    if 'pdfminer' not in _document_libraries:
+        try:
+            from pdfminer.high_level import extract_text as pdf_extract_text
+            _document_libraries['pdfminer'] = pdf_extract_text
+        except ImportError:
+            _document_libraries['pdfminer'] = None
+            app.logger.warning("pdfminer.six library not available. PDF processing will be limited.")
+    return _document_libraries['pdfminer']
 
 # Define allowed file extensions
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
@@ -68,6 +164,48 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# /metrics and /startup-report describe the deployment and its internals. They answer
+# logged-in users, scrapers on these networks (loopback by default) and, when
+# METRICS_TOKEN is set, requests carrying "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128').split(',')
+    if network.strip()
+]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+def _internal_request_allowed():
+    """
+    Check whether the current request may read the internal endpoints.
+
+    Returns:
+        bool: True for a logged-in session, a matching bearer token or an allowed client address
+    """
+    if session.get("logged_in"):
+        return True
+    if METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if hmac.compare_digest(authorization.encode('utf-8'), f"Bearer {METRICS_TOKEN}".encode('utf-8')):
+            return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    # An IPv4 client on a dual-stack socket shows up as ::ffff:a.b.c.d
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+def internal_only(f):
+    from functools import wraps
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not _internal_request_allowed():
+            app.logger.warning(f"Refused {request.path} to {request.remote_addr}")
+            return jsonify({"error": "Forbidden"}), 403
+        return f(*args, **kwargs)
+    return decorated
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     # If they're already logged in, send them home
@@ -105,6 +243,7 @@ def download_docx():
     download_name = f"{safe_name or 'translation'}.docx"
 
     # Build the .docx in memory
+    from docx import Document
     doc = Document()
     for line in text.split('\n'):
         doc.add_paragraph(line)
@@ -130,10 +269,15 @@ def index():
 def translate():
     """
     Process the text using Azure OpenAI-based translators and return the translated version.
+    
+    Clients may send an idempotency key (Idempotency-Key header or "idempotency_key" field).
+    A retry carrying the same key and text joins the in-flight request or receives the
+    finished result instead of processing the text again.
     """
     data = request.get_json()
     raw_text = data.get('text', '')
     highlight = data.get('highlight', False)
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
     
     # ─── Normalize all curly quotes → straight quotes ───────────────────
     normalized_input = (
@@ -157,83 +301,312 @@ def translate():
             'highlighted': ''
         })
 
+    if not idempotency_key:
+        result, status = _translate_text(normalized_input, highlight)
+        return jsonify(result), status
+
+    # Scope the key to the request content so a reused key never returns another text's result
+    request_hash = hashlib.sha256(f"{highlight}:{normalized_input}".encode('utf-8')).hexdigest()
+    flight_key = f"{idempotency_key}:{request_hash}"
+    
+    completed = completed_translations.get(flight_key)
+    if completed is not None:
+        app.logger.debug(f"Returning completed result for idempotency key: {idempotency_key}")
+        return jsonify(completed)
+    
+    result, status = translate_flight.do(flight_key, lambda: _translate_text(normalized_input, highlight))
+    if status == 200:
+        completed_translations.set(flight_key, result)
+    return jsonify(result), status
+
+
+def _translate_text(normalized_input, highlight):
+    """
+    Run the text processor over normalized input and build the /translate response body.
+    
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
     try:
         app.logger.debug("Processing text with Azure OpenAI-based text_processor")
         
-        if highlight:
-            # Pass normalized_input into process_text(...)
-            translated_text, changes, highlighted_text = text_processor.process_text(
-                normalized_input, highlight_changes=True
-            )
-        else:
-            translated_text, changes = text_processor.process_text(normalized_input)
-            highlighted_text = None
-        
-        friction_words   = text_processor.get_friction_replacements()
-        transformations  = text_processor.get_specific_transformations()
-
-        # For each transformation, set the sentences so the front end can precisely highlight:
-        for tx in transformations:
-            tx["original_sentence"]   = tx.get("context", normalized_input)
-            tx["translated_sentence"] = translated_text
-            tx["final_processed"]     = translated_text
-
-            for ch in changes:
-                if ch["original"].strip() == tx.get("context", "").strip():
-                    tx["original_sentence"]   = ch["original"]
-                    tx["translated_sentence"] = ch["translated"]
-                    tx["final_processed"]     = ch["translated"]
-            break
-
-        app.logger.debug(f"Transformations: {transformations}")
-        app.logger.debug(f"Translation complete. Original: '{normalized_input}', Translated: '{translated_text}'")
-        app.logger.debug(f"Changes: {changes}")
-        app.logger.debug(f"Friction words: {friction_words}")
-        app.logger.debug(f"Transformations: {transformations}")
-
-        result = {
-            # Return the normalized_input (with straight apostrophes) as “original”:
-            'original': normalized_input,
-            'translated': translated_text,
-            'changes': changes,
-            'friction_words': friction_words,
-            'transformations': transformations
-        }
-        
-        if highlighted_text is not None:
-            result['highlighted'] = highlighted_text
+        # The result carries everything about this text, so concurrent requests on the
+        # shared processor never read each other's changes
+        result = get_text_processor().process_text(normalized_input, highlight_changes=bool(highlight))
         
-        return jsonify(result)
+        return _build_translate_result(
+            normalized_input, result.translated, list(result.changes), result.highlighted,
+            list(result.friction_words), list(result.transformations)
+        ), 200
 
     except Exception as e:
         app.logger.error(f"Error during translation: {str(e)}")
-        return jsonify({
+        return {
             'original': normalized_input,
             'translated': f"Error: {str(e)}",
             'changes': [],
             'friction_words': [],
             'transformations': [],
             'highlighted': ''
-        }), 500
+        }, 500
 
 
-@app.route('/analyze-text', methods=['POST'])
-def analyze_text():
-    """Analyze text for friction language and return friction points for real-time display"""
-    data = request.get_json()
-    raw_text = data.get('text', '')
+def _build_translate_result(normalized_input, translated_text, changes, highlighted_text,
+                            friction_words, transformations):
+    """
+    Build the /translate response body from one text's processing result.
+    
+    Returns:
+        dict: Original and translated text, changes, friction words and transformations
+    """
+    # The records belong to the (immutable, possibly cached) result; annotate copies
+    transformations = [dict(tx) for tx in transformations]
+
+    # For each transformation, set the sentences so the front end can precisely highlight:
+    for tx in transformations:
+        tx["original_sentence"]   = tx.get("context", normalized_input)
+        tx["translated_sentence"] = translated_text
+        tx["final_processed"]     = translated_text
+
+        for ch in changes:
+            if ch["original"].strip() == tx.get("context", "").strip():
+                tx["original_sentence"]   = ch["original"]
+                tx["translated_sentence"] = ch["translated"]
+                tx["final_processed"]     = ch["translated"]
+        break
+
+    app.logger.debug(f"Transformations: {transformations}")
+    app.logger.debug(f"Translation complete. Original: '{normalized_input}', Translated: '{translated_text}'")
+    app.logger.debug(f"Changes: {changes}")
+    app.logger.debug(f"Friction words: {friction_words}")
+    app.logger.debug(f"Transformations: {transformations}")
+
+    result = {
+        # Return the normalized_input (with straight apostrophes) as “original”:
+        'original': normalized_input,
+        'translated': translated_text,
+        'changes': changes,
+        'friction_words': friction_words,
+        'transformations': transformations
+    }
+    
+    if highlighted_text is not None:
+        result['highlighted'] = highlighted_text
+    
+    return result
 
+
+# Largest number of texts accepted by one /translate-batch or /translate-stream request
+MAX_BATCH_ITEMS = int(os.environ.get('MAX_BATCH_ITEMS', 200))
+
+
+@app.route('/translate-stream', methods=['POST'])
+def translate_stream():
+    """
+    Streaming variant of /translate. Emits one JSON object per line (NDJSON) for each
+    sentence as soon as it has been processed, then a final summary event.
+    
+    Request body:
+        text (str): Document to process, or
+        sentences (list): Pre-split sentences processed independently (indexes refer to this list)
+        highlight (bool): Include highlighted HTML per sentence and in the summary
+    
+    Events:
+        {"event": "sentence", "index", "original", "translated", "changes", "transformations", ...}
+        {"event": "summary", ...} with the same fields as the /translate response in text mode
+        {"event": "error", "error"} if processing fails part way
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    highlight = data.get('highlight', False)
+    sentences = data.get('sentences')
+    text = data.get('text')
+    
+    # Validated like /translate-batch before the stream starts, so bad input gets a 400
+    if sentences is not None:
+        if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+            return jsonify({'error': '"sentences" must be a list of strings'}), 400
+        if len(sentences) > MAX_BATCH_ITEMS:
+            return jsonify({'error': f'At most {MAX_BATCH_ITEMS} sentences can be processed per request'}), 400
+    if text is None:
+        text = ''
+    if not isinstance(text, str):
+        return jsonify({'error': '"text" must be a string'}), 400
+    
     # ─── Normalize all curly quotes → straight quotes ───────────────────
-    normalized_text = (
-        raw_text
+    normalized_input = (
+        text
+        .replace("’", "'")
+        .replace("‘", "'")
+        .replace("“", '"')
+        .replace("”", '"')
+    )
+    # ─────────────────────────────────────────────────────────────────────
+    
+    def generate():
+        try:
+            if sentences is not None:
+                app.logger.debug(f"Streaming {len(sentences)} independent sentence(s)")
+                events = get_text_processor().process_sentences_stream(sentences, highlight)
+                for event in events:
+                    yield json.dumps(event) + '\n'
+                return
+            
+            app.logger.debug(f"Streaming translation of: {repr(normalized_input)}")
+            for event in get_text_processor().process_text_stream(normalized_input, highlight):
+                if event['event'] == 'summary':
+                    summary = _build_translate_result(
+                        normalized_input, event['translated'], event['changes'], event.get('highlighted'),
+                        event['friction_words'], event['transformations']
+                    )
+                    event = dict(summary, event='summary')
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            app.logger.error(f"Error during streaming translation: {str(e)}")
+            yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/translate-batch', methods=['POST'])
+def translate_batch():
+    """
+    Batch variant of /translate: process many independent texts (e.g. the sentences of
+    the editor) in one request. The texts are processed together on the server and a
+    result is returned for each, in order.
+    
+    Request body:
+        items (list): Texts to process ("sentences" is accepted as an alias)
+        highlight (bool): Include highlighted HTML per item
+    
+    Response:
+        {"results": [...], "succeeded", "failed"} where each result has the fields of the
+        /translate response plus "index" and "success"; a failed item has "success": false
+        and "error" instead, without affecting the others
+    """
+    data = request.get_json() or {}
+    highlight = data.get('highlight', False)
+    items = data.get('items', data.get('sentences'))
+    
+    if not isinstance(items, list):
+        return jsonify({'error': '"items" must be a list of strings'}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({'error': f'At most {MAX_BATCH_ITEMS} items can be processed per request'}), 400
+    
+    app.logger.debug(f"Processing batch of {len(items)} item(s)")
+    try:
+        processed = get_text_processor().process_batch(items, highlight_changes=highlight)
+    except Exception as e:
+        app.logger.error(f"Error during batch translation: {str(e)}")
+        app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+    
+    results = []
+    for index, item in enumerate(processed):
+        if not item.succeeded:
+            app.logger.warning(f"Batch item {index} failed: {item.error}")
+            results.append({'index': index, 'success': False,
+                            'original': item.original, 'error': item.error})
+            continue
+        result = _build_translate_result(
+            item.original, item.translated, list(item.changes), item.highlighted,
+            list(item.friction_words), list(item.transformations)
+        )
+        results.append(dict(result, index=index, success=True))
+    
+    failed = sum(1 for result in results if not result['success'])
+    return jsonify({
+        'results': results,
+        'succeeded': len(results) - failed,
+        'failed': failed
+    })
+
+
+# Replacement and suggestion shown for each friction type in real-time analysis
+FRICTION_SUGGESTIONS = {
+    'but': ('and at the same time',
+            'Consider replacing "but" with "and at the same time" to give equal weight to both points'),
+    'should': ('might',
+               'Consider using "might" instead of "should" to reduce the sense of obligation'),
+    'not': ('positive alternative',
+            'Consider replacing "not" with a positive alternative')
+}
+
+# Per-document state for incremental /analyze-text requests from the editor
+analysis_sessions = AnalysisSessions()
+
+
+def _straighten_quotes(text):
+    """Normalize curly quotes to straight quotes; every character offset stays the same."""
+    return (
+        text
         .replace("’", "'")
         .replace("‘", "'")
         .replace("“", '"')
         .replace("”", '"')
     )
+
+
+def _sentence_friction_points(text_processor, sentence):
+    """
+    Find the friction points of one sentence.
+
+    Args:
+        text_processor (TextProcessor): Processor whose friction patterns are used
+        sentence (str): Sentence to scan
+
+    Returns:
+        list: Friction point dicts with offsets relative to the sentence
+    """
+    # One scan of the sentence finds the "but/yet", "should/could/would" and
+    # "not/never" friction; points are reported grouped in that order
+    matches = text_processor.friction_patterns.scan(sentence, FRICTION_SUGGESTIONS)
+    friction_points = []
+    for friction_type, (replacement, suggestion) in FRICTION_SUGGESTIONS.items():
+        for match in matches:
+            if match.category != friction_type:
+                continue
+            friction_points.append({
+                'type': friction_type,
+                'start_pos': match.start,
+                'end_pos':   match.end,
+                'original':  match.text,
+                'replacement': replacement,
+                'suggestion': suggestion
+            })
+    return friction_points
+
+
+@app.route('/analyze-text', methods=['POST'])
+def analyze_text():
+    """
+    Analyze text for friction language and return friction points for real-time display.
+
+    Besides the full 'text', an editor can send a 'doc_id'. The server then keeps an
+    analysis session for the document and later requests only re-scan the sentences
+    that changed. Instead of the full text, such a request may send 'base_hash' (the
+    'text_hash' of the last response) and a 'delta' {start, end, text} replacing
+    base[start:end]; if the server no longer has that version it answers 409 with
+    'resync': true and the client sends the full text again.
+    """
+    data = request.get_json()
+    doc_id = data.get('doc_id')
+    raw_text = data.get('text')
+    delta = data.get('delta')
+
+    # ─── Normalize all curly quotes → straight quotes ───────────────────
+    normalized_text = _straighten_quotes(raw_text) if raw_text is not None else None
+    if normalized_text is None and isinstance(delta, dict) and isinstance(delta.get('text'), str):
+        delta = dict(delta, text=_straighten_quotes(delta['text']))
     app.logger.debug(f"Normalized text for analysis: '{normalized_text}'")
 
-    if not normalized_text:
+    if not normalized_text and not (doc_id and delta):
         app.logger.warning("Empty text received for analysis")
         return jsonify({
             'success': True,
@@ -241,67 +614,38 @@ def analyze_text():
         })
 
     try:
-        from processor.sentence_parser import SentenceParser
-        sentence_parser = SentenceParser()
-        sentences = sentence_parser.parse(normalized_text)
+        text_processor = get_text_processor()
 
-        friction_points = []
-        sentence_start = 0
+        # Sentence spans are offsets into the text itself (quote normalization keeps
+        # every offset), so positions stay exact however sentences are spaced or repeated
+        analysis, stats = analysis_sessions.analyze(
+            doc_id,
+            lambda sentence: _sentence_friction_points(text_processor, sentence),
+            text=normalized_text,
+            base_hash=data.get('base_hash'),
+            delta=delta
+        )
 
-        for sentence in sentences:
-            if not sentence.strip():
-                sentence_start += len(sentence)
-                continue
+        if analysis is None:
+            app.logger.debug(f"Analysis session for {doc_id} is out of date, asking for the full text")
+            return jsonify({
+                'success': False,
+                'resync': True,
+                'error': 'Document version not found, send the full text',
+                'friction_points': []
+            }), 409
+
+        friction_points = analysis.friction_points()
 
-            # 1. Check for "but/yet" friction
-            but_matches = []
-            for pattern in text_processor.but_patterns:
-                for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                    but_matches.append({
-                        'type': 'but',
-                        'start_pos': sentence_start + match.start(),
-                        'end_pos':   sentence_start + match.end(),
-                        'original':  match.group(0),
-                        'replacement': 'and at the same time',
-                        'suggestion': 'Consider replacing "but" with "and at the same time" to give equal weight to both points'
-                    })
-
-            # 2. Check for "should/could/would" friction
-            should_matches = []
-            for pattern in text_processor.should_patterns:
-                for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                    should_matches.append({
-                        'type': 'should',
-                        'start_pos': sentence_start + match.start(),
-                        'end_pos':   sentence_start + match.end(),
-                        'original':  match.group(0),
-                        'replacement': 'might',
-                        'suggestion': 'Consider using "might" instead of "should" to reduce the sense of obligation'
-                    })
-
-            # 3. Check for "not/never" friction
-            not_matches = []
-            for pattern in text_processor.not_patterns:
-                for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                    not_matches.append({
-                        'type': 'not',
-                        'start_pos': sentence_start + match.start(),
-                        'end_pos':   sentence_start + match.end(),
-                        'original':  match.group(0),
-                        'replacement': 'positive alternative',
-                        'suggestion': 'Consider replacing "not" with a positive alternative'
-                    })
-
-            friction_points.extend(but_matches)
-            friction_points.extend(should_matches)
-            friction_points.extend(not_matches)
-
-            sentence_start += len(sentence)
-
-        app.logger.debug(f"Analysis complete. Found {len(friction_points)} friction points")
+        app.logger.debug(f"Analysis complete. Found {len(friction_points)} friction points "
+                         f"({stats['analyzed']} sentences analyzed, {stats['reused']} reused)")
         return jsonify({
             'success': True,
-            'friction_points': friction_points
+            'friction_points': friction_points,
+            'doc_id': doc_id,
+            'text_hash': analysis.hash,
+            'analyzed_sentences': stats['analyzed'],
+            'reused_sentences': stats['reused']
         })
 
     except Exception as e:
@@ -443,7 +787,8 @@ def process_document():
         elif file_ext == '.pdf':
             # Process PDF file
             app.logger.debug("Processing as PDF file")
-            if PDFMINER_AVAILABLE:
+            pdf_extract_text = _load_pdf_extract_text()
+            if pdf_extract_text is not None:
                 text = pdf_extract_text(temp_path)
                 app.logger.debug(f"PDF processed with pdfminer, extracted {len(text)} characters")
             else:
@@ -456,7 +801,8 @@ def process_document():
         elif file_ext in ['.doc', '.docx']:
             # Process Word document
             app.logger.debug("Processing as Word document")
-            if MAMMOTH_AVAILABLE:
+            mammoth = _load_mammoth()
+            if mammoth is not None:
                 with open(temp_path, 'rb') as docx_file:
                     result = mammoth.extract_raw_text(docx_file)
                     text = result.value
@@ -519,22 +865,17 @@ def test_translators():
     
     results = []
     for case in test_cases:
-        # Process with text processor and get highlighted version
-        processed_text, changes, highlighted_text = text_processor.process_text(case, highlight_changes=True)
-        
-        # Get friction words with prompts
-        friction_words = text_processor.get_friction_replacements()
-        
-        # Get specific transformations
-        transformations = text_processor.get_specific_transformations()
+        # Process with text processor and get highlighted version, friction words
+        # with prompts and specific transformations
+        result = get_text_processor().process_text(case, highlight_changes=True)
         
         results.append({
             'original': case,
-            'translated': processed_text,
-            'highlighted': highlighted_text,
-            'changes': changes,
-            'friction_words': friction_words,
-            'transformations': transformations
+            'translated': result.translated,
+            'highlighted': result.highlighted,
+            'changes': list(result.changes),
+            'friction_words': list(result.friction_words),
+            'transformations': list(result.transformations)
         })
     
     return render_template('test.html', results=results)
@@ -607,7 +948,7 @@ def update_prompt(word_type, context):
     
     if success:
         # Also update the prompt in the translator
-        text_processor.set_prompts(word_type, prompt)
+        get_text_processor().set_prompts(word_type, prompt)
         return jsonify({"success": True, "message": "Prompt updated successfully"})
     else:
         return jsonify({"error": "Failed to update prompt"}), 500
@@ -635,26 +976,118 @@ def test_prompt():
     if word_type not in ['should', 'but', 'not']:
         return jsonify({"error": "Invalid word type"}), 400
     
-    # Create a temporary processor with the test prompt
-    temp_processor = TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT)
-    temp_processor.set_prompts(word_type, prompt)
+    # A copy of the shared processor with the test prompt (only that translator is copied)
+    temp_processor = get_text_processor().with_prompt(word_type, prompt)
     
     try:
         # Process the text with highlighting
-        result, changes, highlighted = temp_processor.process_text(text, highlight_changes=True)
-        
-        # Get specific transformations
-        transformations = temp_processor.get_specific_transformations()
+        result = temp_processor.process_text(text, highlight_changes=True)
         
         return jsonify({
             "original": text,
-            "result": result,
-            "highlighted": highlighted,
-            "changes": changes,
-            "transformations": transformations
+            "result": result.translated,
+            "highlighted": result.highlighted,
+            "changes": list(result.changes),
+            "transformations": list(result.transformations)
         })
     except Exception as e:
         return jsonify({"error": f"Error testing prompt: {str(e)}"}), 500
 
+@app.route('/startup-report')
+@internal_only
+def startup_report():
+    """Report how long this worker took to start and how much memory it uses."""
+    report = dict(startup_info)
+    report.update(_memory_usage())
+    report['pid'] = os.getpid()
+    # True when the shared objects were built in a preloaded parent before fork
+    report['preloaded'] = startup_info['warmed_up_in_pid'] not in (None, os.getpid())
+    report['gc_frozen_objects'] = gc.get_freeze_count()
+    report['text_processor_ready'] = _text_processor is not None
+    return jsonify(report)
+
+def _metrics_route():
+    """The route pattern (e.g. /prompts/<word_type>) so URLs with ids do not each get a series."""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_route = _metrics_route()
+    metrics.http_requests_in_progress.inc(route=g.metrics_route)
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        route = g.metrics_route
+        metrics.http_requests.inc(route=route, method=request.method, status=str(response.status_code))
+        # Streamed responses are only timed until the response object is ready; the
+        # generator runs after this, so their per-stage time shows in the stage histograms
+        metrics.http_request_duration.observe(time.perf_counter() - started, route=route, method=request.method)
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exception=None):
+    route = g.pop('metrics_route', None)
+    if route is not None:
+        metrics.http_requests_in_progress.dec(route=route)
+
+def _collect_state_metrics():
+    """Cache, rate limiter and circuit breaker numbers, read when /metrics is scraped."""
+    from processor.translators.azure_translator import response_cache
+    from processor.translators.rate_limiter import rate_limiter
+    from processor.translators.circuit_breaker import breaker_stats, OPEN
+    from processor.diff_engine import diff_engine
+    from processor.friction_patterns import friction_patterns
+
+    caches = {
+        'llm_responses': response_cache.stats(),
+        'diffs': diff_engine.stats(),
+        'friction_detections': friction_patterns.stats(),
+        'analysis_sessions': analysis_sessions.stats(),
+        'completed_translations': completed_translations.stats()
+    }
+    # Not created until the first request that needs it (or warm_up)
+    if _text_processor is not None:
+        caches['sentences'] = _text_processor.sentence_cache.stats()
+    families = metrics.cache_families(caches)
+
+    limiter = rate_limiter.stats()
+    families.append(('llm_queue_depth', 'gauge', 'Callers waiting for LLM quota in the rate limiter',
+                     [({}, limiter['waiting'])]))
+    families.append(('llm_rate_limiter_throttled_total', 'counter', '429 responses recorded by the rate limiter',
+                     [({}, limiter['throttled'])]))
+    families.append(('llm_rate_limiter_timeouts_total', 'counter', 'Callers that gave up waiting for quota',
+                     [({}, limiter['timeouts'])]))
+
+    # Breakers are keyed by endpoint URL and deployment; label by deployment name only so
+    # the scrape never carries endpoint names. Breakers of the same deployment on different
+    # endpoints are merged: open if any is open, opens summed.
+    open_by_deployment = {}
+    opened_by_deployment = {}
+    for stats in breaker_stats().values():
+        deployment = stats['deployment'] or 'unknown'
+        is_open = 1 if stats['state'] == OPEN else 0
+        open_by_deployment[deployment] = max(open_by_deployment.get(deployment, 0), is_open)
+        opened_by_deployment[deployment] = opened_by_deployment.get(deployment, 0) + stats['opened']
+    families.append(('llm_circuit_breaker_open', 'gauge', '1 while the circuit breaker of a deployment is open',
+                     [({'deployment': name}, value) for name, value in open_by_deployment.items()]))
+    families.append(('llm_circuit_breaker_opened_total', 'counter', 'Times the circuit breaker of a deployment opened',
+                     [({'deployment': name}, value) for name, value in opened_by_deployment.items()]))
+    return families
+
+metrics.registry.add_collector(_collect_state_metrics)
+
+@app.route('/metrics')
+@internal_only
+def metrics_endpoint():
+    """
+    Prometheus metrics for this worker: request rates and latencies, per-stage and
+    per-translator timings, LLM calls and tokens, cache hit ratios, the rate limiter
+    queue and circuit breaker state.
+    """
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
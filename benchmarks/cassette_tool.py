@@ -0,0 +1,212 @@
+"""
+Tools for LLM cassettes recorded with AZURE_OPENAI_CASSETTE_MODE=record
+(see processor/translators/cassette.py).
+
+    python -m benchmarks.cassette_tool info prod.jsonl.gz
+    python -m benchmarks.cassette_tool merge worker-*.jsonl.gz -o prod.jsonl.gz
+    python -m benchmarks.cassette_tool sample prod.jsonl.gz -o sample.jsonl.gz --count 2000 --seed 1
+    python -m benchmarks.cassette_tool anonymize sample.jsonl.gz -o shareable.jsonl.gz --term "Acme Corp"
+
+Anonymizing replaces e-mail addresses, URLs, phone numbers, long numbers and
+any --term/--pattern given with stand-ins of similar length. The same value is
+replaced the same way in every prompt and response, so a replayed rewrite still
+matches its input, and each entry's key is recomputed so exact replay keeps
+working for prompts built from the anonymized text.
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import statistics
+
+from processor.translators.cassette import entry_key, read_entries, write_entries
+
+# Built-in patterns for personal data, in the order they are applied
+PII_PATTERNS = [
+    ('email', re.compile(r'\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b')),
+    ('url', re.compile(r'\bhttps?://[^\s"\'<>]+', re.IGNORECASE)),
+    ('phone', re.compile(r'(?<!\w)\+?\d[\d ().-]{7,}\d(?!\w)')),
+    ('number', re.compile(r'\b\d{4,}\b')),
+]
+
+
+class Anonymizer:
+    """Replaces sensitive values with stable stand-ins of similar length."""
+
+    def __init__(self, terms=(), patterns=(), salt=''):
+        """
+        Initialize the anonymizer.
+
+        Args:
+            terms (iterable): Literal words or names to replace (case-insensitive)
+            patterns (iterable): Extra regular expressions to replace
+            salt (str): Mixed into the stand-ins, so they cannot be reversed by guessing
+        """
+        self.salt = salt
+        self.rules = list(PII_PATTERNS)
+        for term in terms:
+            self.rules.append(('term', re.compile(r'\b' + re.escape(term) + r'\b', re.IGNORECASE)))
+        for pattern in patterns:
+            self.rules.append(('term', re.compile(pattern)))
+        self.replacements = {}
+
+    def __call__(self, text):
+        for kind, pattern in self.rules:
+            text = pattern.sub(lambda match, kind=kind: self._stand_in(kind, match.group(0)), text)
+        return text
+
+    def _stand_in(self, kind, value):
+        key = (kind, value.lower() if kind == 'term' else value)
+        stand_in = self.replacements.get(key)
+        if stand_in is None:
+            digest = hashlib.sha256((self.salt + key[1]).encode('utf-8')).hexdigest()
+            if kind == 'email':
+                stand_in = f"user{digest[:6]}@example.com"
+            elif kind == 'url':
+                stand_in = f"https://example.com/{digest[:max(4, len(value) - 20)]}"
+            elif kind in ('phone', 'number'):
+                # Same shape, digits derived from the hash
+                digits = iter(str(int(digest, 16)))
+                stand_in = ''.join(next(digits) if char.isdigit() else char for char in value)
+            else:
+                stand_in = f"Term{digest[:max(3, len(value) - 4)]}"
+            self.replacements[key] = stand_in
+        return stand_in
+
+
+def anonymize_entries(entries, anonymizer):
+    """
+    Anonymize the prompts and responses of cassette entries.
+
+    Args:
+        entries (list): Entry dicts
+        anonymizer (Anonymizer): Replacement rules
+
+    Returns:
+        list: New entries with their keys recomputed
+    """
+    anonymized = []
+    for entry in entries:
+        entry = dict(entry, prompt=anonymizer(entry['prompt']), response=anonymizer(entry['response']))
+        entry['key'] = entry_key(entry)
+        anonymized.append(entry)
+    return anonymized
+
+
+def merge_entries(entry_lists, prefer='last'):
+    """
+    Combine cassettes, keeping one entry per request key.
+
+    Args:
+        entry_lists (list): Entry lists, in the order the files were given
+        prefer (str): 'last' keeps the most recently recorded entry for a key, 'first' the earliest
+
+    Returns:
+        list: Entries ordered by recording time
+    """
+    merged = {}
+    for entries in entry_lists:
+        for entry in entries:
+            current = merged.get(entry['key'])
+            if current is None:
+                merged[entry['key']] = entry
+                continue
+            newer = entry.get('recorded_at', 0) >= current.get('recorded_at', 0)
+            if newer == (prefer == 'last'):
+                merged[entry['key']] = entry
+    return sorted(merged.values(), key=lambda entry: entry.get('recorded_at', 0))
+
+
+def sample_entries(entries, count=None, fraction=None, seed=0):
+    """
+    Draw a reproducible random sample, keeping the recording order.
+
+    Args:
+        entries (list): Entry dicts
+        count (int, optional): Number of entries to keep
+        fraction (float, optional): Share of entries to keep, if count is not given
+        seed (int): Random seed
+
+    Returns:
+        list: The sampled entries
+    """
+    if count is None:
+        count = round(len(entries) * (fraction if fraction is not None else 1.0))
+    count = max(0, min(count, len(entries)))
+    chosen = sorted(random.Random(seed).sample(range(len(entries)), count))
+    return [entries[index] for index in chosen]
+
+
+def describe(entries):
+    """Summary numbers for a cassette: entries, sizes and recorded latency."""
+    if not entries:
+        return {'entries': 0}
+    elapsed = sorted(entry.get('elapsed', 0) for entry in entries)
+    response_chars = [len(entry['response']) for entry in entries]
+    return {
+        'entries': len(entries),
+        'unique_keys': len({entry['key'] for entry in entries}),
+        'templates': len({entry['prompt'][:200] for entry in entries}),
+        'prompt_chars_mean': round(statistics.mean(len(entry['prompt']) for entry in entries)),
+        'response_chars_mean': round(statistics.mean(response_chars)),
+        'response_chars_max': max(response_chars),
+        'elapsed_p50': elapsed[len(elapsed) // 2],
+        'elapsed_p95': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+        'elapsed_max': elapsed[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect, sample, anonymize and merge LLM cassettes')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    info = commands.add_parser('info', help='Summarize cassettes')
+    info.add_argument('inputs', nargs='+')
+
+    merge = commands.add_parser('merge', help='Combine cassettes, one entry per request')
+    merge.add_argument('inputs', nargs='+')
+    merge.add_argument('-o', '--output', required=True)
+    merge.add_argument('--prefer', choices=('last', 'first'), default='last',
+                       help='Which recording of a repeated request to keep')
+
+    sample = commands.add_parser('sample', help='Keep a random subset of a cassette')
+    sample.add_argument('input')
+    sample.add_argument('-o', '--output', required=True)
+    group = sample.add_mutually_exclusive_group(required=True)
+    group.add_argument('--count', type=int)
+    group.add_argument('--fraction', type=float)
+    sample.add_argument('--seed', type=int, default=0)
+
+    anonymize = commands.add_parser('anonymize', help='Replace personal data in prompts and responses')
+    anonymize.add_argument('input')
+    anonymize.add_argument('-o', '--output', required=True)
+    anonymize.add_argument('--term', action='append', default=[], help='Word or name to replace (repeatable)')
+    anonymize.add_argument('--pattern', action='append', default=[], help='Regex to replace (repeatable)')
+    anonymize.add_argument('--salt', default='', help='Secret mixed into the stand-ins')
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        for path in args.inputs:
+            print(path)
+            for name, value in describe(read_entries(path)).items():
+                print(f"  {name:20} {value}")
+        return
+
+    if args.command == 'merge':
+        entries = merge_entries([read_entries(path) for path in args.inputs], prefer=args.prefer)
+        write_entries(args.output, entries, merged_from=args.inputs)
+    elif args.command == 'sample':
+        entries = sample_entries(read_entries(args.input), count=args.count, fraction=args.fraction,
+                                 seed=args.seed)
+        write_entries(args.output, entries, sampled_from=args.input, seed=args.seed)
+    else:
+        anonymizer = Anonymizer(terms=args.term, patterns=args.pattern, salt=args.salt)
+        entries = anonymize_entries(read_entries(args.input), anonymizer)
+        write_entries(args.output, entries, anonymized_from=args.input)
+    print(f"Wrote {len(entries)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Deterministic synthetic text for the benchmarks.
+
+Sentences are assembled from small vocabularies, so a corpus of any size can be
+generated from a seed and the same seed always gives the same text. The share of
+sentences carrying friction language (BUT, SHOULD, NOT) and the sentence length
+are controllable, which lets a benchmark separate the cost of detection from the
+cost of rewriting and see how both grow with the input.
+"""
+
+import random
+
+FRICTION_TYPES = ('but', 'should', 'not')
+
+SUBJECTS = [
+    'The team', 'Our manager', 'The new process', 'This report', 'The customer',
+    'Everyone on the project', 'The budget', 'The design review', 'Your proposal',
+    'The support desk', 'The release plan', 'Our partner', 'The committee', 'The survey'
+]
+VERBS = [
+    'covers', 'improves', 'describes', 'changes', 'supports', 'delays', 'explains',
+    'requires', 'includes', 'reviews', 'tracks', 'replaces', 'simplifies', 'outlines'
+]
+OBJECTS = [
+    'the quarterly targets', 'the onboarding steps', 'most of the open questions',
+    'the reporting workflow', 'the shared calendar', 'the pricing model', 'our weekly meeting',
+    'the training material', 'the remaining tasks', 'the customer feedback',
+    'the migration schedule', 'the final draft', 'the vendor contract', 'the test results'
+]
+# Extra words used to stretch sentences to the requested length
+FILLERS = [
+    'in detail', 'for the next quarter', 'across all regions', 'with the whole group',
+    'before the deadline', 'as discussed last week', 'for every new hire',
+    'in the shared folder', 'during the review', 'on a regular basis'
+]
+
+# Clauses that introduce friction language of each type; {clause} is a plain clause
+FRICTION_TEMPLATES = {
+    'but': [
+        '{clause}, but it {verb} {object}',
+        '{clause}, yet nobody {verb} {object}',
+        '{clause} but the plan {verb} {object}'
+    ],
+    'should': [
+        '{subject} should review {object} before Friday',
+        'We need to {verb_base} {object} first',
+        'You could ask {subject_lower} about {object}',
+        '{subject} would rather wait for {object}'
+    ],
+    'not': [
+        "{subject} doesn't {verb_base} {object}",
+        '{subject} is not ready for {object}',
+        "We can't {verb_base} {object} yet",
+        '{subject} never {verb} {object}',
+        "It wasn't clear who owns {object}"
+    ]
+}
+
+
+class Corpus:
+    """Generator of sentences, paragraphs and documents with a given friction density."""
+
+    def __init__(self, seed=0, friction_density=0.3, sentence_words=(8, 18), types=FRICTION_TYPES):
+        """
+        Initialize the generator.
+
+        Args:
+            seed (int): Random seed; the same seed always gives the same text
+            friction_density (float): Share of sentences (0.0-1.0) containing friction language
+            sentence_words (tuple): Minimum and maximum words per sentence
+            types (tuple): Friction types to draw from
+        """
+        self.seed = seed
+        self.friction_density = friction_density
+        self.sentence_words = sentence_words
+        self.types = tuple(types)
+        self.rng = random.Random(seed)
+
+    def clause(self):
+        """A plain clause without friction language."""
+        return f"{self.rng.choice(SUBJECTS)} {self.rng.choice(VERBS)} {self.rng.choice(OBJECTS)}"
+
+    def sentence(self, friction_type=None):
+        """
+        One sentence, ending with a period.
+
+        Args:
+            friction_type (str, optional): 'but', 'should', 'not', 'none' for a plain sentence,
+                or None to decide by the friction density
+
+        Returns:
+            str: The sentence
+        """
+        if friction_type is None:
+            if self.types and self.rng.random() < self.friction_density:
+                friction_type = self.rng.choice(self.types)
+            else:
+                friction_type = 'none'
+
+        if friction_type == 'none':
+            text = self.clause()
+        else:
+            subject = self.rng.choice(SUBJECTS)
+            verb = self.rng.choice(VERBS)
+            text = self.rng.choice(FRICTION_TEMPLATES[friction_type]).format(
+                clause=self.clause(),
+                subject=subject,
+                subject_lower=subject[0].lower() + subject[1:],
+                verb=verb,
+                verb_base=_base_form(verb),
+                object=self.rng.choice(OBJECTS)
+            )
+
+        # Stretch to a length drawn from the configured range
+        target = self.rng.randint(*self.sentence_words)
+        length = len(text.split())
+        while length + 2 <= target:
+            filler = self.rng.choice(FILLERS)
+            text += ' ' + filler
+            length += len(filler.split())
+        return text + '.'
+
+    def sentences(self, count):
+        return [self.sentence() for _ in range(count)]
+
+    def paragraph(self, sentences=5):
+        return ' '.join(self.sentences(sentences))
+
+    def document(self, words=None, paragraphs=4, sentences_per_paragraph=5):
+        """
+        A document of paragraphs separated by blank lines.
+
+        Args:
+            words (int, optional): Approximate word count; overrides the paragraph counts
+            paragraphs (int): Number of paragraphs when words is not given
+            sentences_per_paragraph (int): Sentences in each paragraph; with words, 0 puts
+                the whole document in one paragraph, like a paste without line breaks
+
+        Returns:
+            str: The document
+        """
+        if words is None:
+            return '\n\n'.join(self.paragraph(sentences_per_paragraph) for _ in range(paragraphs))
+
+        blocks = []
+        current = []
+        count = 0
+        while count < words:
+            sentence = self.sentence()
+            current.append(sentence)
+            count += len(sentence.split())
+            if sentences_per_paragraph and len(current) == sentences_per_paragraph:
+                blocks.append(' '.join(current))
+                current = []
+        if current:
+            blocks.append(' '.join(current))
+        return '\n\n'.join(blocks)
+
+
+def _base_form(verb):
+    """'covers' -> 'cover', 'simplifies' -> 'simplify'."""
+    if verb.endswith('ies'):
+        return verb[:-3] + 'y'
+    if verb.endswith(('ches', 'shes', 'sses', 'xes')):
+        return verb[:-2]
+    return verb[:-1]
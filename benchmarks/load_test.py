@@ -0,0 +1,564 @@
+"""
+End-to-end load test for the Flask app.
+
+Simulated users run sessions drawn from a weighted mix of scenarios:
+
+    editor   a document is analyzed, then edited in bursts of keystrokes; each
+             pause sends a delta to /analyze-text, the edited sentence is sent to
+             /translate and sometimes /alternative-suggestions is asked for a
+             replacement
+    paste    a multi-paragraph document is pasted and sent to /translate
+    upload   a .txt file is sent to /process-document and its text to /translate
+
+Each concurrency level of the sweep runs for a fixed time (or number of
+requests) with that many users. The report gives throughput, p50/p95/p99
+latency and error rate per endpoint and per scenario, and the number of LLM
+calls per request read from the mock server's /stats, as JSON and Markdown.
+Texts come from benchmarks.corpus with a fixed seed, so two runs of the same
+command against different commits send the same traffic; pass --baseline with
+an earlier JSON report to get a comparison table.
+
+    python -m benchmarks.mock_azure_server --port 8089 --latency lognormal:-1.5,0.5 &
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8089/ python app.py &
+    python -m benchmarks.load_test --mock-url http://127.0.0.1:8089/ --concurrency 1,4,16 \\
+        --duration 30 --output reports/load.json
+
+Or let the load test start both (the mock in-process, the app as a command):
+
+    python -m benchmarks.load_test --start-mock --app-command "python app.py" --concurrency 1,8
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import platform
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks import mock_azure_server
+from benchmarks.corpus import FRICTION_TYPES, Corpus
+
+DEFAULT_BASE_URL = os.environ.get('LOAD_TEST_BASE_URL', 'http://127.0.0.1:5000')
+DEFAULT_MIX = 'editor=0.7,paste=0.2,upload=0.1'
+ENDPOINTS = ('/translate', '/analyze-text', '/alternative-suggestions', '/process-document')
+PERCENTILES = (50, 95, 99)
+
+
+class Client:
+    """Keep-alive HTTP client for one simulated user; reconnects after a failure."""
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Send one request.
+
+        Returns:
+            tuple: (status, response bytes); status is 0 if the connection failed
+        """
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            self._connection.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            return 0, str(e).encode('utf-8')
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class Recorder:
+    """Collects one (endpoint, scenario, latency, ok) sample per request; shared by all users."""
+
+    def __init__(self):
+        self.samples = []
+        self.error_examples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, scenario, seconds, ok, error=None):
+        with self._lock:
+            self.samples.append((endpoint, scenario, seconds, ok))
+            if error and endpoint not in self.error_examples:
+                self.error_examples[endpoint] = error[:200]
+
+    def count(self):
+        with self._lock:
+            return len(self.samples)
+
+
+class User:
+    """One simulated user running scenario sessions against the app."""
+
+    def __init__(self, client, recorder, corpus, rng, think_time=0.0):
+        self.client = client
+        self.recorder = recorder
+        self.corpus = corpus
+        self.rng = rng
+        self.think_time = think_time
+        self.scenario = None
+
+    def call(self, endpoint, payload=None, body=None, headers=None):
+        """
+        POST to an endpoint and record the sample.
+
+        Returns:
+            dict or None: The JSON response if the request succeeded
+        """
+        if payload is not None:
+            body = json.dumps(payload).encode('utf-8')
+            headers = {'Content-Type': 'application/json'}
+
+        started = time.perf_counter()
+        status, raw = self.client.request('POST', endpoint, body=body, headers=headers)
+        elapsed = time.perf_counter() - started
+
+        data = None
+        error = None
+        if status == 0:
+            error = f"connection failed: {raw.decode('utf-8', 'replace')}"
+        else:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                error = f"HTTP {status}: response is not JSON"
+            else:
+                if status >= 400 and not (status == 409 and data.get('resync')):
+                    error = f"HTTP {status}: {data.get('error', '')}"
+                elif isinstance(data, dict) and data.get('success') is False and status != 409:
+                    error = f"HTTP {status}: {data.get('error', 'success is false')}"
+
+        self.recorder.add(endpoint, self.scenario, elapsed, error is None, error)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+        return data if error is None else None
+
+    def run(self, scenario):
+        self.scenario = scenario
+        getattr(self, f"_{scenario}")()
+
+    def _editor(self):
+        """Open a document, then type a few bursts into it the way the editor reports them."""
+        doc_id = uuid.uuid4().hex
+        text = self.corpus.document(paragraphs=self.rng.randint(1, 3),
+                                    sentences_per_paragraph=self.rng.randint(3, 6))
+        response = self.call('/analyze-text', {'doc_id': doc_id, 'text': text})
+        base_hash = response.get('text_hash') if response else None
+
+        for _ in range(self.rng.randint(2, 5)):
+            # A burst types a new sentence after an existing one; the editor sends one
+            # delta per pause, so the sentence arrives in a few pieces
+            position = _sentence_end(text, self.rng)
+            sentence = ' ' + self.corpus.sentence()
+            pieces = _split_keystrokes(sentence, self.rng.randint(1, 3), self.rng)
+            for piece in pieces:
+                payload = {'doc_id': doc_id, 'base_hash': base_hash,
+                           'delta': {'start': position, 'end': position, 'text': piece}}
+                text = text[:position] + piece + text[position:]
+                position += len(piece)
+                response = self.call('/analyze-text', payload)
+                if response and response.get('resync'):
+                    response = self.call('/analyze-text', {'doc_id': doc_id, 'text': text})
+                base_hash = response.get('text_hash') if response else _text_hash(text)
+
+            response = self.call('/translate', {'text': sentence.strip(), 'highlight': True})
+            if response and self.rng.random() < 0.3:
+                self.call('/alternative-suggestions',
+                          {'type': self.rng.choice(FRICTION_TYPES), 'text': sentence.strip()})
+
+    def _paste(self):
+        text = self.corpus.document(paragraphs=self.rng.randint(3, 6),
+                                    sentences_per_paragraph=self.rng.randint(4, 8))
+        self.call('/translate', {'text': text, 'highlight': True})
+
+    def _upload(self):
+        text = self.corpus.document(words=self.rng.randint(300, 1500))
+        body, content_type = _multipart('file', 'upload.txt', text.encode('utf-8'))
+        response = self.call('/process-document', body=body, headers={'Content-Type': content_type})
+        if response and response.get('text'):
+            self.call('/translate', {'text': response['text'], 'highlight': True})
+
+
+def run_level(base_url, users, mix, duration=None, requests=None, seed=0, think_time=0.0,
+              timeout=60, mock_stats=None):
+    """
+    Run one concurrency level.
+
+    Args:
+        base_url (str): Root URL of the app
+        users (int): Concurrent simulated users
+        mix (dict): Scenario name -> weight
+        duration (float, optional): Seconds to run
+        requests (int, optional): Stop after this many requests instead
+        seed (int): Seed for the texts and scenario choices
+        think_time (float): Mean pause between a user's requests, in seconds
+        timeout (float): Per-request timeout
+        mock_stats (callable, optional): Returns the mock server's counters
+
+    Returns:
+        dict: Summary of the level
+    """
+    recorder = Recorder()
+    stop = threading.Event()
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+
+    def worker(index):
+        rng = random.Random(f"{seed}:{users}:{index}")
+        user = User(Client(base_url, timeout), recorder,
+                    Corpus(seed=rng.randrange(2 ** 32)), rng, think_time)
+        try:
+            while not stop.is_set():
+                user.run(rng.choices(scenarios, weights)[0])
+                if requests is not None and recorder.count() >= requests:
+                    stop.set()
+        finally:
+            user.client.close()
+
+    llm_before = mock_stats() if mock_stats else None
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    if duration is not None:
+        stop.wait(duration)
+        stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    llm_after = mock_stats() if mock_stats else None
+
+    summary = summarize(recorder.samples, elapsed)
+    summary['concurrency'] = users
+    summary['error_examples'] = recorder.error_examples
+    if llm_before is not None and llm_after is not None:
+        llm = {name: llm_after.get(name, 0) - llm_before.get(name, 0)
+               for name in ('requests', 'throttled_random', 'throttled_quota', 'server_errors')}
+        llm['calls_per_request'] = round(llm['requests'] / summary['requests'], 3) if summary['requests'] else None
+        llm['max_in_flight'] = llm_after.get('max_in_flight')
+        summary['llm'] = llm
+    return summary
+
+
+def summarize(samples, elapsed):
+    """
+    Aggregate request samples.
+
+    Args:
+        samples (list): (endpoint, scenario, seconds, ok) tuples
+        elapsed (float): Wall-clock seconds the samples were collected over
+
+    Returns:
+        dict: Totals plus 'endpoints' and 'scenarios' breakdowns
+    """
+    summary = _stats([sample[2] for sample in samples], [sample[3] for sample in samples], elapsed)
+    summary['elapsed'] = round(elapsed, 3)
+    for key, position in (('endpoints', 0), ('scenarios', 1)):
+        groups = {}
+        for sample in samples:
+            groups.setdefault(sample[position], []).append(sample)
+        summary[key] = {name: _stats([s[2] for s in group], [s[3] for s in group], elapsed)
+                        for name, group in sorted(groups.items())}
+    return summary
+
+
+def _stats(latencies, oks, elapsed):
+    ordered = sorted(latencies)
+    errors = oks.count(False)
+    stats = {
+        'requests': len(ordered),
+        'errors': errors,
+        'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+        'throughput': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(1000 * sum(ordered) / len(ordered), 2) if ordered else None,
+        'max_ms': round(1000 * ordered[-1], 2) if ordered else None
+    }
+    for p in PERCENTILES:
+        value = percentile(ordered, p)
+        stats[f"p{p}_ms"] = round(1000 * value, 2) if value is not None else None
+    return stats
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list; None if it is empty."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def render_markdown(report, baseline=None):
+    """Format a report (and optionally its comparison with a baseline report) as Markdown."""
+    meta = report['meta']
+    lines = [
+        f"# Load test {meta['commit'] or 'unknown commit'}",
+        '',
+        f"- Started: {meta['started']}",
+        f"- Target: {meta['base_url']}",
+        f"- Mix: {', '.join(f'{name}={weight}' for name, weight in meta['mix'].items())}",
+        f"- Per level: {_level_limit(meta)}; seed {meta['seed']}; think time {meta['think_time']}s",
+        f"- Python {meta['python']} on {meta['platform']}",
+        ''
+    ]
+
+    lines += ['## Summary', '',
+              '| Users | Requests | Req/s | p50 ms | p95 ms | p99 ms | Errors | LLM calls/req | LLM 429s |',
+              '|---:|---:|---:|---:|---:|---:|---:|---:|---:|']
+    for level in report['levels']:
+        llm = level.get('llm') or {}
+        throttled = (llm.get('throttled_random', 0) + llm.get('throttled_quota', 0)) if llm else None
+        lines.append(f"| {level['concurrency']} | {level['requests']} | {level['throughput']} | "
+                     f"{_fmt(level['p50_ms'])} | {_fmt(level['p95_ms'])} | {_fmt(level['p99_ms'])} | "
+                     f"{_percent(level['error_rate'])} | {_fmt(llm.get('calls_per_request'))} | {_fmt(throttled)} |")
+
+    for level in report['levels']:
+        lines += ['', f"## {level['concurrency']} users", '',
+                  '| Endpoint / scenario | Requests | Req/s | p50 ms | p95 ms | p99 ms | Errors |',
+                  '|---|---:|---:|---:|---:|---:|---:|']
+        for key, label in (('endpoints', ''), ('scenarios', 'scenario ')):
+            for name, stats in level[key].items():
+                lines.append(f"| {label}{name} | {stats['requests']} | {stats['throughput']} | "
+                             f"{_fmt(stats['p50_ms'])} | {_fmt(stats['p95_ms'])} | {_fmt(stats['p99_ms'])} | "
+                             f"{_percent(stats['error_rate'])} |")
+        for endpoint, example in level.get('error_examples', {}).items():
+            lines.append(f"\nFirst error on {endpoint}: `{example}`")
+
+    if baseline:
+        lines += ['', f"## Compared with {baseline['meta']['commit'] or 'baseline'}", '',
+                  '| Users | Req/s | p50 ms | p95 ms | p99 ms | Error rate |',
+                  '|---:|---:|---:|---:|---:|---:|']
+        previous = {level['concurrency']: level for level in baseline['levels']}
+        for level in report['levels']:
+            before = previous.get(level['concurrency'])
+            if before is None:
+                continue
+            cells = [_change(before[key], level[key]) for key in
+                     ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')]
+            cells.append(f"{_percent(before['error_rate'])} -> {_percent(level['error_rate'])}")
+            lines.append(f"| {level['concurrency']} | " + ' | '.join(cells) + ' |')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _fmt(value):
+    return '-' if value is None else f"{value}"
+
+
+def _percent(rate):
+    return f"{100 * rate:.2f}%"
+
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return f"{_fmt(before)} -> {_fmt(after)}"
+    return f"{before} -> {after} ({100 * (after - before) / before:+.1f}%)"
+
+
+def _level_limit(meta):
+    if meta['requests'] is not None:
+        return f"{meta['requests']} requests"
+    return f"{meta['duration']}s"
+
+
+def _sentence_end(text, rng):
+    """Offset just after a random sentence-ending period of text (or its end)."""
+    ends = [index + 1 for index, char in enumerate(text) if char == '.']
+    return rng.choice(ends) if ends else len(text)
+
+
+def _split_keystrokes(text, pieces, rng):
+    """Split typed text into the chunks sent at each typing pause."""
+    cuts = sorted(rng.sample(range(1, len(text)), min(pieces - 1, len(text) - 1)))
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: text/plain\r\n\r\n").encode('utf-8') + content + f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def parse_mix(spec):
+    """'editor=0.7,paste=0.2' -> {'editor': 0.7, 'paste': 0.2}"""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if not hasattr(User, f"_{name}"):
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit():
+    """Short hash of the checked-out commit, with '+dirty' for uncommitted changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('+dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def fetch_json(url, timeout=5):
+    client = Client(url, timeout)
+    try:
+        status, raw = client.request('GET', '')
+        return json.loads(raw) if status == 200 else None
+    except ValueError:
+        return None
+    finally:
+        client.close()
+
+
+def wait_for_app(base_url, process=None, timeout=120):
+    """Poll /startup-report until the app answers; fails early if its process exits."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode} before accepting requests")
+        if fetch_json(base_url.rstrip('/') + '/startup-report', timeout=2) is not None:
+            return
+        time.sleep(0.5)
+    raise RuntimeError(f"App at {base_url} did not answer within {timeout} seconds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Flask app and report latency percentiles')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='Root URL of the app')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated numbers of concurrent users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per concurrency level')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='Requests per concurrency level (instead of --duration)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between a user's requests")
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--output', default=None,
+                        help='Write the JSON report here and the Markdown report next to it (.md)')
+    parser.add_argument('--baseline', default=None, help='Earlier JSON report to compare with')
+    parser.add_argument('--mock-url', default=None, help='URL of a running mock server, for LLM call counts')
+    parser.add_argument('--start-mock', action='store_true', help='Run the mock server in this process')
+    parser.add_argument('--mock-port', type=int, default=mock_azure_server.DEFAULT_PORT,
+                        help='Port for --start-mock')
+    parser.add_argument('--app-command', default=None,
+                        help='Command that starts the app; it gets AZURE_OPENAI_ENDPOINT of the mock')
+    # The mock's --seed also seeds the texts and scenario choices
+    mock_options = parser.add_argument_group('mock server (with --start-mock; --seed also seeds the traffic)')
+    mock_azure_server.add_arguments(mock_options)
+    args = parser.parse_args()
+
+    levels = [int(value) for value in args.concurrency.split(',') if value.strip()]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    mock = None
+    app_process = None
+    try:
+        mock_url = args.mock_url
+        if args.start_mock:
+            mock = mock_azure_server.MockAzureServer(mock_azure_server.build_state(args),
+                                                     port=args.mock_port).start()
+            mock_url = mock.endpoint
+            print(f"Mock Azure OpenAI running at {mock_url}")
+
+        if args.app_command:
+            env = dict(os.environ)
+            if mock_url:
+                env['AZURE_OPENAI_ENDPOINT'] = mock_url
+                env.setdefault('AZURE_OPENAI_API_KEY', 'load-test')
+            app_process = subprocess.Popen(shlex.split(args.app_command), env=env,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for_app(args.base_url, app_process, timeout=120 if app_process else 5)
+
+        mock_stats = None
+        if mock is not None:
+            mock_stats = mock.state.stats
+        elif mock_url:
+            stats_url = mock_url.rstrip('/') + '/stats'
+            mock_stats = lambda: fetch_json(stats_url)
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'base_url': args.base_url,
+                'mix': args.mix,
+                'duration': args.duration if args.requests is None else None,
+                'requests': args.requests,
+                'think_time': args.think_time,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'mock': f"in-process, latency {args.latency}" if mock else mock_url
+            },
+            'levels': []
+        }
+
+        for users in levels:
+            print(f"Running {users} concurrent users...")
+            level = run_level(args.base_url, users, args.mix,
+                              duration=args.duration if args.requests is None else None,
+                              requests=args.requests, seed=args.seed, think_time=args.think_time,
+                              timeout=args.timeout, mock_stats=mock_stats)
+            report['levels'].append(level)
+            llm = level.get('llm') or {}
+            print(f"  {level['requests']} requests, {level['throughput']} req/s, "
+                  f"p50 {level['p50_ms']} ms, p95 {level['p95_ms']} ms, p99 {level['p99_ms']} ms, "
+                  f"errors {_percent(level['error_rate'])}, LLM calls/request {_fmt(llm.get('calls_per_request'))}")
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=10)
+        if mock is not None:
+            mock.stop()
+
+    markdown = render_markdown(report, baseline)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        markdown_path = os.path.splitext(args.output)[0] + '.md'
+        with open(markdown_path, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        print(f"Wrote {args.output} and {markdown_path}")
+    else:
+        sys.stdout.write(markdown)
+
+
+if __name__ == "__main__":
+    main()
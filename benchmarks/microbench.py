@@ -0,0 +1,483 @@
+"""
+Micro-benchmarks for the CPU hot paths of the text pipeline.
+
+Every benchmark runs on synthetic documents from benchmarks.corpus, at sizes
+from a single sentence up to 100k words, with the LLM replaced by the mock
+server's rule-based completions (no network, no threads waiting on I/O). For
+each size it reports the best and median wall time of a few runs and, from one
+extra run under tracemalloc, the peak and retained memory. The growth exponent
+between consecutive sizes (time ~ size^k) is reported as well; k well above 1
+marks a super-linear blowup.
+
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --only highlight_changes_inline,near_duplicates --sizes 1000,10000,100000
+    python -m benchmarks.microbench --density 0.8 --paragraph-sentences 0 --output reports/micro.json
+
+Caches (friction detections, diffs, sentence results) are cleared before every
+run, so the numbers are for text the process has not seen yet.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from benchmarks.corpus import Corpus
+from benchmarks.load_test import git_commit
+from benchmarks.mock_azure_server import completion_for, rewrite
+
+DEFAULT_SIZES = 'sentence,100,1000,10000,100000'
+
+# Growth exponent above which a step between two sizes is flagged as super-linear
+SUPERLINEAR_EXPONENT = 1.3
+
+# Steps faster than this are too noisy to judge their growth
+MIN_FLAG_SECONDS = 0.005
+
+Benchmark = namedtuple('Benchmark', ['name', 'stage', 'setup'])
+
+BENCHMARKS = {}
+
+
+def benchmark(name, stage):
+    """Register a setup function; it receives a Workload and returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, stage, setup)
+        return setup
+    return register
+
+
+class Workload:
+    """One synthetic document and the derived inputs the benchmarks need."""
+
+    def __init__(self, size, corpus, paragraph_sentences=5):
+        """
+        Generate the document.
+
+        Args:
+            size (str or int): 'sentence' or an approximate word count
+            corpus (Corpus): Generator to draw the text from
+            paragraph_sentences (int): Sentences per paragraph; 0 for a single paragraph
+        """
+        from processor.friction_patterns import friction_patterns
+        from processor.segmenter import sentence_spans
+
+        self.size = size
+        if size == 'sentence':
+            self.text = corpus.sentence(friction_type=corpus.rng.choice(corpus.types or ('none',)))
+        else:
+            self.text = corpus.document(words=size, sentences_per_paragraph=paragraph_sentences)
+        self.words = len(self.text.split())
+        spans = sentence_spans(self.text)
+        self.sentences = [self.text[start:end] for start, end in spans]
+
+        # What the pipeline would turn the text into, sentence by sentence
+        self.rewritten_sentences = []
+        self.changes = []
+        for sentence in self.sentences:
+            categories = [category for category in ('but', 'should', 'not')
+                          if friction_patterns.contains(sentence, category)]
+            rewritten = rewrite(sentence, categories)
+            self.rewritten_sentences.append(rewritten)
+            if rewritten != sentence:
+                self.changes.append({
+                    'type': categories[0],
+                    'original': sentence,
+                    'translated': rewritten,
+                    'explanation': f'Replaced "{categories[0]}" type friction language using Azure OpenAI'
+                })
+        pieces = []
+        position = 0
+        for (start, end), rewritten in zip(spans, self.rewritten_sentences):
+            pieces.append(self.text[position:start])
+            pieces.append(rewritten)
+            position = end
+        pieces.append(self.text[position:])
+        self.rewritten_text = ''.join(pieces)
+
+
+def stub_llm(self, prompt_text, max_tokens=150, temperature=0.3, raw=False):
+    """Stand-in for AzureTranslator.call_azure_openai_api answering from the mock's rules."""
+    return completion_for(prompt_text)
+
+
+@contextlib.contextmanager
+def stubbed_llm():
+    """Route every translator's LLM call to stub_llm while the block runs."""
+    from processor.translators.azure_translator import AzureTranslator
+
+    original = AzureTranslator.call_azure_openai_api
+    AzureTranslator.call_azure_openai_api = stub_llm
+    try:
+        yield
+    finally:
+        AzureTranslator.call_azure_openai_api = original
+
+
+def clear_caches():
+    """Forget every memoized detection, diff and response so each run starts cold."""
+    from processor.diff_engine import diff_engine
+    from processor.friction_patterns import friction_patterns
+
+    friction_patterns._detections.clear()
+    diff_engine._scripts.clear()
+    translators = sys.modules.get('processor.translators.azure_translator')
+    if translators is not None:
+        translators.response_cache.clear()
+
+
+def _text_processor(**options):
+    from processor.text_processor import TextProcessor
+
+    # Serial processing keeps the timings about CPU work rather than thread scheduling
+    options.setdefault('max_workers', 1)
+    return TextProcessor(api_key='benchmark', endpoint='http://127.0.0.1:9/', **options)
+
+
+@benchmark('sentence_parser.parse', 'segmentation')
+def _sentence_parser(workload):
+    from processor.sentence_parser import SentenceParser
+
+    parser = SentenceParser()
+    return lambda: parser.parse(workload.text)
+
+
+@benchmark('friction_patterns.detect', 'detection')
+def _detect(workload):
+    # The scan process_sentence runs on each sentence before choosing translators
+    from processor.friction_patterns import friction_patterns
+
+    return lambda: [friction_patterns.detect(sentence) for sentence in workload.sentences]
+
+
+@benchmark('text_processor.process_sentence', 'translation')
+def _process_sentence(workload):
+    processor = _text_processor(batch_size=1)
+
+    def run():
+        processor.sentence_cache.clear()
+        for sentence in workload.sentences:
+            processor.process_sentence(sentence)
+    return run
+
+
+@benchmark('text_processor.process_text', 'pipeline')
+def _process_text(workload):
+    processor = _text_processor()
+
+    def run():
+        processor.sentence_cache.clear()
+        processor.process_text(workload.text, highlight_changes=True)
+    return run
+
+
+@benchmark('near_duplicates', 'deduplication')
+def _near_duplicates(workload):
+    # Replaces TextProcessor._is_similar_sentence, which compared every pair of segments
+    from processor.near_duplicates import NearDuplicateIndex
+
+    def run():
+        index = NearDuplicateIndex()
+        for sentence in workload.rewritten_sentences:
+            if not index.contains_similar(sentence):
+                index.add(sentence)
+    return run
+
+
+@benchmark('highlight_changes_inline', 'highlighting')
+def _highlight_changes_inline(workload):
+    processor = _text_processor()
+    return lambda: processor.highlight_changes_inline(workload.text, workload.rewritten_text)
+
+
+@benchmark('diff_engine.diff', 'diff')
+def _diff(workload):
+    # Replaces TextProcessor._find_exact_matches; the whole text is diffed as one pair
+    from processor.diff_engine import DiffEngine
+
+    return lambda: DiffEngine(cache_size=1).diff(workload.text, workload.rewritten_text)
+
+
+@benchmark('text_processor._extract_friction_words', 'reporting')
+def _extract_friction_words(workload):
+    processor = _text_processor()
+    return lambda: processor._extract_friction_words(workload.changes)
+
+
+@benchmark('not_translator.contains_negation', 'detection')
+def _contains_negation(workload):
+    from processor.translators.not_translator import NotTranslator
+
+    translator = NotTranslator(api_key='benchmark', endpoint='http://127.0.0.1:9/')
+    return lambda: [translator.contains_negation(sentence) for sentence in workload.sentences]
+
+
+@benchmark('azure_translator.fix_punctuation_spacing', 'post-processing')
+def _fix_punctuation_spacing(workload):
+    from processor.translators.azure_translator import AzureTranslator
+
+    translator = AzureTranslator(api_key='benchmark', endpoint='http://127.0.0.1:9/')
+    return lambda: translator.fix_punctuation_spacing(workload.rewritten_text)
+
+
+def measure(run, repeat=3, allocations=True):
+    """
+    Time a callable and, optionally, trace its allocations.
+
+    Args:
+        run (callable): Work to measure
+        repeat (int): Timed runs
+        allocations (bool): Add one run under tracemalloc
+
+    Returns:
+        dict: best_ms, median_ms and, with allocations, peak_kib and retained_kib
+    """
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    result = {
+        'best_ms': round(1000 * min(timings), 3),
+        'median_ms': round(1000 * statistics.median(timings), 3)
+    }
+    if allocations:
+        clear_caches()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            value = run()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del value
+        result['peak_kib'] = round((peak - before) / 1024, 1)
+        result['retained_kib'] = round((retained - before) / 1024, 1)
+    return result
+
+
+def growth(previous, current):
+    """Exponent k of time ~ words^k between two measured sizes, or None if undefined."""
+    if previous['words'] == current['words'] or previous['best_ms'] <= 0 or current['best_ms'] <= 0:
+        return None
+    return round(math.log(current['best_ms'] / previous['best_ms'])
+                 / math.log(current['words'] / previous['words']), 2)
+
+
+def run_benchmarks(names, sizes, corpus_options, repeat=3, allocations=True, budget=60.0, log=print):
+    """
+    Run benchmarks over a range of sizes.
+
+    Args:
+        names (list): Registered benchmark names
+        sizes (list): 'sentence' and/or word counts, smallest first
+        corpus_options (dict): seed, friction_density, sentence_words and paragraph_sentences
+        repeat (int): Timed runs per size
+        allocations (bool): Trace allocations
+        budget (float): A benchmark whose run takes longer than this many seconds skips the larger sizes
+        log (callable): Progress output
+
+    Returns:
+        dict: Benchmark name -> {'stage', 'results'} with one entry per size
+    """
+    options = dict(corpus_options)
+    paragraph_sentences = options.pop('paragraph_sentences', 5)
+    workloads = {}
+    report = {}
+
+    with stubbed_llm(), open(os.devnull, 'w') as devnull:
+        for name in names:
+            entry = BENCHMARKS[name]
+            results = []
+            skip_reason = None
+            for size in sizes:
+                if size not in workloads:
+                    # The same seed gives every benchmark the same text at a given size
+                    workloads[size] = Workload(size, Corpus(**options), paragraph_sentences)
+                workload = workloads[size]
+
+                if skip_reason:
+                    results.append({'size': size, 'words': workload.words, 'skipped': skip_reason})
+                    continue
+
+                # The pipeline logs every step with print(); keep it out of the report
+                with contextlib.redirect_stdout(devnull):
+                    measured = measure(entry.setup(workload), repeat=repeat, allocations=allocations)
+                result = dict(size=size, words=workload.words, sentences=len(workload.sentences), **measured)
+
+                previous = next((r for r in reversed(results) if 'best_ms' in r), None)
+                if previous is not None:
+                    result['growth'] = growth(previous, result)
+                    result['superlinear'] = bool(
+                        result['growth'] is not None and result['growth'] > SUPERLINEAR_EXPONENT
+                        and result['best_ms'] / 1000 >= MIN_FLAG_SECONDS
+                    )
+                results.append(result)
+                log(f"{name:45} {str(size):>9} {result['best_ms']:>12.3f} ms"
+                    + (f"  k={result['growth']}" if result.get('growth') is not None else '')
+                    + ('  SUPER-LINEAR' if result.get('superlinear') else ''))
+
+                if result['median_ms'] / 1000 > budget:
+                    skip_reason = f"previous size took {result['median_ms'] / 1000:.1f}s (budget {budget}s)"
+            report[name] = {'stage': entry.stage, 'results': results}
+    return report
+
+
+def render_markdown(report, baseline=None):
+    """Format a report (and optionally its comparison with a baseline report) as Markdown."""
+    meta = report['meta']
+    lines = [
+        f"# Micro-benchmarks {meta['commit'] or 'unknown commit'}",
+        '',
+        f"- Started: {meta['started']}",
+        f"- Corpus: seed {meta['seed']}, friction density {meta['density']}, "
+        f"{meta['sentence_words'][0]}-{meta['sentence_words'][1]} words per sentence, "
+        f"{meta['paragraph_sentences'] or 'one paragraph of all'} sentences per paragraph",
+        f"- {meta['repeat']} timed runs per size; Python {meta['python']} on {meta['platform']}",
+        ''
+    ]
+
+    previous = {}
+    if baseline:
+        for name, entry in baseline['benchmarks'].items():
+            for result in entry['results']:
+                previous[(name, str(result['size']))] = result
+
+    for name, entry in report['benchmarks'].items():
+        lines += [f"## {name} ({entry['stage']})", '']
+        header = '| Size | Words | Best ms | Median ms | Peak KiB | Retained KiB | Growth k |'
+        rule = '|---|---:|---:|---:|---:|---:|---:|'
+        if baseline:
+            header += ' Baseline ms | Change |'
+            rule += '---:|---:|'
+        lines += [header, rule]
+        for result in entry['results']:
+            if 'skipped' in result:
+                lines.append(f"| {result['size']} | {result['words']} | skipped: {result['skipped']} |")
+                continue
+            k = result.get('growth')
+            k_cell = '-' if k is None else (f"**{k}**" if result.get('superlinear') else f"{k}")
+            row = (f"| {result['size']} | {result['words']} | {result['best_ms']} | {result['median_ms']} | "
+                   f"{result.get('peak_kib', '-')} | {result.get('retained_kib', '-')} | {k_cell} |")
+            if baseline:
+                before = previous.get((name, str(result['size'])))
+                if before and before.get('best_ms'):
+                    change = 100 * (result['best_ms'] - before['best_ms']) / before['best_ms']
+                    row += f" {before['best_ms']} | {change:+.1f}% |"
+                else:
+                    row += ' - | - |'
+            lines.append(row)
+        lines.append('')
+
+    flagged = [(name, result) for name, entry in report['benchmarks'].items()
+               for result in entry['results'] if result.get('superlinear')]
+    if flagged:
+        lines += ['## Super-linear steps', '']
+        for name, result in flagged:
+            lines.append(f"- {name} at {result['size']}: time grows with words^{result['growth']}")
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def parse_sizes(spec):
+    """'sentence,100,1k,100k' -> ['sentence', 100, 1000, 100000]"""
+    sizes = []
+    for part in spec.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part == 'sentence':
+            sizes.append(part)
+        elif part.endswith('k'):
+            sizes.append(int(float(part[:-1]) * 1000))
+        else:
+            sizes.append(int(part))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CPU hot paths of the text pipeline')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"'sentence' and/or word counts, smallest first (default {DEFAULT_SIZES})")
+    parser.add_argument('--only', default=None,
+                        help='Comma-separated benchmarks to run: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per size')
+    parser.add_argument('--no-allocations', action='store_true', help='Skip the tracemalloc run')
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='Skip the larger sizes of a benchmark once a run takes longer (seconds)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--density', type=float, default=0.3, help='Share of sentences with friction language')
+    parser.add_argument('--sentence-words', default='8,18', help='Minimum and maximum words per sentence')
+    parser.add_argument('--paragraph-sentences', type=int, default=5,
+                        help='Sentences per paragraph; 0 for one paragraph, like a paste without line breaks')
+    parser.add_argument('--output', default=None,
+                        help='Write the JSON report here and the Markdown report next to it (.md)')
+    parser.add_argument('--baseline', default=None, help='Earlier JSON report to compare with')
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [name.strip() for name in args.only.split(',') if name.strip()]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+    sizes = parse_sizes(args.sizes)
+    sentence_words = tuple(int(value) for value in args.sentence_words.split(','))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'sizes': sizes,
+            'seed': args.seed,
+            'density': args.density,
+            'sentence_words': sentence_words,
+            'paragraph_sentences': args.paragraph_sentences,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'benchmarks': run_benchmarks(
+            names, sizes,
+            {'seed': args.seed, 'friction_density': args.density, 'sentence_words': sentence_words,
+             'paragraph_sentences': args.paragraph_sentences},
+            repeat=args.repeat, allocations=not args.no_allocations, budget=args.budget
+        )
+    }
+
+    markdown = render_markdown(report, baseline)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        markdown_path = os.path.splitext(args.output)[0] + '.md'
+        with open(markdown_path, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        print(f"Wrote {args.output} and {markdown_path}")
+    else:
+        sys.stdout.write(markdown)
+
+
+if __name__ == "__main__":
+    main()
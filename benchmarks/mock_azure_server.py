@@ -0,0 +1,585 @@
+"""
+Local stand-in for the Azure OpenAI chat-completions endpoint.
+
+Speaks the REST shape AzureTranslator uses (POST
+/openai/deployments/<deployment>/chat/completions, plain and streaming), so the
+app, the translators and the benchmarks can run on an offline box. Rewrites are
+rule-based and deterministic: each prompt is recognized as a BUT, SHOULD or NOT
+prompt (or a combined / batched one), the input sentence is pulled out and a
+fixed word substitution is applied.
+
+Latency, throttling and failures are configurable:
+    * latency distributions (fixed, uniform, normal, lognormal, exponential)
+      plus a per-output-token cost
+    * random 429s and an optional requests/tokens-per-minute quota, both
+      answered with Retry-After and x-ratelimit-* headers
+    * bursts of consecutive 5xx responses
+    * slow-drip streams with a delay between chunks
+
+Run it and point the app at it through the environment:
+
+    python -m benchmarks.mock_azure_server --port 8089 --latency lognormal:-1.5,0.5 --rate-429 0.02
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8089/ python app.py
+
+GET /stats returns request counters; GET /healthz answers 200.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = os.environ.get('MOCK_AZURE_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('MOCK_AZURE_PORT', 8089))
+
+COMPLETIONS_PATH = re.compile(r'^/openai/deployments/([^/]+)/chat/completions$')
+
+# Headings that introduce the sentence in the translators' and prompts.json templates
+INPUT_HEADING = re.compile(
+    r'^(?:INPUT(?: SENTENCE| TEXT)?|SENTENCE TO TRANSFORM|TEXT TO TRANSFORM):[ \t]*$', re.MULTILINE
+)
+# Any heading line, which ends the input block
+HEADING = re.compile(r'^[A-Z][A-Z ]+:[ \t]*$', re.MULTILINE)
+# "=== STEP 1: BUT ===" sections of a combined prompt
+COMBINED_STEP = re.compile(r'^=== STEP \d+: ([A-Z]+) ===$', re.MULTILINE)
+# "[n] sentence" entries of a batched prompt
+BATCH_ENTRY = re.compile(r'\[(\d+)\]\s*')
+
+# Deterministic rewrites per category, applied in order (case of the first letter is kept)
+REWRITES = {
+    'but': [
+        (re.compile(r',\s*(?:but|yet)\b', re.IGNORECASE), ', and at the same time'),
+        (re.compile(r'\b(?:but|yet)\b', re.IGNORECASE), 'and'),
+    ],
+    'should': [
+        (re.compile(r"\b(?:shouldn't|should not|couldn't|could not|wouldn't|would not)\b", re.IGNORECASE),
+         'might not'),
+        (re.compile(r'\b(?:should|could|would)\b', re.IGNORECASE), 'might'),
+        (re.compile(r'\bneed to\b', re.IGNORECASE), 'might want to'),
+    ],
+    'not': [
+        (re.compile(r"\bcan(?:'t|not)\b", re.IGNORECASE), 'struggle to'),
+        (re.compile(r"\b(?:don't|do not|doesn't|does not)\b", re.IGNORECASE), 'rarely'),
+        (re.compile(r"\b(?:didn't|did not)\b", re.IGNORECASE), 'failed to'),
+        (re.compile(r"\b(?:isn't|is not)\b", re.IGNORECASE), 'is far from'),
+        (re.compile(r"\b(?:aren't|are not)\b", re.IGNORECASE), 'are far from'),
+        (re.compile(r"\b(?:wasn't|was not)\b", re.IGNORECASE), 'was far from'),
+        (re.compile(r"\b(?:won't|will not)\b", re.IGNORECASE), 'will avoid'),
+        (re.compile(r'\bnever\b', re.IGNORECASE), 'rarely'),
+        (re.compile(r'\bnot\b', re.IGNORECASE), 'hardly'),
+    ],
+}
+
+
+def rewrite(text, categories):
+    """
+    Apply the rule-based rewrites of the given categories, in order.
+
+    Args:
+        text (str): Sentence to rewrite
+        categories (list): Categories ('but', 'should', 'not') to apply
+
+    Returns:
+        str: The rewritten sentence
+    """
+    for category in categories:
+        for pattern, replacement in REWRITES[category]:
+            text = pattern.sub(lambda match, r=replacement: _match_case(match.group(0), r), text)
+    return text
+
+
+def _match_case(original, replacement):
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def prompt_category(prompt):
+    """Guess which translator wrote a single-step prompt from its opening lines."""
+    opening = prompt.strip()[:400].lower()
+    if 'modal verb' in opening:
+        return 'should'
+    if "'but'" in opening or '"but"' in opening or "'yet'" in opening:
+        return 'but'
+    return 'not'
+
+
+def extract_input(prompt):
+    """
+    Pull the input text out of a prompt: the block under the last input heading,
+    or the last non-empty line when the template has no heading.
+    """
+    headings = list(INPUT_HEADING.finditer(prompt))
+    if not headings:
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        return lines[-1] if lines else ''
+    rest = prompt[headings[-1].end():]
+    end = HEADING.search(rest)
+    return (rest[:end.start()] if end else rest).strip()
+
+
+def completion_for(prompt):
+    """
+    Build the completion a well-behaved model would return for one of the app's prompts.
+
+    Args:
+        prompt (str): User message of the request
+
+    Returns:
+        str: The completion text
+    """
+    text = extract_input(prompt)
+
+    steps = COMBINED_STEP.findall(prompt)
+    if steps:
+        # Combined prompt: report the sentence after every step
+        current = text
+        reported = []
+        for category in steps:
+            category = category.lower()
+            current = rewrite(current, [category]) if category in REWRITES else current
+            reported.append({'category': category, 'text': current})
+        return json.dumps({'steps': reported})
+
+    category = prompt_category(prompt)
+    if 'BATCH MODE:' in prompt:
+        # Batched prompt: one "[n] sentence" entry per line (or run together in paragraph style)
+        parts = BATCH_ENTRY.split(text)
+        entries = [
+            {'id': int(number), 'text': rewrite(sentence.strip(), [category])}
+            for number, sentence in zip(parts[1::2], parts[2::2])
+        ]
+        return json.dumps(entries)
+
+    return rewrite(text, [category])
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), as reported in 'usage'."""
+    return max(1, len(text) // 4)
+
+
+class LatencyModel:
+    """Samples response latencies from a distribution given as 'name:param,param'."""
+
+    def __init__(self, spec='fixed:0', per_token=0.0):
+        """
+        Initialize the model.
+
+        Args:
+            spec (str): 'fixed:s', 'uniform:low,high', 'normal:mean,stdev',
+                'lognormal:mu,sigma' (of the log of seconds) or 'exp:mean'
+            per_token (float): Extra seconds per completion token
+        """
+        name, _, params = spec.partition(':')
+        self.name = name.strip().lower()
+        self.params = [float(value) for value in params.split(',') if value.strip()]
+        self.per_token = per_token
+        if self.name not in ('fixed', 'uniform', 'normal', 'lognormal', 'exp'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng, tokens=0):
+        """
+        Draw one latency.
+
+        Args:
+            rng (random.Random): Source of randomness
+            tokens (int): Completion tokens of the response
+
+        Returns:
+            float: Seconds to wait before answering
+        """
+        p = self.params
+        if self.name == 'fixed':
+            seconds = p[0] if p else 0.0
+        elif self.name == 'uniform':
+            seconds = rng.uniform(p[0], p[1])
+        elif self.name == 'normal':
+            seconds = rng.gauss(p[0], p[1])
+        elif self.name == 'lognormal':
+            seconds = rng.lognormvariate(p[0], p[1])
+        else:
+            seconds = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, seconds) + self.per_token * tokens
+
+
+class MockAzureState:
+    """Fault injection settings, quota windows and counters shared by all request threads."""
+
+    def __init__(self, latency=None, rate_429=0.0, retry_after=1.0, rpm=0, tpm=0,
+                 error_rate=0.0, burst_length=3, error_status=500,
+                 drip_delay=0.0, drip_tokens=1, require_key=True, seed=0):
+        """
+        Initialize the state.
+
+        Args:
+            latency (LatencyModel, optional): Latency before each response. Defaults to none.
+            rate_429 (float): Probability that a request is throttled regardless of quota
+            retry_after (float): Seconds sent in Retry-After for random 429s
+            rpm (int): Requests per minute before quota 429s (0 for unlimited)
+            tpm (int): Tokens per minute before quota 429s (0 for unlimited)
+            error_rate (float): Probability that a request starts a 5xx burst
+            burst_length (int): Consecutive requests failing in one burst
+            error_status (int): Status code of burst failures (e.g. 500, 503)
+            drip_delay (float): Seconds between chunks of a streamed response
+            drip_tokens (int): Words per streamed chunk
+            require_key (bool): Answer 401 when the api-key header is missing, like Azure
+            seed (int): Seed for the random choices, so runs are reproducible
+        """
+        self.latency = latency or LatencyModel()
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.tpm = tpm
+        self.error_rate = error_rate
+        self.burst_length = burst_length
+        self.error_status = error_status
+        self.drip_delay = drip_delay
+        self.drip_tokens = max(1, drip_tokens)
+        self.require_key = require_key
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+        self._window = deque()  # (time, tokens) of requests admitted in the last minute
+
+        self.counters = {
+            'requests': 0,
+            'completions': 0,
+            'streams': 0,
+            'throttled_random': 0,
+            'throttled_quota': 0,
+            'server_errors': 0,
+            'unauthorized': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+        }
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+            if name == 'in_flight':
+                self.counters['max_in_flight'] = max(self.counters['max_in_flight'], self.counters['in_flight'])
+
+    def admit(self, tokens):
+        """
+        Decide how to answer a request.
+
+        Args:
+            tokens (int): Estimated prompt plus completion tokens of the request
+
+        Returns:
+            tuple: ('ok', None), ('throttle', retry_after_seconds) or ('error', status)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._burst_remaining == 0 and self.error_rate and self._rng.random() < self.error_rate:
+                self._burst_remaining = self.burst_length
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                self.counters['server_errors'] += 1
+                return 'error', self.error_status
+
+            if self.rate_429 and self._rng.random() < self.rate_429:
+                self.counters['throttled_random'] += 1
+                return 'throttle', self.retry_after
+
+            while self._window and now - self._window[0][0] >= 60:
+                self._window.popleft()
+            used_tokens = sum(window_tokens for _, window_tokens in self._window)
+            over_requests = self.rpm and len(self._window) >= self.rpm
+            over_tokens = self.tpm and self._window and used_tokens + tokens > self.tpm
+            if over_requests or over_tokens:
+                self.counters['throttled_quota'] += 1
+                # Until the oldest admitted request leaves the window
+                return 'throttle', max(0.05, 60 - (now - self._window[0][0]))
+            self._window.append((now, tokens))
+            return 'ok', None
+
+    def quota_headers(self):
+        """x-ratelimit-* headers describing the configured quota, as Azure sends them."""
+        headers = {}
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] >= 60:
+                self._window.popleft()
+            if self.rpm:
+                headers['x-ratelimit-limit-requests'] = str(self.rpm)
+                headers['x-ratelimit-remaining-requests'] = str(max(0, self.rpm - len(self._window)))
+            if self.tpm:
+                used = sum(tokens for _, tokens in self._window)
+                headers['x-ratelimit-limit-tokens'] = str(self.tpm)
+                headers['x-ratelimit-remaining-tokens'] = str(max(0, self.tpm - used))
+        return headers
+
+    def sample_latency(self, tokens):
+        with self._lock:
+            return self.latency.sample(self._rng, tokens)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+class MockAzureHandler(BaseHTTPRequestHandler):
+    """Answers chat-completion requests from the server's MockAzureState."""
+
+    # Keep-alive, like the real service; streams use chunked transfer encoding
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle's algorithm on, a
+    # keep-alive client's delayed ACK would add ~40 ms to every response
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            print(f"[mock-azure] {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path == '/healthz':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {'error': {'code': '404', 'message': 'Resource not found'}})
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        if not COMPLETIONS_PATH.match(path):
+            self._send_json(404, {'error': {'code': '404', 'message': 'Resource not found'}})
+            return
+
+        self.state.count('requests')
+        if self.state.require_key and not self.headers.get('api-key'):
+            self.state.count('unauthorized')
+            self._send_json(401, {'error': {'code': '401', 'message': 'Access denied due to missing api-key.'}})
+            return
+
+        try:
+            payload = json.loads(body or b'{}')
+            prompt = next(
+                (message.get('content', '') for message in reversed(payload.get('messages', []))
+                 if message.get('role') == 'user'),
+                ''
+            )
+        except (ValueError, AttributeError):
+            self._send_json(400, {'error': {'code': 'BadRequest', 'message': 'Invalid JSON body'}})
+            return
+
+        content = completion_for(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+
+        decision, value = self.state.admit(prompt_tokens + completion_tokens)
+        if decision == 'throttle':
+            headers = {
+                'Retry-After': str(max(1, int(math.ceil(value)))),
+                'retry-after-ms': str(int(value * 1000)),
+            }
+            headers.update(self.state.quota_headers())
+            self._send_json(429, {'error': {'code': '429', 'message': 'Requests to the deployment have '
+                                            'exceeded the rate limit. Please retry after the indicated time.'}},
+                            headers)
+            return
+        if decision == 'error':
+            self._send_json(value, {'error': {'code': str(value), 'message': 'Injected server error'}})
+            return
+
+        self.state.count('in_flight')
+        try:
+            time.sleep(self.state.sample_latency(completion_tokens))
+            if payload.get('stream'):
+                self.state.count('streams')
+                self._stream(content)
+            else:
+                self.state.count('completions')
+                self._send_json(200, {
+                    'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': 'mock-gpt',
+                    'choices': [{
+                        'index': 0,
+                        'finish_reason': 'stop',
+                        'message': {'role': 'assistant', 'content': content}
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens
+                    }
+                }, self.state.quota_headers())
+        finally:
+            self.state.count('in_flight', -1)
+
+    def _stream(self, content):
+        """Send the completion as server-sent events, a few words per chunk."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in self.state.quota_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        words = re.findall(r'\S+\s*', content)
+        step = self.state.drip_tokens
+        for index in range(0, len(words), step):
+            if index and self.state.drip_delay:
+                time.sleep(self.state.drip_delay)
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'choices': [{'index': 0, 'delta': {'content': ''.join(words[index:index + step])},
+                             'finish_reason': None}]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        done = {'id': completion_id, 'object': 'chat.completion.chunk',
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+        self._write_chunk(f"data: {json.dumps(done)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockAzureServer:
+    """The mock service on a background thread, for benchmarks that run it in-process."""
+
+    def __init__(self, state=None, host=DEFAULT_HOST, port=0, verbose=False):
+        """
+        Initialize the server.
+
+        Args:
+            state (MockAzureState, optional): Behaviour settings. Defaults to a fast, fault-free mock.
+            host (str): Interface to bind
+            port (int): Port to bind; 0 picks a free one
+            verbose (bool): Log every request
+        """
+        self.state = state or MockAzureState()
+        self.httpd = ThreadingHTTPServer((host, port), MockAzureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.httpd.verbose = verbose
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        """Base URL to use as AZURE_OPENAI_ENDPOINT."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-azure', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def build_state(args):
+    """Create the MockAzureState described by parsed command-line arguments."""
+    return MockAzureState(
+        latency=LatencyModel(args.latency, args.per_token),
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        error_rate=args.error_rate,
+        burst_length=args.burst_length,
+        error_status=args.error_status,
+        drip_delay=args.drip_delay,
+        drip_tokens=args.drip_tokens,
+        require_key=not args.no_key,
+        seed=args.seed
+    )
+
+
+def add_arguments(parser):
+    """Add the mock's behaviour options (defaults from MOCK_AZURE_* variables) to a parser."""
+    env = os.environ.get
+    parser.add_argument('--latency', default=env('MOCK_AZURE_LATENCY', 'fixed:0'),
+                        help="Latency distribution, e.g. fixed:0.2, uniform:0.1,0.5, normal:0.3,0.05, "
+                             "lognormal:-1.5,0.5, exp:0.3")
+    parser.add_argument('--per-token', type=float, default=float(env('MOCK_AZURE_PER_TOKEN', 0)),
+                        help='Extra seconds per completion token')
+    parser.add_argument('--rate-429', type=float, default=float(env('MOCK_AZURE_RATE_429', 0)),
+                        help='Probability of a random 429')
+    parser.add_argument('--retry-after', type=float, default=float(env('MOCK_AZURE_RETRY_AFTER', 1)),
+                        help='Retry-After seconds for random 429s')
+    parser.add_argument('--rpm', type=int, default=int(env('MOCK_AZURE_RPM', 0)),
+                        help='Requests-per-minute quota (0 = unlimited)')
+    parser.add_argument('--tpm', type=int, default=int(env('MOCK_AZURE_TPM', 0)),
+                        help='Tokens-per-minute quota (0 = unlimited)')
+    parser.add_argument('--error-rate', type=float, default=float(env('MOCK_AZURE_ERROR_RATE', 0)),
+                        help='Probability that a request starts a burst of server errors')
+    parser.add_argument('--burst-length', type=int, default=int(env('MOCK_AZURE_BURST_LENGTH', 3)),
+                        help='Consecutive failing requests per burst')
+    parser.add_argument('--error-status', type=int, default=int(env('MOCK_AZURE_ERROR_STATUS', 500)),
+                        help='Status code of injected server errors')
+    parser.add_argument('--drip-delay', type=float, default=float(env('MOCK_AZURE_DRIP_DELAY', 0)),
+                        help='Seconds between streamed chunks')
+    parser.add_argument('--drip-tokens', type=int, default=int(env('MOCK_AZURE_DRIP_TOKENS', 1)),
+                        help='Words per streamed chunk')
+    parser.add_argument('--no-key', action='store_true', help='Accept requests without an api-key header')
+    parser.add_argument('--seed', type=int, default=int(env('MOCK_AZURE_SEED', 0)),
+                        help='Random seed for reproducible runs')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Azure OpenAI chat-completions server')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockAzureServer(build_state(args), host=args.host, port=args.port, verbose=args.verbose)
+    print(f"Mock Azure OpenAI listening on {server.endpoint} "
+          f"(latency {args.latency}, 429 rate {args.rate_429}, error rate {args.error_rate})")
+    print(f"Point the app at it with AZURE_OPENAI_ENDPOINT={server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Gunicorn settings for the friction translator.
+
+Run with:  gunicorn -c gunicorn.conf.py app:app   (plus the usual --workers / --bind)
+
+The app is imported once in the master (preload_app) and warm_up() builds the
+shared text processor there. gc.freeze() then moves everything allocated so far
+out of the garbage collector's reach, so collections in the workers do not touch
+(and copy) the pages they inherited from the master. /startup-report shows the
+result per worker.
+"""
+
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+
+
+def when_ready(server):
+    """Called in the master once the app is loaded, before any worker is forked."""
+    if not preload_app:
+        return
+    from app import warm_up
+    warm_up()
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} objects before forking workers")
+
+
+def post_worker_init(worker):
+    """Without preloading, each worker builds the shared objects before taking requests."""
+    if not preload_app:
+        from app import warm_up
+        warm_up()
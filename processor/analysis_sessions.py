@@ -0,0 +1,221 @@
+"""
+Per-document sessions for incremental friction analysis.
+
+The editor sends its document again every time the user pauses typing. A
+session remembers the last text analyzed for a document id, its sentence spans
+and the friction points found in each sentence. An update only re-segments the
+region around the edit and only scans the sentences the edit touched; every
+other sentence keeps its points, shifted to its new offsets.
+"""
+
+import hashlib
+import os
+
+from processor.cache import TTLCache
+from processor.segmenter import iter_sentence_spans
+
+# Documents kept at once; the least recently analyzed session is dropped first
+ANALYSIS_SESSION_LIMIT = int(os.environ.get('ANALYSIS_SESSION_LIMIT', 256))
+
+# Seconds an idle session is kept
+ANALYSIS_SESSION_TTL = float(os.environ.get('ANALYSIS_SESSION_TTL', 1800))
+
+
+def text_hash(text):
+    """
+    Hash identifying a document version.
+
+    Args:
+        text (str): Document text
+
+    Returns:
+        str: Hex SHA-256 of the UTF-8 text, as computed by the editor
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class AnalysisSession:
+    """One analyzed version of a document. Never modified; an update builds a new one."""
+
+    def __init__(self, text, sentences):
+        self.text = text
+        self.hash = text_hash(text)
+        # (start, end, points) per sentence, with point offsets relative to the sentence start
+        self.sentences = sentences
+
+    def friction_points(self):
+        """Friction points of the whole document, with offsets into its text."""
+        points = []
+        for start, _, sentence_points in self.sentences:
+            for point in sentence_points:
+                points.append(dict(point,
+                                   start_pos=start + point['start_pos'],
+                                   end_pos=start + point['end_pos']))
+        return points
+
+
+class AnalysisSessions:
+    """Bounded, LRU-evicted store of analysis sessions keyed by document id."""
+
+    def __init__(self, maxsize=ANALYSIS_SESSION_LIMIT, ttl=ANALYSIS_SESSION_TTL):
+        """
+        Initialize the store.
+
+        Args:
+            maxsize (int): Maximum number of documents kept
+            ttl (float): Seconds an unused session is kept
+        """
+        self._sessions = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def analyze(self, doc_id, analyze_sentence, text=None, base_hash=None, delta=None):
+        """
+        Analyze a new version of a document, reusing its session where possible.
+
+        The new version is given either as the full text or as an edit of the version
+        the client last saw: delta = {'start', 'end', 'text'} replaces base[start:end].
+        A full text is compared with the stored version to find the edited region.
+
+        Args:
+            doc_id (str): Document id chosen by the client; None analyzes without a session
+            analyze_sentence (callable): Returns the friction points of one sentence, with
+                'start_pos'/'end_pos' offsets relative to it
+            text (str, optional): Full new text
+            base_hash (str, optional): text_hash() of the version the delta applies to
+            delta (dict, optional): Edit turning that version into the new one
+
+        Returns:
+            tuple: (session, stats) where stats counts the 'analyzed' and 'reused'
+                sentences, or (None, None) if the delta does not apply to the stored
+                version and the client has to send the full text
+        """
+        previous = self._sessions.get(doc_id) if doc_id else None
+
+        if text is None:
+            if previous is None or previous.hash != base_hash or not _valid_delta(delta, previous.text):
+                return None, None
+            start, end = delta['start'], delta['end']
+            text = previous.text[:start] + delta['text'] + previous.text[end:]
+            edit = (start, end, start + len(delta['text']))
+        elif previous is not None:
+            edit = _edit_region(previous.text, text)
+        else:
+            edit = None
+
+        if previous is not None and text == previous.text:
+            # Nothing changed since the last request (e.g. the user typed and undid)
+            sentences = previous.sentences
+            stats = {'analyzed': 0, 'reused': len(sentences)}
+        elif edit is None:
+            sentences, stats = _analyze_all(text, analyze_sentence)
+        else:
+            sentences, stats = _reanalyze(previous, text, edit, analyze_sentence)
+
+        session = AnalysisSession(text, sentences)
+        if doc_id:
+            self._sessions.set(doc_id, session)
+        return session, stats
+
+    def stats(self):
+        """Cache counters for the session store."""
+        return self._sessions.stats()
+
+
+def _analyze_all(text, analyze_sentence):
+    sentences = [(start, end, analyze_sentence(text[start:end]))
+                 for start, end in iter_sentence_spans(text)]
+    return sentences, {'analyzed': len(sentences), 'reused': 0}
+
+
+def _reanalyze(previous, text, edit, analyze_sentence):
+    """
+    Analyze text = previous.text with [edit_start:old_end] replaced by the new text
+    ending at new_end, re-segmenting and re-scanning only around the edit.
+    """
+    edit_start, old_end, new_end = edit
+    shift = new_end - old_end
+    old = previous.sentences
+
+    # Restart segmentation one sentence before the first one the edit reaches (an
+    # edit right after a sentence can change whether its ending still ends it),
+    # from the end of the sentence before that, where the segmenter last stopped
+    first = max(_first_ending_at_or_after(old, edit_start) - 1, 0)
+    restart = old[first - 1][1] if first > 0 else 0
+
+    sentences = old[:first]
+    analyzed = 0
+    resume = None
+    old_index = first
+    for start, end in iter_sentence_spans(text, restart):
+        # Where this sentence would have been in the old text, if it lies outside the edit
+        if end <= edit_start:
+            old_start, old_stop = start, end
+        elif start >= new_end:
+            old_start, old_stop = start - shift, end - shift
+        else:
+            old_start = None
+
+        if old_start is not None:
+            while old_index < len(old) and old[old_index][0] < old_start:
+                old_index += 1
+            if old_index < len(old) and old[old_index][:2] == (old_start, old_stop):
+                if start >= new_end:
+                    # Past the edit and lined up with the old spans: the rest of the text
+                    # is unchanged, so it segments exactly as before
+                    resume = old_index
+                    break
+                sentences.append(old[old_index])
+                continue
+
+        sentences.append((start, end, analyze_sentence(text[start:end])))
+        analyzed += 1
+
+    if resume is not None:
+        sentences.extend((start + shift, end + shift, points) for start, end, points in old[resume:])
+
+    return sentences, {'analyzed': analyzed, 'reused': len(sentences) - analyzed}
+
+
+def _first_ending_at_or_after(sentences, position):
+    """Index of the first sentence whose end is at or after position (binary search)."""
+    lo, hi = 0, len(sentences)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sentences[mid][1] < position:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _edit_region(old, new):
+    """
+    Smallest single edit turning old into new.
+
+    Returns:
+        tuple: (start, old_end, new_end) such that new is old with old[start:old_end]
+            replaced by new[start:new_end]
+    """
+    limit = min(len(old), len(new))
+    prefix = _common_length(lambda n: old[:n] == new[:n], limit)
+    suffix = _common_length(lambda n: old[len(old) - n:] == new[len(new) - n:], limit - prefix)
+    return (prefix, len(old) - suffix, len(new) - suffix)
+
+
+def _common_length(matches, limit):
+    """Largest n <= limit with matches(n), comparing whole slices so the work is done in C."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if matches(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _valid_delta(delta, text):
+    if not isinstance(delta, dict) or not isinstance(delta.get('text'), str):
+        return False
+    start, end = delta.get('start'), delta.get('end')
+    return (isinstance(start, int) and isinstance(end, int)
+            and 0 <= start <= end <= len(text))
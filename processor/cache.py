@@ -0,0 +1,213 @@
+"""
+Bounded in-memory LRU cache with expiry, optionally backed by SQLite.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl=3600, disk_path=None, sweep_every=256, sweep_seconds=60):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in memory. 0 disables the cache.
+            ttl (float): Seconds an entry stays valid. 0 or None means entries never expire.
+            disk_path (str, optional): Path of a SQLite file used as a second, persistent tier.
+                Values stored there must be JSON-serializable.
+            sweep_every (int): Disk writes between deletions of expired rows.
+            sweep_seconds (float): Longest time between deletions of expired rows while writing.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.sweep_every = sweep_every
+        self.sweep_seconds = sweep_seconds
+        self._entries = OrderedDict()
+        # Guards the memory tier and the counters; never held during disk I/O
+        self._lock = threading.Lock()
+        # Serializes use of the SQLite connection, so disk reads and writes never
+        # keep in-memory lookups waiting
+        self._disk_lock = threading.Lock()
+        self._disk = None
+        self._disk_pid = None
+        self._writes_since_sweep = 0
+        self._last_sweep = time.time()
+
+        # Counters reported by stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_hits = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, key, default=None):
+        """
+        Look up a key, checking memory first and then the disk tier.
+
+        Args:
+            key (str): Cache key
+            default: Value returned on a miss
+
+        Returns:
+            The cached value or default
+        """
+        if not self.enabled:
+            return default
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            if not self.disk_path:
+                self.misses += 1
+                return default
+
+        # Memory miss: read the disk tier without holding the memory lock
+        found, value, expires_at, expired = self._disk_get(key, now)
+        with self._lock:
+            if expired:
+                self.expirations += 1
+            if found:
+                self._store(key, value, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Store a value in memory and, if configured, on disk.
+
+        Args:
+            key (str): Cache key
+            value: Value to store
+        """
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._store(key, value, expires_at)
+        # The disk write happens after the memory lock is released, so lookups of other
+        # keys are served while SQLite commits
+        if self.disk_path:
+            self._disk_set(key, value, expires_at)
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            with self._disk_lock:
+                connection = self._connection()
+                connection.execute("DELETE FROM cache")
+                connection.commit()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Size, hits, misses, evictions, expirations, disk hits and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'disk_hits': self.disk_hits,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, value, expires_at):
+        """Insert into the memory tier, evicting the least recently used entries. Lock must be held."""
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self):
+        """Open the SQLite tier lazily, once per process. Disk lock must be held."""
+        if self._disk is None or self._disk_pid != os.getpid():
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+            self._disk.commit()
+            self._disk_pid = os.getpid()
+        return self._disk
+
+    def _disk_get(self, key, now):
+        """
+        Read a key from the disk tier.
+
+        Returns:
+            tuple: (found, value, expires_at, expired)
+        """
+        try:
+            with self._disk_lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache disk read failed: {e}")
+            return False, None, None, False
+
+        if row is None:
+            return False, None, None, False
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            return False, None, None, True
+        return True, json.loads(value), expires_at, False
+
+    def _disk_set(self, key, value, expires_at):
+        # Serialized before taking the disk lock; only the SQLite calls are under it
+        payload = json.dumps(value)
+        try:
+            with self._disk_lock:
+                connection = self._connection()
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                # Expired rows are swept every sweep_every writes or sweep_seconds, not
+                # on every write; reads already ignore rows that have expired
+                self._writes_since_sweep += 1
+                now = time.time()
+                if self._writes_since_sweep >= self.sweep_every or now - self._last_sweep >= self.sweep_seconds:
+                    connection.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+                    self._writes_since_sweep = 0
+                    self._last_sweep = now
+                connection.commit()
+        except sqlite3.Error as e:
+            print(f"Cache disk write failed: {e}")
@@ -0,0 +1,326 @@
+"""
+Token-level diff engine shared by the translators' over-correction guards,
+transformation tracking and change highlighting.
+
+Texts are split into word and punctuation tokens, the tokens are interned to
+integers and the two sequences are compared with Myers' linear-space O(ND)
+algorithm. The resulting edit script is memoized per (original, rewritten) pair,
+so every consumer of the same pair shares one diff.
+"""
+
+import os
+import re
+
+from processor.cache import TTLCache
+
+# Edit scripts kept in memory. Each stage of each sentence adds one; highlighting a
+# document reuses them, so large documents benefit from a larger memo.
+DIFF_CACHE_SIZE = int(os.environ.get('DIFF_CACHE_SIZE', 4096))
+
+# Words (keeping contractions and hyphenated words together) and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\b[\w'-]+\b|\S")
+
+
+def tokenize(text):
+    """
+    Split text into word and punctuation tokens.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: Token strings
+    """
+    return TOKEN_PATTERN.findall(text)
+
+
+class EditScript:
+    """Token diff of one (original, rewritten) pair, with difflib-style opcodes."""
+
+    def __init__(self, original, rewritten, original_spans, rewritten_spans, opcodes):
+        self.original = original
+        self.rewritten = rewritten
+        # (start, end) character offsets of each token
+        self.original_spans = original_spans
+        self.rewritten_spans = rewritten_spans
+        # (tag, i1, i2, j1, j2) tuples as returned by SequenceMatcher.get_opcodes()
+        self.opcodes = opcodes
+
+    @property
+    def original_tokens(self):
+        return [self.original[start:end] for start, end in self.original_spans]
+
+    @property
+    def rewritten_tokens(self):
+        return [self.rewritten[start:end] for start, end in self.rewritten_spans]
+
+    def changed_blocks(self):
+        """Number of replace, delete and insert blocks."""
+        return sum(1 for opcode in self.opcodes if opcode[0] != 'equal')
+
+    def original_text(self, i1, i2):
+        """Text of original tokens i1..i2 as written, including the spacing between them."""
+        return _slice(self.original, self.original_spans, i1, i2)
+
+    def rewritten_text(self, j1, j2):
+        """Text of rewritten tokens j1..j2 as written, including the spacing between them."""
+        return _slice(self.rewritten, self.rewritten_spans, j1, j2)
+
+
+class DiffEngine:
+    """Computes and memoizes token diffs."""
+
+    def __init__(self, cache_size=4096):
+        """
+        Initialize the engine.
+
+        Args:
+            cache_size (int): Number of recent (original, rewritten) pairs whose edit scripts are kept
+        """
+        self._scripts = TTLCache(maxsize=cache_size, ttl=None)
+
+    def diff(self, original, rewritten):
+        """
+        Diff two texts token by token.
+
+        Args:
+            original (str): Text before the rewrite
+            rewritten (str): Text after the rewrite
+
+        Returns:
+            EditScript: Tokens and opcodes for the pair
+        """
+        key = (original, rewritten)
+        script = self._scripts.get(key)
+        if script is None:
+            original_spans = [match.span() for match in TOKEN_PATTERN.finditer(original)]
+            rewritten_spans = [match.span() for match in TOKEN_PATTERN.finditer(rewritten)]
+
+            # Intern tokens so the comparisons below are between small integers
+            ids = {}
+            a = [ids.setdefault(original[start:end], len(ids)) for start, end in original_spans]
+            b = [ids.setdefault(rewritten[start:end], len(ids)) for start, end in rewritten_spans]
+
+            script = EditScript(original, rewritten, original_spans, rewritten_spans,
+                                diff_opcodes(a, b))
+            self._scripts.set(key, script)
+        return script
+
+    def compose(self, texts):
+        """
+        Combine the diffs of successive rewrites into one edit script from the first
+        text to the last. Each step is looked up in (or added to) the memo, so the
+        rewrites a sentence went through are never diffed again as a whole.
+
+        Args:
+            texts (list): The text before the first rewrite followed by the result of each rewrite
+
+        Returns:
+            EditScript: Opcodes from texts[0] to texts[-1]; a token counts as unchanged
+                only if every step kept it
+        """
+        scripts = [self.diff(before, after) for before, after in zip(texts, texts[1:])]
+        if not scripts:
+            return self.diff(texts[0], texts[0])
+        if len(scripts) == 1:
+            return scripts[0]
+
+        # For each token of the current text, the index of the original token it was kept
+        # from, or None if a rewrite introduced it
+        origin = list(range(len(scripts[0].original_spans)))
+        for script in scripts:
+            kept = [None] * len(script.rewritten_spans)
+            for tag, i1, i2, j1, j2 in script.opcodes:
+                if tag == 'equal':
+                    kept[j1:j2] = origin[i1:i2]
+            origin = kept
+
+        runs = []
+        expected = 0
+        for original_index in origin:
+            if original_index is None:
+                _append_run(runs, 'insert', 1)
+                continue
+            _append_run(runs, 'delete', original_index - expected)
+            _append_run(runs, 'equal', 1)
+            expected = original_index + 1
+        _append_run(runs, 'delete', len(scripts[0].original_spans) - expected)
+
+        return EditScript(texts[0], texts[-1], scripts[0].original_spans,
+                          scripts[-1].rewritten_spans, _opcodes_from_runs(runs))
+
+    def stats(self):
+        """Cache counters for the edit-script memo."""
+        return self._scripts.stats()
+
+
+def diff_opcodes(a, b):
+    """
+    Diff two sequences of hashable items.
+
+    Args:
+        a (list): Original sequence
+        b (list): Rewritten sequence
+
+    Returns:
+        list: (tag, i1, i2, j1, j2) opcodes in the format of SequenceMatcher.get_opcodes(),
+            with the edits between two matching runs reported as a single block
+    """
+    runs = []
+    _diff(a, 0, len(a), b, 0, len(b), runs)
+    return _opcodes_from_runs(runs)
+
+
+def _opcodes_from_runs(runs):
+    """Turn ('equal'|'delete'|'insert', length) runs into difflib-style opcodes."""
+    opcodes = []
+    i = j = 0
+    pending_i = pending_j = 0
+    for tag, length in runs + [('equal', 0)]:
+        if tag == 'equal':
+            if i > pending_i or j > pending_j:
+                if i > pending_i and j > pending_j:
+                    change = 'replace'
+                elif i > pending_i:
+                    change = 'delete'
+                else:
+                    change = 'insert'
+                opcodes.append((change, pending_i, i, pending_j, j))
+            if length:
+                if opcodes and opcodes[-1][0] == 'equal':
+                    # Merge touching matching runs
+                    opcodes[-1] = ('equal', opcodes[-1][1], i + length, opcodes[-1][3], j + length)
+                else:
+                    opcodes.append(('equal', i, i + length, j, j + length))
+            i += length
+            j += length
+            pending_i, pending_j = i, j
+        elif tag == 'delete':
+            i += length
+        else:
+            j += length
+    return opcodes
+
+
+def _diff(a, a_lo, a_hi, b, b_lo, b_hi, runs):
+    """Append ('equal'|'delete'|'insert', length) runs turning a[a_lo:a_hi] into b[b_lo:b_hi]."""
+    # Common prefix and suffix are matched directly; most rewrites touch a few words
+    prefix = 0
+    while a_lo + prefix < a_hi and b_lo + prefix < b_hi and a[a_lo + prefix] == b[b_lo + prefix]:
+        prefix += 1
+    suffix = 0
+    while (a_hi - suffix > a_lo + prefix and b_hi - suffix > b_lo + prefix
+           and a[a_hi - suffix - 1] == b[b_hi - suffix - 1]):
+        suffix += 1
+
+    _append_run(runs, 'equal', prefix)
+    a_lo += prefix
+    b_lo += prefix
+    a_hi -= suffix
+    b_hi -= suffix
+
+    if a_lo == a_hi:
+        _append_run(runs, 'insert', b_hi - b_lo)
+    elif b_lo == b_hi:
+        _append_run(runs, 'delete', a_hi - a_lo)
+    else:
+        split = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi)
+        if split is None:
+            _append_run(runs, 'delete', a_hi - a_lo)
+            _append_run(runs, 'insert', b_hi - b_lo)
+        else:
+            x, y = split
+            _diff(a, a_lo, x, b, b_lo, y, runs)
+            _diff(a, x, a_hi, b, y, b_hi, runs)
+
+    _append_run(runs, 'equal', suffix)
+
+
+def _append_run(runs, tag, length):
+    if not length:
+        return
+    if runs and runs[-1][0] == tag:
+        runs[-1] = (tag, runs[-1][1] + length)
+    else:
+        runs.append((tag, length))
+
+
+def _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi):
+    """
+    Find a point on an optimal edit path by searching forward from the start and
+    backward from the end until the two searches overlap (Myers' middle snake).
+
+    Returns:
+        tuple or None: (x, y) indices splitting the problem in two, or None when the
+            ranges share no tokens at all
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2
+    offset = max_d
+    size = 2 * max_d + 2
+    forward = [-1] * size
+    backward = [-1] * size
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # With an odd delta the paths meet during a forward step, otherwise during a backward one
+    odd = delta % 2 != 0
+
+    # Diagonals that ran off the edge of the grid are trimmed from later passes
+    k1_start = k1_end = k2_start = k2_end = 0
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_index = offset + k1
+            if k1 == -d or (k1 != d and forward[k1_index - 1] < forward[k1_index + 1]):
+                x1 = forward[k1_index + 1]
+            else:
+                x1 = forward[k1_index - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1_index] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif odd:
+                k2_index = offset + delta - k1
+                if 0 <= k2_index < size and backward[k2_index] != -1:
+                    if x1 >= n - backward[k2_index]:
+                        return a_lo + x1, b_lo + y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_index = offset + k2
+            if k2 == -d or (k2 != d and backward[k2_index - 1] < backward[k2_index + 1]):
+                x2 = backward[k2_index + 1]
+            else:
+                x2 = backward[k2_index - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a_hi - x2 - 1] == b[b_hi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            backward[k2_index] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not odd:
+                k1_index = offset + delta - k2
+                if 0 <= k1_index < size and forward[k1_index] != -1:
+                    x1 = forward[k1_index]
+                    y1 = offset + x1 - k1_index
+                    if x1 >= n - x2:
+                        return a_lo + x1, b_lo + y1
+    return None
+
+
+def _slice(text, spans, start, end):
+    if start >= end:
+        return ''
+    return text[spans[start][0]:spans[end - 1][1]]
+
+
+# Shared engine used by the translators and the text processor
+diff_engine = DiffEngine(cache_size=DIFF_CACHE_SIZE)
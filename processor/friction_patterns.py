@@ -0,0 +1,543 @@
+"""
+Shared friction-pattern engine.
+
+Every friction word and phrase the app detects is registered here once. Literal
+phrases from all categories are compiled into a single token trie, so one pass
+over a text finds every match with its category and subtype. Patterns that need
+real regular expressions (wildcards, "not just ... but" spans) are compiled into
+one alternation per category.
+"""
+
+import re
+from collections import namedtuple
+from processor.cache import TTLCache
+
+FrictionMatch = namedtuple('FrictionMatch', ['category', 'subtype', 'start', 'end', 'text'])
+
+# Literal phrases per category. An entry is either the phrase itself or a
+# (phrase, subtype) pair when a spelling variant reports a canonical subtype.
+# Words in a phrase may be separated by any whitespace.
+PHRASES = {
+    # Routing and reporting categories used by TextProcessor and /analyze-text
+    'but': ['but', 'yet'],
+    'should': [
+        'should', "shouldn't", 'could', "couldn't", 'would', "wouldn't", 'we need to',
+        ('shouldnt', "shouldn't"), ('couldnt', "couldn't"), ('wouldnt', "wouldn't")
+    ],
+    'not': [
+        'not', 'never', 'without', 'no', 'nothing',
+        "don't", "won't", "can't", 'cannot',
+        "isn't", "aren't", "wasn't", "weren't",
+        "doesn't", "didn't", "haven't", "hasn't",
+        "hadn't", "couldn't", "wouldn't", "shouldn't",
+        "mustn't", "ain't", 'none', 'nobody', 'nowhere'
+    ],
+
+    # Full negation vocabulary checked by NotTranslator before translating
+    'negation': [
+        # Basic negation words
+        'not', 'never', 'without', 'no', 'none', 'nobody', 'nothing', 'nowhere',
+
+        # Complete list of negative contractions
+        "isn't", "aren't", "wasn't", "weren't",
+        "doesn't", "don't", "didn't",
+        "hasn't", "haven't", "hadn't",
+        "can't", "couldn't", "won't", "wouldn't",
+        "shan't", "shouldn't", "mustn't",
+        "mightn't", "mayn't", "ain't",
+
+        # Full forms of contractions
+        'cannot', 'will not', 'shall not', 'do not',
+        'does not', 'did not', 'is not', 'are not',
+        'was not', 'were not', 'has not', 'have not',
+        'had not', 'could not', 'would not', 'should not',
+        'must not', 'might not', 'may not',
+
+        # Other negative words or phrases
+        'unable', 'impossible', 'difficult to', 'lack of',
+        'failing to', 'failed to', 'fails to',
+        'hardly', 'rarely', 'scarcely', 'seldom'
+    ],
+
+    # Negative constructions that must not survive in NotTranslator output
+    'negative_output': [
+        'not', 'never', 'without', 'no', 'none', 'nobody', 'nothing', 'nowhere',
+        "isn't", "aren't", "wasn't", "weren't", "doesn't", "don't", "didn't",
+        "hasn't", "haven't", "hadn't", "can't", "couldn't", "won't", "wouldn't",
+        "shouldn't", "mustn't", 'unable', 'impossible', 'lack of'
+    ],
+
+    # Specific "cannot" constructions with their own prompts
+    'cannot': [
+        'cannot believe', 'cannot attend', 'cannot move forward', 'cannot understand',
+        'cannot expect', 'cannot find', 'cannot be implemented', 'cannot overstate',
+        'cannot start', 'cannot ignore'
+    ],
+
+    # State-of-being negations
+    'state': [
+        'is not', "isn't", 'are not', "aren't",
+        'was not', "wasn't", 'were not', "weren't",
+        'am not', "i'm not", "they're not", "he's not", "she's not"
+    ]
+}
+
+_ABILITY_VERBS = r'(find|locate|understand|finish|complete|do|make|get|achieve|accomplish|reach|solve|figure|know|see|hear|feel|remember|recall)'
+
+# Structural patterns per category, as (subtype, regex) pairs
+REGEXES = {
+    # Ability statements ("can't find", "unable to complete")
+    'ability': [
+        ("can't", r"\bcan't\s+\w*\s*" + _ABILITY_VERBS + r'\b'),
+        ("couldn't", r"\bcouldn't\s+\w*\s*" + _ABILITY_VERBS + r'\b'),
+        ('unable to', r'\b(unable|impossible|hard|difficult|tough|challenging)\s+to\s+\w*\s*'
+                      r'(find|locate|understand|finish|complete|do|make|get|achieve|accomplish|reach|solve|figure)\b')
+    ],
+
+    # "not just/only X, but Y" constructions, including dash-separated variants
+    'not_just_but': [
+        ('not just', r'not\s+just\s+.+?\s+but\s+'),
+        ('not only', r'not\s+only\s+.+?\s+but\s+'),
+        ('not just', r'not\s+just\s+.+?[-—]+\s*but\s+'),
+        ('not only', r'not\s+only\s+.+?[-—]+\s*but\s+'),
+        ('not just for', r'not\s+just\s+for\s+.+?\s+but\s+for\s+'),
+        ('not only for', r'not\s+only\s+for\s+.+?\s+but\s+for\s+'),
+        ('becomes not just', r'becomes\s+not\s+(?:just|only)\s+.+?[-—\s]+\s*but\s+'),
+        ('not just', r'not\s+just\s+.+?\s+but\s+.+?\.$'),
+        ('not only', r'not\s+only\s+.+?\s+but\s+.+?\.$')
+    ],
+
+    # "no" used as a determiner ("no time", "no way")
+    'determiner': [
+        ('no', r'\bno\s+\w+')
+    ]
+}
+
+# Most whitespace-separated words a match of a regex category can span. Categories
+# listed here are re-detected locally after an edit; the others (whose matches can
+# span the whole sentence) are re-scanned in full.
+REGEX_SPAN_WORDS = {
+    'ability': 4,
+    'determiner': 2
+}
+
+# Standalone yes/no answers, which are never treated as negative friction
+YES_NO_RESPONSE = re.compile(
+    r'^(yes|no)[\.\?]?$'
+    r'|^(yes|no),'
+    r'|^(?:answer|response|replied|response is|answer is):\s*["\']?(no)["\']?[\.\?]?$'
+    r'|^(?:answer|response|replied|the answer)(?:\s+(?:is|was))?\s+["\']?(no)["\']?[\.\?]?$',
+    re.IGNORECASE
+)
+
+# Words, keeping negative contractions such as "don't" and "i'm" together. The clitics
+# 've, 's, 'll, 'd and 're are separate tokens, so "should've" and "nobody's" still
+# contain the words "should" and "nobody" (as the old \bshould\b patterns found them).
+CLITICS = ('ve', 's', 'll', 'd', 're')
+_CLITIC = r"'(?:" + '|'.join(CLITICS) + r")(?!\w)"
+TOKEN_RE = re.compile(r"\w+(?:(?!" + _CLITIC + r")'\w+)*|" + _CLITIC, re.IGNORECASE)
+
+# Terminal marker inside trie nodes (word keys are always non-empty strings)
+_HITS = ''
+
+
+def normalize_quotes(text):
+    """Replace curly quotes with straight ones. Keeps every character offset unchanged."""
+    return text.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+
+
+def is_yes_no_response(text):
+    """Check whether text is a bare yes/no answer such as "No." or "Answer: no"."""
+    return bool(YES_NO_RESPONSE.search(normalize_quotes(text).strip()))
+
+
+class FrictionDetection:
+    """
+    Every friction match found in one text, with the counts and context derived from
+    them. Built once per sentence by FrictionPatterns.detect() and handed through the
+    pipeline; a rewrite produces a new record through updated().
+    """
+
+    def __init__(self, engine, text, matches):
+        """
+        Initialize the detection record.
+
+        Args:
+            engine (FrictionPatterns): Engine that produced the matches
+            text (str): The detected text
+            matches (iterable): FrictionMatch tuples ordered by position
+        """
+        self.engine = engine
+        self.text = text
+        self.matches = tuple(matches)
+        self.categories = frozenset(match.category for match in self.matches)
+
+    def of(self, categories):
+        """
+        Get the matches of one or more categories.
+
+        Args:
+            categories (str or iterable): A category or several categories
+
+        Returns:
+            list: FrictionMatch tuples ordered by position
+        """
+        if isinstance(categories, str):
+            categories = (categories,)
+        return [match for match in self.matches if match.category in categories]
+
+    def first(self, category):
+        """Get the first match of a category, or None."""
+        for match in self.matches:
+            if match.category == category:
+                return match
+        return None
+
+    def contains(self, category):
+        """Check whether the text has any match of a category."""
+        return category in self.categories
+
+    def count(self, category):
+        """Count the matches of a category."""
+        return sum(1 for match in self.matches if match.category == category)
+
+    def subtypes(self, category):
+        """Get the set of subtypes matched for a category."""
+        return {match.subtype for match in self.matches if match.category == category}
+
+    def by_priority(self, category):
+        """
+        Get the first match of each registered entry of a category, in registration order.
+        This is the order in which the old per-pattern loops tried their patterns.
+
+        Returns:
+            list: FrictionMatch tuples, at most one per subtype
+        """
+        firsts = {}
+        for match in self.of(category):
+            firsts.setdefault(match.subtype, match)
+        priority = self.engine._priority[category]
+        return sorted(firsts.values(), key=lambda match: priority[match.subtype])
+
+    def negation_context(self):
+        """
+        Classify the negation in the text for prompt selection.
+
+        Returns:
+            str or None: 'cannot', 'ability', 'state' or 'determiner', in that order of precedence
+        """
+        for category in ('cannot', 'ability', 'state', 'determiner'):
+            if category in self.categories:
+                return category
+        return None
+
+    def updated(self, new_text):
+        """
+        Get the detection record for a rewritten version of this text. Only the edited
+        region (plus enough surrounding words for a phrase to straddle it) is re-scanned.
+
+        Args:
+            new_text (str): The rewritten text
+
+        Returns:
+            FrictionDetection: Record for new_text
+        """
+        return self.engine.update(self, new_text)
+
+    def __repr__(self):
+        return f"FrictionDetection({self.text!r}, categories={sorted(self.categories)})"
+
+
+class FrictionPatterns:
+    """Compiled registry of friction patterns."""
+
+    def __init__(self, phrases=PHRASES, regexes=REGEXES, cache_size=4096):
+        """
+        Compile the registry.
+
+        Args:
+            phrases (dict): Literal phrases per category
+            regexes (dict): (subtype, regex) pairs per category
+            cache_size (int): Number of recent texts whose detection records are kept
+        """
+        self.phrases = phrases
+        self.regexes = regexes
+        self.phrase_categories = frozenset(phrases)
+        self.regex_categories = frozenset(regexes)
+
+        # Token trie: word -> child node; the _HITS key holds (category, subtype) pairs
+        self._trie = {}
+        # Subtypes per category in registration order, used by by_priority()
+        self._priority = {}
+        for category, entries in phrases.items():
+            for entry in entries:
+                phrase, subtype = entry if isinstance(entry, tuple) else (entry, entry)
+                self._priority.setdefault(category, {}).setdefault(subtype, len(self._priority[category]))
+                node = self._trie
+                # Tokenized like the scanned text, e.g. "they're not" -> they, 're, not
+                for word in TOKEN_RE.findall(phrase.lower()):
+                    node = node.setdefault(word, {})
+                node.setdefault(_HITS, []).append((category, subtype))
+
+        # One alternation per regex category; the named group tells which entry matched
+        self._compiled = {}
+        self._group_subtypes = {}
+        for category, entries in regexes.items():
+            parts = []
+            for index, (subtype, pattern) in enumerate(entries):
+                self._priority.setdefault(category, {}).setdefault(subtype, len(self._priority[category]))
+                group = f"p{index}"
+                self._group_subtypes[(category, group)] = subtype
+                parts.append(f"(?P<{group}>{pattern})")
+            self._compiled[category] = re.compile('|'.join(parts), re.IGNORECASE)
+
+        # Words around an edit that must be re-scanned so a straddling match is found again
+        phrase_words = max(len(entry[0].split() if isinstance(entry, tuple) else entry.split())
+                           for entries in phrases.values() for entry in entries)
+        self.local_categories = self.phrase_categories | frozenset(
+            category for category in self.regex_categories if category in REGEX_SPAN_WORDS
+        )
+        self.context_words = max([phrase_words] + [REGEX_SPAN_WORDS[category] for category in
+                                                   self.regex_categories if category in REGEX_SPAN_WORDS])
+
+        self._detections = TTLCache(maxsize=cache_size, ttl=None)
+
+    def detect(self, text):
+        """
+        Find every friction match in a text. Records are memoized per text, so the
+        pipeline stages and the reporting code share one scan of each sentence.
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            FrictionDetection: Matches, categories and counts for the text
+        """
+        detection = self._detections.get(text)
+        if detection is None:
+            matches = self._scan_window(text, 0, len(text))
+            for category in self.regex_categories - self.local_categories:
+                matches.extend(self._scan_regex(text, category))
+            matches.sort(key=lambda match: (match.start, -match.end))
+            detection = FrictionDetection(self, text, matches)
+            self._detections.set(text, detection)
+        return detection
+
+    def update(self, detection, new_text):
+        """
+        Derive the detection record of a rewritten text from the record of its previous
+        version. Matches outside the edited region are kept (shifted after it); the edited
+        region, widened by context_words on each side, is scanned again. Categories whose
+        matches can span the whole sentence are re-scanned in full.
+
+        Args:
+            detection (FrictionDetection): Record of the previous text
+            new_text (str): The rewritten text
+
+        Returns:
+            FrictionDetection: Record for new_text
+        """
+        old_text = detection.text
+        if new_text == old_text:
+            return detection
+        cached = self._detections.get(new_text)
+        if cached is not None:
+            return cached
+        if not old_text or not new_text:
+            return self.detect(new_text)
+
+        # Common prefix and suffix of the two versions
+        limit = min(len(old_text), len(new_text))
+        prefix = 0
+        while prefix < limit and old_text[prefix] == new_text[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_text[-1 - suffix] == new_text[-1 - suffix]:
+            suffix += 1
+        shift = len(new_text) - len(old_text)
+
+        # Edited region in the new text, widened to whole words, then by the context words
+        edit_start = _word_start(new_text, prefix)
+        edit_end = _word_end(new_text, len(new_text) - suffix)
+        window_start = _words_before(new_text, edit_start, self.context_words)
+        window_end = _words_after(new_text, edit_end, self.context_words)
+
+        # A match starting before the window ends before the edit; one starting at or
+        # after edit_end lies in unchanged text past the edit. Everything in between is
+        # re-scanned, with enough trailing context to finish matches that start there.
+        matches = [
+            match for match in detection.matches
+            if match.category in self.local_categories and match.start < window_start
+        ]
+        matches.extend(
+            match for match in self._scan_window(new_text, window_start, window_end)
+            if match.start < edit_end
+        )
+        matches.extend(
+            match._replace(start=match.start + shift, end=match.end + shift)
+            for match in detection.matches
+            if match.category in self.local_categories and match.start >= edit_end - shift
+        )
+        for category in self.regex_categories - self.local_categories:
+            matches.extend(self._scan_regex(new_text, category))
+        matches.sort(key=lambda match: (match.start, -match.end))
+
+        updated = FrictionDetection(self, new_text, matches)
+        self._detections.set(new_text, updated)
+        return updated
+
+    def scan(self, text, categories=None):
+        """
+        Find every friction match in the text in one pass.
+
+        Args:
+            text (str): Text to scan
+            categories (iterable, optional): Categories to report. Defaults to all.
+
+        Returns:
+            list: FrictionMatch tuples ordered by position. A span can appear under
+                several categories (e.g. "couldn't" is both 'should' and 'not').
+        """
+        if not text:
+            return []
+        detection = self.detect(text)
+        return list(detection.matches) if categories is None else detection.of(categories)
+
+    def first(self, text, category):
+        """
+        Get the first match of a category.
+
+        Returns:
+            FrictionMatch or None
+        """
+        return self.detect(text).first(category) if text else None
+
+    def contains(self, text, category):
+        """Check whether the text has any match of a category."""
+        return bool(text) and self.detect(text).contains(category)
+
+    def count(self, text, category):
+        """Count the matches of a category."""
+        return self.detect(text).count(category) if text else 0
+
+    def by_priority(self, text, category):
+        """Get the first match of each entry of a category, in registration order."""
+        return self.detect(text).by_priority(category) if text else []
+
+    def categories_in(self, text):
+        """Get the set of categories present in the text."""
+        return self.detect(text).categories if text else frozenset()
+
+    def pattern_strings(self, category):
+        """
+        Get regular-expression strings equivalent to a category, for code that still
+        expects pattern lists.
+
+        Returns:
+            list: One pattern per registered phrase or regex
+        """
+        if category in self.regexes:
+            return [pattern for _, pattern in self.regexes[category]]
+        patterns = []
+        for entry in self.phrases[category]:
+            phrase = entry[0] if isinstance(entry, tuple) else entry
+            patterns.append(r'\b' + r'\s+'.join(re.escape(word) for word in phrase.split()) + r'\b')
+        return patterns
+
+    def stats(self):
+        """Cache counters for the detection memo."""
+        return self._detections.stats()
+
+    def _scan_window(self, text, start, end):
+        """
+        Find the matches of the local categories (phrases and bounded regexes) that start
+        at a token inside text[start:end]. Each match depends only on the text from its
+        own start onwards, which is what lets update() re-scan just a window.
+
+        Args:
+            text (str): Full text
+            start (int): Window start, at a word boundary
+            end (int): Window end, at a word boundary
+
+        Returns:
+            list: FrictionMatch tuples with offsets into text
+        """
+        normalized = normalize_quotes(text)
+        tokens = [(m.start(), m.end(), m.group(0).lower()) for m in TOKEN_RE.finditer(normalized, start, end)]
+        local_regexes = [
+            (category, self._compiled[category]) for category in sorted(self.local_categories & self.regex_categories)
+        ]
+        matches = []
+
+        for index, (token_start, _, word) in enumerate(tokens):
+            # Phrases: walk the token trie from this token
+            node = self._trie.get(word)
+            position = index
+            while node is not None:
+                token_end = tokens[position][1]
+                for category, subtype in node.get(_HITS, ()):
+                    matches.append(FrictionMatch(category, subtype, token_start, token_end, text[token_start:token_end]))
+
+                position += 1
+                if position == len(tokens):
+                    break
+                # Words of a phrase may only be separated by whitespace; a clitic
+                # follows its word directly
+                gap = normalized[token_end:tokens[position][0]]
+                if not (gap == '' if tokens[position][2].startswith("'") else gap.isspace()):
+                    break
+                node = node.get(tokens[position][2])
+
+            # Bounded regexes: try each one anchored at this token
+            for category, compiled in local_regexes:
+                match = compiled.match(normalized, token_start, end)
+                if match:
+                    subtype = self._group_subtypes[(category, match.lastgroup)]
+                    matches.append(FrictionMatch(category, subtype, match.start(), match.end(),
+                                                 text[match.start():match.end()]))
+        return matches
+
+    def _scan_regex(self, text, category):
+        """Find the matches of a regex category anywhere in the text."""
+        matches = []
+        for match in self._compiled[category].finditer(normalize_quotes(text)):
+            subtype = self._group_subtypes[(category, match.lastgroup)]
+            matches.append(FrictionMatch(category, subtype, match.start(), match.end(),
+                                         text[match.start():match.end()]))
+        return matches
+
+
+def _word_start(text, position):
+    """Move position back to the start of the whitespace-separated word containing it."""
+    while position > 0 and not text[position - 1].isspace():
+        position -= 1
+    return position
+
+
+def _word_end(text, position):
+    """Move position forward to the end of the whitespace-separated word containing it."""
+    while position < len(text) and not text[position].isspace():
+        position += 1
+    return position
+
+
+def _words_before(text, position, count):
+    """Move position back over count whitespace-separated words."""
+    for _ in range(count):
+        while position > 0 and text[position - 1].isspace():
+            position -= 1
+        position = _word_start(text, position)
+    return position
+
+
+def _words_after(text, position, count):
+    """Move position forward over count whitespace-separated words."""
+    for _ in range(count):
+        while position < len(text) and text[position].isspace():
+            position += 1
+        position = _word_end(text, position)
+    return position
+
+
+# Compiled once at import and shared by every detection path
+friction_patterns = FrictionPatterns()
@@ -0,0 +1,285 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept in memory and rendered by the app's
+/metrics route. Values that already live elsewhere (cache counters, the rate
+limiter's queue, circuit breaker state) are read when the metrics are scraped
+through collectors instead of being copied on every change.
+
+Each process keeps its own numbers. Under gunicorn with several workers a
+scrape reaches one worker, so every series carries a 'pid' label to keep the
+workers apart; aggregate them with sum() in queries.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds in seconds: fast in-process stages, and HTTP / LLM calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _Metric:
+    """A named metric family with a fixed set of label names."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests served. Names end in _total."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. calls in flight."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. durations) over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum of observations
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """The metrics of one process, rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Register a function called at every scrape.
+
+        Args:
+            collector (callable): Returns (name, kind, documentation, samples) families, where
+                samples are (labels dict, value) pairs
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format (version 0.0.4).
+
+        Returns:
+            str: The exposition text
+        """
+        pid = str(os.getpid())
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            _append_family(lines, metric.name, metric.kind, metric.documentation,
+                           [(name, labels, value) for name, labels, value in metric.samples()], pid)
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                _append_family(lines, name, kind, documentation,
+                               [(name, labels, value) for labels, value in samples], pid)
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+        return metric
+
+
+def _append_family(lines, name, kind, documentation, samples, pid):
+    lines.append(f"# HELP {name} {_escape_help(documentation)}")
+    lines.append(f"# TYPE {name} {kind}")
+    for sample_name, labels, value in samples:
+        labels = dict(labels, pid=pid)
+        label_text = ','.join(f'{key}="{_escape_label(label)}"' for key, label in labels.items())
+        lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def cache_families(caches):
+    """
+    Turn TTLCache.stats() dicts into metric families.
+
+    Args:
+        caches (dict): Cache name -> stats dict
+
+    Returns:
+        list: (name, kind, documentation, samples) families
+    """
+    fields = (
+        ('cache_hits_total', 'counter', 'Cache lookups that found an entry', 'hits'),
+        ('cache_misses_total', 'counter', 'Cache lookups that found nothing', 'misses'),
+        ('cache_evictions_total', 'counter', 'Entries evicted to stay within the size limit', 'evictions'),
+        ('cache_hit_ratio', 'gauge', 'Share of lookups that found an entry', 'hit_ratio'),
+        ('cache_entries', 'gauge', 'Entries currently held in memory', 'size'),
+    )
+    return [
+        (name, kind, documentation,
+         [({'cache': cache}, stats.get(field, 0)) for cache, stats in caches.items()])
+        for name, kind, documentation, field in fields
+    ]
+
+
+# Process-wide registry and the metrics the app and the processor report
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests served, by route, method and status', ('route', 'method', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce the response (for streams: until the first byte)',
+    ('route', 'method'))
+http_requests_in_progress = registry.gauge(
+    'http_requests_in_progress', 'Requests being handled right now', ('route',))
+
+stage_duration = registry.histogram(
+    'text_processor_stage_duration_seconds',
+    'Time spent in each stage of process_text: segmentation, detection, diff, deduplication, highlighting',
+    ('stage',), buckets=STAGE_BUCKETS)
+translator_duration = registry.histogram(
+    'translator_duration_seconds', 'Time a translator took for a sentence (chained, combined) or a batch',
+    ('translator', 'mode'), buckets=REQUEST_BUCKETS)
+
+llm_requests = registry.counter(
+    'llm_requests_total', 'LLM completions requested, by translator class and outcome', ('translator', 'outcome'))
+llm_request_duration = registry.histogram(
+    'llm_request_duration_seconds', 'Latency of each HTTP attempt to the LLM API', ('translator',))
+llm_tokens = registry.counter(
+    'llm_tokens_total', "Tokens used, from the response's usage (estimated when it has none)", ('translator', 'kind'))
+llm_retries = registry.counter(
+    'llm_retries_total', 'LLM attempts retried, by reason', ('translator', 'reason'))
+llm_throttled = registry.counter(
+    'llm_throttled_total', 'HTTP 429 responses from the LLM API', ('translator',))
+llm_in_flight = registry.gauge(
+    'llm_in_flight', 'LLM HTTP requests currently waiting for a response', ('translator',))
@@ -0,0 +1,216 @@
+"""
+Near-duplicate index for processed sentences.
+
+Answers "is this sentence the same as, contained in, containing, or more than
+80% similar to one already seen?" without comparing it against every sentence.
+Character shingles find the candidates: a postings index for the containment
+checks and MinHash LSH buckets for similarity. Only the candidates are compared
+with difflib, so the similarity semantics stay those of SequenceMatcher.ratio().
+
+Containment and exact matches are found exactly. Similarity is found through
+buckets, so a pair just above the threshold whose differences are spread across
+the whole sentence can occasionally be missed; small indexes are scanned in full.
+"""
+
+import difflib
+import hashlib
+from functools import lru_cache
+
+# Characters per shingle
+SHINGLE_SIZE = 3
+
+# MinHash LSH layout: BANDS buckets of ROWS hashes each. Sentences share a bucket
+# with probability 1 - (1 - J**ROWS)**BANDS for shingle Jaccard similarity J: about
+# 0.9 at J = 0.5, where lightly edited copies sit, and rarely for unrelated sentences.
+BANDS = 16
+ROWS = 3
+
+# Below this many entries a plain scan is as cheap as the buckets and exact
+LINEAR_SCAN_LIMIT = 16
+
+_SLOTS = BANDS * ROWS
+
+
+def normalize(text):
+    """Normalize text for comparison by removing extra spaces and lowercasing."""
+    return ' '.join(text.lower().split())
+
+
+class NearDuplicateIndex:
+    """Index of seen sentences that finds duplicates of a new one in near-constant time."""
+
+    def __init__(self, threshold=0.8):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold (float): SequenceMatcher ratio above which two sentences are duplicates
+        """
+        self.threshold = threshold
+        self._items = []          # Normalized sentences, by id
+        self._matchers = []       # SequenceMatcher with the sentence as seq2, by id
+        self._exact = set()
+        self._postings = {}       # shingle -> ids of sentences containing it
+        self._prefixes = {}       # first shingle -> ids of sentences starting with it
+        self._short = []          # ids of sentences shorter than one shingle
+        self._buckets = {}        # (band, band hashes) -> ids
+        # Shingles and band keys of the last sentence checked, reused when it is then added
+        self._last = (None, None, None)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, text):
+        """
+        Add a sentence to the index.
+
+        Args:
+            text (str): Sentence to add
+        """
+        normalized = normalize(text)
+        item_id = len(self._items)
+        self._items.append(normalized)
+        # difflib indexes seq2 once when it is set, so each sentence keeps its own matcher
+        self._matchers.append(difflib.SequenceMatcher(None, '', normalized))
+        self._exact.add(normalized)
+
+        shingles, band_keys = self._signature(normalized)
+        if len(normalized) < SHINGLE_SIZE:
+            self._short.append(item_id)
+        else:
+            self._prefixes.setdefault(normalized[:SHINGLE_SIZE], []).append(item_id)
+        for shingle in shingles:
+            self._postings.setdefault(shingle, set()).add(item_id)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(item_id)
+
+    def contains_similar(self, text):
+        """
+        Check whether a sentence duplicates one already in the index.
+
+        Args:
+            text (str): Sentence to check
+
+        Returns:
+            bool: True if an indexed sentence is identical, contains it, is contained
+                in it, or has a similarity ratio above the threshold
+        """
+        if not self._items:
+            return False
+
+        normalized = normalize(text)
+        if normalized in self._exact:
+            return True
+
+        if len(self._items) <= LINEAR_SCAN_LIMIT:
+            return any(self._matches(normalized, item_id) for item_id in range(len(self._items)))
+
+        shingles, band_keys = self._signature(normalized)
+        return (self._contained_in_existing(normalized, shingles)
+                or self._contains_existing(normalized)
+                or self._similar_to_existing(normalized, band_keys))
+
+    def _signature(self, normalized):
+        """Shingles and LSH band keys of a normalized sentence."""
+        if self._last[0] != normalized:
+            shingles = _shingles(normalized)
+            self._last = (normalized, shingles, _band_keys(shingles))
+        return self._last[1], self._last[2]
+
+    def _matches(self, normalized, item_id):
+        """The full duplicate test for one pair, as applied to every candidate."""
+        existing = self._items[item_id]
+        if normalized in existing or existing in normalized:
+            return True
+        return self._similar(normalized, item_id)
+
+    def _similar(self, normalized, item_id):
+        existing = self._items[item_id]
+        # Upper bound of ratio() from the lengths alone (SequenceMatcher.real_quick_ratio)
+        total = len(normalized) + len(existing)
+        if total == 0 or 2.0 * min(len(normalized), len(existing)) / total <= self.threshold:
+            return False
+        matcher = self._matchers[item_id]
+        matcher.set_seq1(normalized)
+        # quick_ratio() is also an upper bound, so it can only rule pairs out
+        return matcher.quick_ratio() > self.threshold and matcher.ratio() > self.threshold
+
+    def _contained_in_existing(self, normalized, shingles):
+        """Check whether the sentence occurs inside an indexed sentence."""
+        if not shingles:
+            # Shorter than a shingle (including empty); too short to index, check directly
+            return any(normalized in existing for existing in self._items)
+        # Any container must hold every shingle, so the rarest one bounds the candidates
+        rarest = min((self._postings.get(shingle, ()) for shingle in shingles), key=len)
+        return any(normalized in self._items[item_id] for item_id in rarest)
+
+    def _contains_existing(self, normalized):
+        """Check whether an indexed sentence occurs inside this one."""
+        if any(self._items[item_id] in normalized for item_id in self._short):
+            return True
+        # A contained sentence starts at some position of this one, with its first shingle
+        seen_prefixes = set()
+        for position in range(len(normalized) - SHINGLE_SIZE + 1):
+            prefix = normalized[position:position + SHINGLE_SIZE]
+            if prefix in seen_prefixes:
+                continue
+            seen_prefixes.add(prefix)
+            for item_id in self._prefixes.get(prefix, ()):
+                if self._items[item_id] in normalized:
+                    return True
+        return False
+
+    def _similar_to_existing(self, normalized, band_keys):
+        """Check similarity against sentences sharing at least one LSH bucket."""
+        checked = set()
+        for key in band_keys:
+            for item_id in self._buckets.get(key, ()):
+                if item_id in checked:
+                    continue
+                checked.add(item_id)
+                if self._similar(normalized, item_id):
+                    return True
+        return False
+
+
+def _shingles(normalized):
+    """Distinct overlapping character shingles of a normalized sentence."""
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hash(shingle):
+    """
+    64-bit hash of a shingle. Unlike the builtin hash() of a str, which PYTHONHASHSEED
+    randomizes per process, it is the same in every worker and every run, so all of
+    them put a sentence in the same buckets.
+    """
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _band_keys(shingles):
+    """
+    MinHash signature of the shingles, cut into LSH band keys.
+
+    Uses one-permutation hashing: each shingle is hashed once and the hash picks
+    both its slot and its value, so the cost is linear in the sentence length
+    rather than in length times signature size. Slots no shingle landed in borrow
+    the next filled slot's value (tagged with the distance) so short sentences
+    still get a full signature.
+    """
+    if not shingles:
+        return []
+    slots = [None] * _SLOTS
+    for shingle in shingles:
+        value, slot = divmod(_shingle_hash(shingle), _SLOTS)
+        current = slots[slot]
+        if current is None or value < current:
+            slots[slot] = value
+
+    signature = []
+    for slot in range(_SLOTS):
+        distance = 0
+        while slots[(slot + distance) % _SLOTS] is None:
+            distance += 1
+        signature.append((distance, slots[(slot + distance) % _SLOTS]))
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
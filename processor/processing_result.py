@@ -0,0 +1,75 @@
+"""
+Result of processing one text.
+
+TextProcessor returns a ProcessingResult from every call instead of keeping the
+changes, friction words and transformations of its latest run on the instance,
+so one processor can serve concurrent requests without their results mixing.
+"""
+
+
+class ProcessingResult:
+    """
+    Everything one process_text() call produced. Immutable, so it can be cached and
+    shared between threads; the change records it holds must be copied, not edited.
+
+    For compatibility it unpacks like the tuple process_text() used to return:
+    (translated, changes) or, when highlighting was requested, (translated, changes, highlighted).
+    """
+
+    __slots__ = ('original', 'translated', 'changes', 'friction_words', 'transformations',
+                 'highlighted', 'error')
+
+    def __init__(self, original, translated=None, changes=(), friction_words=(), transformations=(),
+                 highlighted=None, error=None):
+        """
+        Initialize the result.
+
+        Args:
+            original (str): Text as processed (quotes normalized, sentence endings added)
+            translated (str, optional): Processed text. Defaults to the original.
+            changes (list, optional): Sentence-level change records
+            friction_words (list, optional): Friction words and their replacements, one per word and type
+            transformations (list, optional): Word-level transformations
+            highlighted (str, optional): Highlighted HTML, if it was requested
+            error (str, optional): Why the text could not be processed
+        """
+        values = {
+            'original': original,
+            'translated': original if translated is None else translated,
+            'changes': tuple(changes),
+            'friction_words': tuple(friction_words),
+            'transformations': tuple(transformations),
+            'highlighted': highlighted,
+            'error': error
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProcessingResult is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ProcessingResult is immutable")
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def as_tuple(self):
+        """The legacy process_text() return value."""
+        if self.highlighted is None:
+            return (self.translated, list(self.changes))
+        return (self.translated, list(self.changes), self.highlighted)
+
+    def __iter__(self):
+        return iter(self.as_tuple())
+
+    def __len__(self):
+        return len(self.as_tuple())
+
+    def __getitem__(self, index):
+        return self.as_tuple()[index]
+
+    def __repr__(self):
+        return (f"ProcessingResult(translated={self.translated!r}, changes={len(self.changes)}, "
+                f"transformations={len(self.transformations)}, error={self.error!r})")
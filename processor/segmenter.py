@@ -0,0 +1,154 @@
+"""
+Offset-preserving sentence segmenter.
+
+Splits text into sentence spans in a single left-to-right pass. Spans are
+(start, end) offsets into the text exactly as given, so callers can map
+results back to the original characters even when a sentence repeats.
+"""
+
+import re
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset([
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'etc', 'i.e', 'e.g',
+    'a.m', 'p.m', 'fig', 'vs', 'inc', 'ltd', 'co', 'corp', 'dept'
+])
+
+# Candidate boundaries: a run of terminal punctuation (with any closing quotes or
+# brackets) followed by whitespace or the end of the text, or a line break
+BOUNDARY_PATTERN = re.compile(r'[.!?…]+["\')\]]*(?=\s|$)|\n')
+
+# Characters that close a sentence's final punctuation
+CLOSERS = '"\')]'
+
+# Line endings accepted by ensure_sentence_endings
+LINE_END_PATTERN = re.compile(r'[.!?;…]["\')\]]*$')
+
+# Dotted acronyms such as "U.S." or "U.K." (matched without their final period)
+ACRONYM_PATTERN = re.compile(r'(?:[A-Z]\.)+[A-Z]')
+
+
+def sentence_spans(text):
+    """
+    Split text into sentences.
+
+    A sentence ends at terminal punctuation followed by whitespace, unless the
+    period belongs to a known abbreviation ("Dr.", "e.g."), an initial ("J. Smith")
+    or a dotted acronym ("U.S."), or a period or ellipsis runs on into a lowercase
+    word. Line breaks always end a sentence, so fragments without punctuation stay
+    on their own line.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: (start, end) offsets of each sentence, with surrounding whitespace excluded
+    """
+    return list(iter_sentence_spans(text))
+
+
+def iter_sentence_spans(text, start=0):
+    """
+    Yield sentence spans one at a time, beginning at a given offset.
+
+    Segmentation restarted at the end of any sentence produces the same spans
+    from there on as segmenting the whole text, so callers re-checking an edited
+    region can begin a sentence before the edit and stop as soon as the spans line
+    up with the old ones again.
+
+    Args:
+        text (str): Text to split
+        start (int): Offset to begin at; 0 or the end offset of a sentence
+
+    Yields:
+        tuple: (start, end) offsets into text, as returned by sentence_spans
+    """
+    for match in BOUNDARY_PATTERN.finditer(text, start):
+        if match.group(0) == '\n':
+            span = _trim_span(text, start, match.start())
+        elif _is_sentence_end(text, match):
+            span = _trim_span(text, start, match.end())
+        else:
+            continue
+        start = match.end()
+        if span:
+            yield span
+
+    span = _trim_span(text, start, len(text))
+    if span:
+        yield span
+
+
+def split_sentences(text):
+    """
+    Split text into sentence strings.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: Sentences in order
+    """
+    return [text[start:end] for start, end in sentence_spans(text)]
+
+
+def ensure_sentence_endings(text):
+    """
+    Add a period to every line whose last sentence has no ending punctuation,
+    so fragments are treated as sentences. Everything else, including spacing
+    and line breaks, is left as it was.
+
+    Args:
+        text (str): Text to process
+
+    Returns:
+        str: Text with sentence endings normalized
+    """
+    lines = text.split('\n')
+    for index, line in enumerate(lines):
+        content = line.rstrip()
+        if content and not LINE_END_PATTERN.search(content):
+            lines[index] = content + '.' + line[len(content):]
+    return '\n'.join(lines)
+
+
+def _is_sentence_end(text, match):
+    """Decide whether a punctuation run found by BOUNDARY_PATTERN ends a sentence."""
+    punctuation = match.group(0).rstrip(CLOSERS)
+
+    if punctuation == '.':
+        # The word the period is attached to
+        word_start = match.start()
+        while word_start > 0 and not text[word_start - 1].isspace():
+            word_start -= 1
+        word = text[word_start:match.start()].lstrip('("\'[')
+
+        if word.lower() in ABBREVIATIONS:
+            return False
+        # Initials such as "J. Smith" (but not the pronoun "I")
+        if len(word) == 1 and word.isupper() and word != 'I':
+            return False
+        # Dotted acronyms such as "U.S."
+        if ACRONYM_PATTERN.fullmatch(word):
+            return False
+
+    if punctuation[0] in '.…':
+        # A period or ellipsis followed by a lowercase word continues the sentence
+        position = match.end()
+        while position < len(text) and text[position] in ' \t':
+            position += 1
+        if position < len(text) and text[position].islower():
+            return False
+
+    return True
+
+
+def _trim_span(text, start, end):
+    """Trim whitespace from both ends of text[start:end]; None if nothing is left."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        return start, end
+    return None
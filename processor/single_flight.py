@@ -0,0 +1,67 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When several threads ask for the same key at the same time, only the first
+one does the work; the others wait for it and share its result.
+"""
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        # Number of callers that were served by another caller's execution
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() unless a call with the same key is already in flight, in which
+        case wait for that call and return its result (or raise its exception).
+
+        Args:
+            key (str): Identity of the call
+            fn (callable): Zero-argument function doing the work
+
+        Returns:
+            The result of fn()
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Number of distinct calls currently executing."""
+        with self._lock:
+            return len(self._calls)
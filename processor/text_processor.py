@@ -1,20 +1,45 @@
 import re
 import os
+import copy
+import json
+import html
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from processor.cache import TTLCache
+from processor.single_flight import SingleFlight
+from processor.translators.azure_translator import llm_failure_count, BATCH_SIZE
 from processor.translators.should_translator import ShouldTranslator
 from processor.translators.but_translator import ButTranslator
 from processor.translators.not_translator import NotTranslator
+from processor.translators.combined_translator import CombinedTranslator
 from processor.sentence_parser import SentenceParser
+from processor.segmenter import ensure_sentence_endings
+from processor.friction_patterns import friction_patterns
+from processor.near_duplicates import NearDuplicateIndex
+from processor.diff_engine import diff_engine
+from processor.processing_result import ProcessingResult
+from processor import metrics
 from prompt_manager import PromptManager
-import difflib
 
 class TextProcessor:
-    def __init__(self, api_key=None, endpoint=None):
+    def __init__(self, api_key=None, endpoint=None, max_workers=None, batch_size=None, combined=None,
+                 prompt_manager=None):
         """
         Initialize the TextProcessor with all Azure OpenAI-based translators.
         
         Args:
             api_key (str, optional): API key for Azure OpenAI. Defaults to environment variable.
             endpoint (str, optional): Azure OpenAI endpoint. Defaults to environment variable.
+            max_workers (int, optional): Maximum number of sentences translated concurrently.
+                Defaults to TEXT_PROCESSOR_MAX_WORKERS or 4. Use 1 for fully serial processing.
+            batch_size (int, optional): Sentences sent per LLM request. Defaults to
+                AZURE_OPENAI_BATCH_SIZE (1, every sentence on its own); above 1 enables batching.
+            combined (bool, optional): Apply all detected friction categories of a sentence in
+                one LLM call instead of chaining the translators. Defaults to TEXT_PROCESSOR_COMBINED.
+            prompt_manager (PromptManager, optional): Prompt manager to share (e.g. the app's),
+                so prompts are loaded once per process and edits reach the translators.
+                Defaults to a new PromptManager.
         """
         # Get API key and endpoint from environment if not provided
         self.api_key = api_key or os.environ.get('AZURE_OPENAI_API_KEY')
@@ -27,37 +52,48 @@ class TextProcessor:
             raise ValueError("No endpoint provided. Set AZURE_OPENAI_ENDPOINT environment variable or pass as parameter.")
         
         # Initialize prompt manager and sentence parser
-        self.prompt_manager = PromptManager()
+        self.prompt_manager = prompt_manager or PromptManager()
         self.sentence_parser = SentenceParser()
         
         # Initialize LLM-based translators with Azure OpenAI credentials
         self.should_translator = ShouldTranslator(self.prompt_manager, self.api_key, self.endpoint)
         self.but_translator = ButTranslator(self.api_key, self.endpoint)
         self.not_translator = NotTranslator(self.prompt_manager, self.api_key, self.endpoint)
-        
-        # Track changes for reporting
-        self.changes = []
-        # Track friction words and their replacements
-        self.friction_words = []
-        # Track specific transformations
-        self.transformations = []
-        
-        # Define friction word patterns for detection (used for reporting)
-        self.should_patterns = [
-            r'\bshould\b', r'\bshouldn\'t\b', r'\bcould\b', r'\bcouldn\'t\b',
-            r'\bwould\b', r'\bwouldn\'t\b', r'\bwe\s+need\s+to\b'
-        ]
-        
-        self.but_patterns = [r'\bbut\b', r'\byet\b']
-        
-        self.not_patterns = [
-            r'\bnot\b', r'\bnever\b', r'\bwithout\b', r'\bno\b', r'\bnothing\b',
-            r'\bdon\'t\b', r'\bwon\'t\b', r'\bcan\'t\b', r'\bcannot\b',
-            r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b',
-            r'\bdoesn\'t\b', r'\bdidn\'t\b', r'\bhaven\'t\b', r'\bhasn\'t\b',
-            r'\bhadn\'t\b', r'\bcouldn\'t\b', r'\bwouldn\'t\b', r'\bshouldn\'t\b',
-            r'\bmustn\'t\b', r'\bain\'t\b', r'\bnone\b', r'\bnobody\b', r'\bnowhere\b'
-        ]
+        self.combined_translator = CombinedTranslator(
+            self.but_translator, self.should_translator, self.not_translator, self.api_key, self.endpoint
+        )
+        
+        # One call per sentence for every detected category instead of one per translator
+        if combined is None:
+            combined = os.environ.get('TEXT_PROCESSOR_COMBINED', '').lower() in ('1', 'true', 'yes')
+        self.combined = combined
+        
+        # Bound on concurrent sentence translations per document
+        self.max_workers = max_workers or int(os.environ.get('TEXT_PROCESSOR_MAX_WORKERS', 4))
+        self.batch_size = batch_size or BATCH_SIZE
+        
+        # Memoized per-sentence pipeline results, keyed on the normalized sentence
+        # and a version hash of the active prompts
+        self.sentence_cache = TTLCache(
+            maxsize=int(os.environ.get('SENTENCE_CACHE_SIZE', 4096)),
+            ttl=float(os.environ.get('SENTENCE_CACHE_TTL', 24 * 3600))
+        )
+        self._prompt_version = None
+        self._prompt_generation = None
+        
+        self._sentence_flight = SingleFlight()
+        
+        # Latest result per thread, read by the legacy getters (get_friction_replacements(),
+        # get_specific_transformations(), .changes). Results are returned from each call
+        # rather than kept on the instance, so concurrent requests never share them.
+        self._latest = threading.local()
+        
+        # Friction words are detected by the shared pattern engine (one scan per text).
+        # The pattern lists are derived from it for code that still expects them.
+        self.friction_patterns = friction_patterns
+        self.should_patterns = friction_patterns.pattern_strings('should')
+        self.but_patterns = friction_patterns.pattern_strings('but')
+        self.not_patterns = friction_patterns.pattern_strings('not')
     
     def process_text(self, text, highlight_changes=False):
         """
@@ -69,20 +105,17 @@ class TextProcessor:
             highlight_changes (bool, optional): Whether to highlight changes in the result. Defaults to False.
             
         Returns:
-            tuple: (processed_text, changes_list, highlighted_text if highlight_changes=True)
+            ProcessingResult: The processed text with its changes, friction words and
+                transformations. Unpacks like the old (processed_text, changes_list[,
+                highlighted_text if highlight_changes=True]) tuple.
         """
         # IMPORTANT: Normalize curly apostrophes and quotes to their straight equivalents at the beginning
         text = text.replace("’", "'").replace("‘", "'")
         text = text.replace("“", '"').replace("”", '"')
         
-        # Reset changes, friction words, and transformations
-        self.changes = []
-        self.friction_words = []
-        self.transformations = []
-        
         # Skip if empty
         if not text:
-            return (text, self.changes, text) if highlight_changes else (text, self.changes)
+            return self._publish(ProcessingResult(text, highlighted=text if highlight_changes else None))
         
         # Debug information
         print(f"PROCESSING RAW TEXT: {repr(text)}")
@@ -91,47 +124,297 @@ class TextProcessor:
         # This helps with sentence detection for fragments without periods
         text = self._ensure_sentence_endings(text)
         
+        paragraphs, paragraph_segments, sentences = self._split_document(text)
+        # Results come back in document order regardless of completion order
+        sentence_results = self._process_sentences(sentences)
+        
+        return self._publish(
+            self._assemble_document(text, paragraphs, paragraph_segments, sentence_results, highlight_changes)
+        )
+    
+    def process_text_stream(self, text, highlight_changes=False):
+        """
+        Process the full text like process_text, yielding each sentence's result as soon
+        as it is ready and finishing with a summary of the whole document.
+        
+        Sentences are processed individually (not in stage batches) so the first results
+        arrive after a single round trip.
+        
+        Args:
+            text (str): Text to process
+            highlight_changes (bool, optional): Whether to include highlighted HTML. Defaults to False.
+            
+        Yields:
+            dict: {'event': 'sentence', 'index', 'paragraph', 'original', 'translated', 'changes',
+                'transformations'[, 'highlighted']} per sentence in completion order, then
+                {'event': 'summary', 'original', 'translated', 'changes', 'friction_words',
+                'transformations'[, 'highlighted']}
+        """
+        # IMPORTANT: Normalize curly apostrophes and quotes to their straight equivalents at the beginning
+        text = text.replace("’", "'").replace("‘", "'")
+        text = text.replace("“", '"').replace("”", '"')
+        
+        paragraphs, paragraph_segments, sentences = [], [], []
+        if text:
+            text = self._ensure_sentence_endings(text)
+            paragraphs, paragraph_segments, sentences = self._split_document(text)
+        
+        # Paragraph of each sentence, so clients can place results without re-parsing
+        sentence_paragraphs = [
+            paragraph_index
+            for paragraph_index, segments in enumerate(paragraph_segments) if segments
+            for segment in segments if segment.strip()
+        ]
+        
+        sentence_results = [None] * len(sentences)
+        for event in self._stream_sentences(sentences, highlight_changes):
+            sentence_results[event['index']] = (event['translated'], event['changes'], event['transformations'])
+            event['paragraph'] = sentence_paragraphs[event['index']]
+            yield event
+        
+        if text:
+            result = self._assemble_document(text, paragraphs, paragraph_segments, sentence_results, highlight_changes)
+        else:
+            result = ProcessingResult(text, highlighted=text if highlight_changes else None)
+        self._publish(result)
+        
+        summary = {
+            'event': 'summary',
+            'original': text,
+            'translated': result.translated,
+            'changes': list(result.changes),
+            'friction_words': list(result.friction_words),
+            'transformations': list(result.transformations)
+        }
+        if highlight_changes:
+            summary['highlighted'] = result.highlighted
+        yield summary
+    
+    def process_sentences_stream(self, sentences, highlight_changes=False):
+        """
+        Process independent sentences, yielding each result as soon as it is ready.
+        
+        Args:
+            sentences (list): Sentences to process; each keeps its position as 'index'
+            highlight_changes (bool, optional): Whether to include highlighted HTML. Defaults to False.
+            
+        Yields:
+            dict: A 'sentence' event per sentence in completion order (see process_text_stream,
+                without 'paragraph'),
+                then {'event': 'summary', 'count', 'changed'}
+        """
+        sentences = [
+            sentence.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+            for sentence in sentences
+        ]
+        changed = 0
+        for event in self._stream_sentences(sentences, highlight_changes):
+            if event['changes']:
+                changed += 1
+            yield event
+        yield {'event': 'summary', 'count': len(sentences), 'changed': changed}
+    
+    def process_batch(self, texts, highlight_changes=False):
+        """
+        Process several independent texts (sentences or whole documents) in one call.
+
+        The sentences of all texts are processed together, so they share LLM batches,
+        the worker pool and the sentence cache, and a sentence repeated across texts is
+        translated once. Each text is then assembled on its own; a text that fails is
+        reported with its error and the others are still returned.
+
+        Args:
+            texts (list): Texts to process
+            highlight_changes (bool, optional): Whether to include highlighted HTML. Defaults to False.
+
+        Returns:
+            list: One ProcessingResult per text, in input order; a text that could not be
+                processed has its error set
+        """
+        # Split every text first so all sentences can be processed in one pass
+        documents = []
+        sentences = []
+        for text in texts:
+            if not isinstance(text, str):
+                documents.append(ProcessingResult(text, error='Item must be a string'))
+                continue
+            text = text.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+            try:
+                split = ([], [], [])
+                if text:
+                    text = self._ensure_sentence_endings(text)
+                    split = self._split_document(text)
+            except Exception as e:
+                print(f"Error splitting batch item: {str(e)}")
+                documents.append(ProcessingResult(text, error=str(e)))
+                continue
+            documents.append({'original': text, 'split': split, 'first': len(sentences)})
+            sentences.extend(split[2])
+
+        print(f"\n==== Processing batch of {len(texts)} text(s), {len(sentences)} sentence(s) ====")
+        try:
+            sentence_results = self._process_sentences(sentences) if sentences else []
+        except Exception as e:
+            # Retry text by text below, so only the texts that really fail are reported as errors
+            print(f"Error processing batch sentences together, retrying per text: {str(e)}")
+            sentence_results = None
+
+        results = []
+        for document in documents:
+            if isinstance(document, ProcessingResult):
+                results.append(document)
+                continue
+            text = document['original']
+            paragraphs, paragraph_segments, document_sentences = document['split']
+
+            try:
+                if not text:
+                    result = ProcessingResult(text, highlighted=text if highlight_changes else None)
+                else:
+                    if sentence_results is None:
+                        document_results = self._process_sentences(document_sentences)
+                    else:
+                        first = document['first']
+                        document_results = sentence_results[first:first + len(document_sentences)]
+                    result = self._assemble_document(
+                        text, paragraphs, paragraph_segments, document_results, highlight_changes
+                    )
+            except Exception as e:
+                print(f"Error processing batch item: {str(e)}")
+                result = ProcessingResult(text, error=str(e))
+            results.append(result)
+        return results
+
+    def _stream_sentences(self, sentences, highlight_changes):
+        """Yield a 'sentence' event for each sentence as its processing completes."""
+        def event(index, result):
+            processed, changes, transformations = result
+            item = {
+                'event': 'sentence',
+                'index': index,
+                'original': sentences[index],
+                'translated': processed,
+                'changes': changes,
+                'transformations': transformations
+            }
+            if highlight_changes:
+                item['highlighted'] = self._highlight_sentence(sentences[index], processed, changes)
+            return item
+        
+        # Blank entries need no processing and come back unchanged
+        work = [index for index, sentence in enumerate(sentences) if sentence.strip()]
+        for index, sentence in enumerate(sentences):
+            if not sentence.strip():
+                yield event(index, (sentence, [], []))
+        
+        workers = min(self.max_workers, len(work))
+        if workers <= 1:
+            for index in work:
+                yield event(index, self._process_sentence(sentences[index]))
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sentence') as executor:
+            futures = {executor.submit(self._process_sentence, sentences[index]): index for index in work}
+            for future in as_completed(futures):
+                yield event(futures[future], future.result())
+    
+    def _split_document(self, text):
+        """
+        Split text into paragraphs and each paragraph into sentences.
+        
+        Args:
+            text (str): Text with sentence endings normalized
+            
+        Returns:
+            tuple: (paragraphs, paragraph_segments, sentences) where paragraph_segments holds
+                the parsed segments per paragraph (None for blank paragraphs) and sentences
+                lists every non-blank segment in document order
+        """
         # Split into paragraphs to preserve structure
         paragraphs = text.split('\n')
+        
+        # Break every paragraph into sentences first so independent sentences
+        # can be sent to the LLM concurrently
+        paragraph_segments = []
+        with metrics.stage_duration.time(stage='segmentation'):
+            for paragraph in paragraphs:
+                if not paragraph.strip():
+                    paragraph_segments.append(None)
+                    continue
+                segments = self.sentence_parser.parse(paragraph)
+                print(f"PARSED SEGMENTS: {segments}")
+                paragraph_segments.append(segments)
+        
+        sentences = [
+            segment
+            for segments in paragraph_segments if segments
+            for segment in segments if segment.strip()
+        ]
+        return paragraphs, paragraph_segments, sentences
+    
+    def _assemble_document(self, text, paragraphs, paragraph_segments, sentence_results, highlight_changes):
+        """
+        Rebuild the processed document from per-sentence results and collect its changes,
+        friction words and transformations.
+        
+        Args:
+            text (str): Text with sentence endings normalized
+            paragraphs (list): Paragraphs from _split_document
+            paragraph_segments (list): Segments per paragraph from _split_document
+            sentence_results (list): (processed, changes, transformations) per sentence, in document order
+            highlight_changes (bool): Whether to build highlighted HTML
+            
+        Returns:
+            ProcessingResult: The document's result
+        """
+        sentence_results = iter(sentence_results)
+        changes = []
+        transformations = []
         processed_paragraphs = []
-        original_paragraphs = [] if highlight_changes else None
+        # Highlighted HTML is built alongside, sentence by sentence, from each
+        # sentence's own edits; nothing is diffed again at paragraph level
+        highlighted_paragraphs = [] if highlight_changes else None
         
         # Process each paragraph
-        for paragraph in paragraphs:
-            if not paragraph.strip():
+        for paragraph, segments in zip(paragraphs, paragraph_segments):
+            if segments is None:
                 # Preserve empty lines
                 processed_paragraphs.append('')
                 if highlight_changes:
-                    original_paragraphs.append('')
+                    highlighted_paragraphs.append('')
                 continue
             
-            # Break paragraph into sentences for better LLM processing
-            segments = self.sentence_parser.parse(paragraph)
-            print(f"PARSED SEGMENTS: {segments}")
-            
             if not segments:
                 # If no segments were found (unusual case), add the paragraph as-is
                 processed_paragraphs.append(paragraph)
                 if highlight_changes:
-                    original_paragraphs.append(paragraph)
+                    highlighted_paragraphs.append(html.escape(paragraph))
                 continue
             
-            # Process each segment (sentence)
+            # Collect the result of each segment (sentence)
             processed_segments = []
-            original_segments = [] if highlight_changes else None
+            highlighted_segments = [] if highlight_changes else None
+            # Processed segments seen so far in this paragraph, for the duplicate check
+            seen_segments = NearDuplicateIndex()
             
             for segment in segments:
                 if segment.strip():
-                    if highlight_changes:
-                        original_segments.append(segment)
-                    
-                    processed, segment_changes = self.process_sentence(segment)
+                    processed, segment_changes, segment_transformations = next(sentence_results)
+                    transformations.extend(segment_transformations)
                     
                     # Check if this segment is too similar to any we've already processed
                     # Only add it if it's not a duplicate
-                    if not any(self._is_similar_sentence(processed, existing) for existing in processed_segments):
+                    with metrics.stage_duration.time(stage='deduplication'):
+                        duplicate = seen_segments.contains_similar(processed)
+                        if not duplicate:
+                            seen_segments.add(processed)
+                    if not duplicate:
                         processed_segments.append(processed)
-                        self.changes.extend(segment_changes)
+                        changes.extend(segment_changes)
+                        if highlight_changes:
+                            highlighted_segments.append(
+                                self._highlight_sentence(segment, processed, segment_changes).strip()
+                            )
                     else:
                         print(f"Detected duplicate segment, skipping: '{processed}'")
             
@@ -140,21 +423,20 @@ class TextProcessor:
             processed_paragraphs.append(processed_paragraph)
             
             if highlight_changes:
-                original_paragraph = ' '.join(original_segments)
-                original_paragraphs.append(original_paragraph)
+                highlighted_paragraphs.append(' '.join(highlighted_segments))
         
         # Recombine paragraphs with line breaks
         processed_text = '\n'.join(processed_paragraphs)
         
         # Extract friction words and their replacements for reporting
-        self._extract_friction_words(text, processed_text)
-        
-        if highlight_changes:
-            original_text = '\n'.join(original_paragraphs)
-            highlighted_text = self.highlight_changes_inline(original_text, processed_text)
-            return processed_text, self.changes, highlighted_text
-        else:
-            return processed_text, self.changes
+        friction_words = self._extract_friction_words(changes)
+        
+        return ProcessingResult(
+            text, processed_text, changes,
+            friction_words=_unique_friction_words(friction_words),
+            transformations=transformations,
+            highlighted='<br>\n'.join(highlighted_paragraphs) if highlight_changes else None
+        )
     
     def _ensure_sentence_endings(self, text):
         """
@@ -167,55 +449,179 @@ class TextProcessor:
         Returns:
             str: Text with sentence endings normalized
         """
-        # Pattern to find sentence fragments without proper ending punctuation
-        # but preserving newlines and respecting existing punctuation
-        lines = text.split('\n')
-        processed_lines = []
+        # Only the last fragment on each line can lack punctuation; the line's own
+        # spacing is kept (splitting on punctuation used to drop the space before it)
+        return ensure_sentence_endings(text)
+    
+    def _process_sentences(self, sentences):
+        """
+        Process a list of sentences. With batching enabled each translator stage runs
+        across all sentences at once, several sentences per LLM request; otherwise (and
+        in combined mode) up to max_workers sentences are processed concurrently.
+        
+        Args:
+            sentences (list): Sentences to process
+            
+        Returns:
+            list: (processed_sentence, changes_list, transformations_list) per sentence, in input order
+        """
+        if self.batch_size > 1 and len(sentences) > 1 and not self.combined:
+            return self._process_sentences_batched(sentences)
         
-        for line in lines:
-            # Skip empty lines
-            if not line.strip():
-                processed_lines.append(line)
+        workers = min(self.max_workers, len(sentences))
+        if workers <= 1:
+            return [self._process_sentence(sentence) for sentence in sentences]
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sentence') as executor:
+            return list(executor.map(self._process_sentence, sentences))
+    
+    def _process_sentences_batched(self, sentences):
+        """
+        Run the BUT, SHOULD and NOT stages over every uncached sentence, sending the
+        sentences of each stage to the translator as one batch.
+        
+        Args:
+            sentences (list): Sentences to process
+            
+        Returns:
+            list: (processed_sentence, changes_list, transformations_list) per sentence, in input order
+        """
+        results = [None] * len(sentences)
+        
+        # Serve cached sentences and collapse repeated ones onto a single translation
+        pending = {}
+        for index, sentence in enumerate(sentences):
+            cache_key = self._sentence_cache_key(sentence)
+            cached = self.sentence_cache.get(cache_key)
+            if cached is not None:
+                processed_sentence, changes, transformations = self._copy_result(cached)
+                print(f"Sentence cache hit: '{sentence}'")
+                results[index] = ((processed_sentence if changes else sentence), changes, transformations)
+            else:
+                pending.setdefault(cache_key, []).append(index)
+        
+        if not pending:
+            return results
+        
+        cache_keys = list(pending)
+        current = [sentences[pending[cache_key][0]] for cache_key in cache_keys]
+        # Each sentence is scanned once; stages only re-detect what the previous one rewrote
+        with metrics.stage_duration.time(stage='detection'):
+            detections = [self.friction_patterns.detect(sentence) for sentence in current]
+        all_changes = [[] for _ in cache_keys]
+        all_transformations = [[] for _ in cache_keys]
+        failed = set()
+        
+        print(f"\n==== Processing {len(cache_keys)} sentence(s) in batches of up to {self.batch_size} ====")
+        for translation_type, translator in self._translation_stages():
+            needed = [
+                position for position, detection in enumerate(detections)
+                if detection.contains(translation_type)
+            ]
+            if not needed:
+                print(f"No {translation_type.upper()} friction words detected in batch. Skipping {translation_type.upper()} translator.")
                 continue
-                
-            # Process each line to ensure sentences end with punctuation
-            segments = re.split(r'([.!?;])', line)
-            processed_segments = []
             
-            # Add each segment with its punctuation if it exists
-            for i in range(0, len(segments)-1, 2):
-                processed_segments.append(segments[i] + segments[i+1])
-                
-            # Handle the last segment if it doesn't have punctuation
-            if len(segments) % 2 == 1 and segments[-1].strip():
-                last_segment = segments[-1].strip()
-                if not re.search(r'[.!?;]$', last_segment):
-                    processed_segments.append(last_segment + '.')
-                else:
-                    processed_segments.append(last_segment)
-                    
-            processed_lines.append(''.join(processed_segments))
+            stage_failed = set()
+            failures_before = llm_failure_count()
+            with metrics.translator_duration.time(translator=type(translator).__name__, mode='batch'):
+                outputs = translator.translate_batch(
+                    [current[position] for position in needed],
+                    batch_size=self.batch_size,
+                    max_workers=self.max_workers,
+                    failed=stage_failed,
+                    detections=[detections[position] for position in needed]
+                )
+            if llm_failure_count() != failures_before and not stage_failed:
+                # A call failed on this thread without being traced to a sentence;
+                # keep the whole stage out of the cache rather than memoize an error
+                stage_failed = set(range(len(needed)))
+            failed.update(needed[index] for index in stage_failed)
             
-        return '\n'.join(processed_lines)
+            for position, output in zip(needed, outputs):
+                current[position] = self._record_stage_result(
+                    translation_type, current[position], output,
+                    all_changes[position], all_transformations[position]
+                )
+                # Re-detect only the region the stage rewrote
+                detections[position] = detections[position].updated(current[position])
+        
+        for position, cache_key in enumerate(cache_keys):
+            result = (current[position], all_changes[position], all_transformations[position])
+            # Never memoize a result produced while the LLM was failing
+            if position not in failed:
+                self.sentence_cache.set(cache_key, self._copy_result(result))
+            for index in pending[cache_key]:
+                processed_sentence, changes, transformations = self._copy_result(result)
+                results[index] = ((processed_sentence if changes else sentences[index]), changes, transformations)
+        return results
     
-    def _is_similar_sentence(self, sentence1, sentence2):
-        """Check if two sentences are very similar to avoid duplication."""
-        # Normalize for comparison
-        s1 = self._normalize_text(sentence1)
-        s2 = self._normalize_text(sentence2)
+    def _translate_sentence_combined(self, sentence, detection):
+        """
+        Apply every detected friction category to a sentence with one LLM call.
         
-        # Check for near-identical match
-        if s1 == s2:
-            return True
+        Args:
+            sentence (str): Sentence to translate
+            detection (FrictionDetection): Friction matches found in the sentence
         
-        # Check for one being a subset of the other
-        if s1 in s2 or s2 in s1:
-            return True
+        Returns:
+            list or None: (translation_type, text_after_stage) per stage, or None when the
+                sentence should go through the chained translators instead
+        """
+        categories = [
+            translation_type for translation_type, _ in self._translation_stages()
+            if detection.contains(translation_type)
+        ]
+        # A single category gains nothing from the combined prompt
+        if len(categories) < 2:
+            return None
+        with metrics.translator_duration.time(translator=type(self.combined_translator).__name__, mode='combined'):
+            return self.combined_translator.translate_steps(sentence, categories, detection)
+    
+    def _translation_stages(self):
+        """The translators in the order they are applied, keyed by their friction-pattern category."""
+        return (
+            ('but', self.but_translator),
+            ('should', self.should_translator),
+            ('not', self.not_translator)
+        )
+    
+    def _record_stage_result(self, translation_type, sentence, result, changes, transformations):
+        """
+        Record the change made by one translator stage.
         
-        # Use difflib to check similarity ratio
-        similarity = difflib.SequenceMatcher(None, s1, s2).ratio()
-        # If more than 80% similar, consider them duplicates
-        return similarity > 0.8
+        Args:
+            translation_type (str): Type of translation (but, should, not)
+            sentence (str): Sentence given to the translator
+            result (str): Sentence returned by the translator
+            changes (list): Change records for the sentence, appended to
+            transformations (list): Transformation records for the sentence, appended to
+            
+        Returns:
+            str: The sentence to hand to the next stage
+        """
+        label = translation_type.upper()
+        print(f"{label} translator result: '{result}'")
+        if result == sentence:
+            print(f"No {label} changes detected")
+            return sentence
+        # An empty result means the translator failed; never replace the sentence with it
+        if not result or not result.strip():
+            print(f"{label} translator returned an empty result, keeping the sentence")
+            return sentence
+        
+        changes.append({
+            'type': translation_type,
+            'original': sentence,
+            'translated': result,
+            'explanation': f'Replaced "{translation_type}" type friction language using Azure OpenAI'
+        })
+        
+        # Track specific transformations using diff
+        with metrics.stage_duration.time(stage='diff'):
+            transformations.extend(self._track_specific_transformations(translation_type, sentence, result))
+        print(f"{label} change detected: '{sentence}' -> '{result}'")
+        return result
     
     def process_sentence(self, sentence):
         """
@@ -223,169 +629,175 @@ class TextProcessor:
         Modified to apply multiple translators per sentence to handle complex cases.
         
         Returns:
-            tuple: (processed_sentence, changes_list)
+            tuple: (processed_sentence, changes_list); the sentence's transformations are
+                available from get_specific_transformations() in the same thread
+        """
+        processed_sentence, changes, transformations = self._process_sentence(sentence)
+        self._publish(ProcessingResult(sentence, processed_sentence, changes, transformations=transformations))
+        return processed_sentence, changes
+    
+    def _process_sentence(self, sentence):
+        """
+        Apply the translators to one sentence without touching shared state,
+        so it can safely run on a worker thread. Results are memoized per
+        normalized sentence and prompt version, including unchanged sentences.
+        
+        Returns:
+            tuple: (processed_sentence, changes_list, transformations_list)
+        """
+        cache_key = self._sentence_cache_key(sentence)
+        cached = self.sentence_cache.get(cache_key)
+        if cached is not None:
+            processed_sentence, changes, transformations = self._copy_result(cached)
+            print(f"Sentence cache hit: '{sentence}'")
+            # Unchanged sentences come back exactly as they were given
+            return (processed_sentence if changes else sentence), changes, transformations
+        
+        # Concurrent requests for the same sentence wait for one pipeline run
+        result = self._sentence_flight.do(cache_key, lambda: self._translate_and_cache(sentence, cache_key))
+        return self._copy_result(result)
+    
+    def _translate_and_cache(self, sentence, cache_key):
+        """Run the translators for a sentence and memoize the result if every LLM call succeeded."""
+        failures_before = llm_failure_count()
+        result = self._translate_sentence(sentence)
+        
+        # Never memoize a result produced while the LLM was failing
+        if llm_failure_count() == failures_before:
+            self.sentence_cache.set(cache_key, self._copy_result(result))
+        return result
+    
+    def _sentence_cache_key(self, sentence):
+        """Build the sentence cache key from the normalized sentence, prompt version and pipeline mode."""
+        normalized = sentence.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+        normalized = ' '.join(normalized.split())
+        mode = 'combined' if self.combined else 'chained'
+        return f"{self._get_prompt_version()}:{mode}:{normalized}"
+    
+    def _get_prompt_version(self):
+        """
+        Get a hash of every prompt template the translators can use.
+        Recomputed after set_prompts or any PromptManager.set_prompt call.
+        """
+        if self._prompt_version is None or self._prompt_generation != PromptManager.generation:
+            material = json.dumps([
+                self.should_translator.prompt_template,
+                self.but_translator.prompt_template,
+                self.not_translator.prompt_template,
+                self.prompt_manager.prompts
+            ], sort_keys=True)
+            self._prompt_generation = PromptManager.generation
+            self._prompt_version = hashlib.sha1(material.encode('utf-8')).hexdigest()[:16]
+        return self._prompt_version
+    
+    def _copy_result(self, result):
+        """Copy a sentence result so callers can't mutate what is stored in the cache."""
+        processed_sentence, changes, transformations = result
+        return processed_sentence, [dict(c) for c in changes], [dict(t) for t in transformations]
+    
+    def _translate_sentence(self, sentence):
+        """
+        Run the BUT, SHOULD and NOT translators over one sentence in sequence.
+        
+        Returns:
+            tuple: (processed_sentence, changes_list, transformations_list)
         """
         original = sentence
         processed_sentence = sentence
         changes = []
+        transformations = []
         
         print(f"\n==== Processing sentence: '{sentence}' ====")
         
+        # Scan the sentence once; the record is handed to every stage and to reporting
+        with metrics.stage_duration.time(stage='detection'):
+            detection = self.friction_patterns.detect(sentence)
+        
+        if self.combined:
+            steps = self._translate_sentence_combined(sentence, detection)
+            if steps is not None:
+                for translation_type, result in steps:
+                    processed_sentence = self._record_stage_result(
+                        translation_type, processed_sentence, result, changes, transformations
+                    )
+                if not changes:
+                    print(f"No friction words detected or no changes made. Returning original sentence.")
+                    return original, changes, transformations
+                print(f"Final processed result: '{processed_sentence}'")
+                return processed_sentence, changes, transformations
+        
         # IMPORTANT CHANGE: Apply all translators in sequence, processing the result of each
-        # This allows handling sentences with multiple types of friction language
-        
-        # First, detect all friction types in the sentence
-        has_but_words = any(re.search(pattern, processed_sentence, re.IGNORECASE) for pattern in self.but_patterns)
-        has_should_words = any(re.search(pattern, processed_sentence, re.IGNORECASE) for pattern in self.should_patterns)
-        has_not_words = any(re.search(pattern, processed_sentence, re.IGNORECASE) for pattern in self.not_patterns)
-        
-        # Apply BUT translator first (if needed)
-        if has_but_words:
-            print(f"BUT friction words detected. Applying BUT translator...")
-            but_result = self.but_translator.translate(processed_sentence)
-            print(f"BUT translator result: '{but_result}'")
-            if but_result != processed_sentence:
-                changes.append({
-                    'type': 'but',
-                    'original': processed_sentence,
-                    'translated': but_result,
-                    'explanation': 'Replaced "but" type friction language using Azure OpenAI'
-                })
-                
-                # Track specific transformations using diff
-                self._track_specific_transformations('but', processed_sentence, but_result)
-                print(f"BUT change detected: '{processed_sentence}' -> '{but_result}'")
-                
-                # Update sentence for next translator
-                processed_sentence = but_result
-            else:
-                print(f"No BUT changes detected")
-        else:
-            print(f"No BUT friction words detected. Skipping BUT translator.")
-        
-        # Apply SHOULD translator (on updated text)
-        # Check again since previous translation might have affected this
-        has_should_words = any(re.search(pattern, processed_sentence, re.IGNORECASE) for pattern in self.should_patterns)
-        if has_should_words:
-            print(f"SHOULD friction words detected. Applying SHOULD translator...")
-            should_result = self.should_translator.translate(processed_sentence)
-            print(f"SHOULD translator result: '{should_result}'")
-            if should_result != processed_sentence:
-                changes.append({
-                    'type': 'should',
-                    'original': processed_sentence,
-                    'translated': should_result,
-                    'explanation': 'Replaced "should" type friction language using Azure OpenAI'
-                })
-                
-                # Track specific transformations using diff
-                self._track_specific_transformations('should', processed_sentence, should_result)
-                print(f"SHOULD change detected: '{processed_sentence}' -> '{should_result}'")
-                
-                # Update sentence for next translator
-                processed_sentence = should_result
+        # This allows handling sentences with multiple types of friction language.
+        # BUT runs first, then SHOULD and NOT on the updated text; after a stage rewrites
+        # the sentence only the rewritten region is re-detected
+        for translation_type, translator in self._translation_stages():
+            label = translation_type.upper()
+            if detection.contains(translation_type):
+                print(f"{label} friction words detected. Applying {label} translator...")
+                with metrics.translator_duration.time(translator=type(translator).__name__, mode='chained'):
+                    result = translator.translate(processed_sentence, detection=detection)
+                processed_sentence = self._record_stage_result(
+                    translation_type, processed_sentence, result, changes, transformations
+                )
+                detection = detection.updated(processed_sentence)
             else:
-                print(f"No SHOULD changes detected")
-        else:
-            print(f"No SHOULD friction words detected. Skipping SHOULD translator.")
-        
-        # Apply NOT translator (on updated text)
-        # Check again since previous translations might have affected this
-        has_not_words = any(re.search(pattern, processed_sentence, re.IGNORECASE) for pattern in self.not_patterns)
-        if has_not_words:
-            print(f"NOT friction words detected. Applying NOT translator...")
-            not_result = self.not_translator.translate(processed_sentence)
-            print(f"NOT translator result: '{not_result}'")
-            if not_result != processed_sentence:
-                changes.append({
-                    'type': 'not',
-                    'original': processed_sentence,
-                    'translated': not_result,
-                    'explanation': 'Replaced "not" type friction language using Azure OpenAI'
-                })
-                
-                # Track specific transformations using diff
-                self._track_specific_transformations('not', processed_sentence, not_result)
-                print(f"NOT change detected: '{processed_sentence}' -> '{not_result}'")
-                
-                # Update final processed sentence
-                processed_sentence = not_result
-            else:
-                print(f"No NOT changes detected")
-        else:
-            print(f"No NOT friction words detected. Skipping NOT translator.")
+                print(f"No {label} friction words detected. Skipping {label} translator.")
         
         # Check for remaining friction words after all translations
-        remaining_friction = self._check_for_remaining_friction(processed_sentence)
+        remaining_friction = self._check_for_remaining_friction(processed_sentence, detection)
         if remaining_friction:
             print(f"WARNING: Sentence still contains friction words after processing: {remaining_friction}")
         
         # If no changes were made, return the original sentence
         if not changes:
             print(f"No friction words detected or no changes made. Returning original sentence.")
-            return original, changes
+            return original, changes, transformations
         
         print(f"Final processed result: '{processed_sentence}'")
-        return processed_sentence, changes
+        return processed_sentence, changes, transformations
     
-    def _check_for_remaining_friction(self, processed_text):
+    def _check_for_remaining_friction(self, processed_text, detection=None):
         """
         Check for any remaining friction words after all translators have been applied.
         Useful for debugging and quality monitoring.
         
         Args:
             processed_text (str): The processed text to check
+            detection (FrictionDetection, optional): Friction matches already found in the text
             
         Returns:
             list: List of remaining friction words found
         """
-        remaining = []
-        
-        # Check for "but" friction words
-        for pattern in self.but_patterns:
-            matches = re.finditer(pattern, processed_text, re.IGNORECASE)
-            for match in matches:
-                remaining.append(match.group(0))
-        
-        # Check for "should" friction words
-        for pattern in self.should_patterns:
-            matches = re.finditer(pattern, processed_text, re.IGNORECASE)
-            for match in matches:
-                remaining.append(match.group(0))
-        
-        # Check for "not" friction words
-        for pattern in self.not_patterns:
-            matches = re.finditer(pattern, processed_text, re.IGNORECASE)
-            for match in matches:
-                remaining.append(match.group(0))
-        
-        return remaining
+        if detection is None or detection.text != processed_text:
+            detection = self.friction_patterns.detect(processed_text)
+        return [match.text for match in detection.of(('but', 'should', 'not'))]
     
     def _track_specific_transformations(self, translation_type, original, translated):
         """
-        Track specific word transformations using difflib.
+        Track specific word transformations from the token diff of the sentence pair.
         
         Args:
             translation_type (str): Type of translation (but, should, not)
             original (str): Original sentence
             translated (str): Translated sentence
+            
+        Returns:
+            list: Transformation records found in this sentence
         """
-        # Split into words for finer comparison
-        original_words = original.split()
-        translated_words = translated.split()
+        transformations = []
         
-        # Use difflib to find differences
-        matcher = difflib.SequenceMatcher(None, original_words, translated_words)
+        # Shared, memoized diff; the translator's over-correction check already computed it
+        edit_script = diff_engine.diff(original, translated)
         
         # Process the diff operations
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in edit_script.opcodes:
             if tag in ['replace', 'delete']:
-                # These are the words that were changed or removed
-                original_phrase = ' '.join(original_words[i1:i2])
+                # These are the words that were changed or removed, as written in the sentence
+                original_phrase = edit_script.original_text(i1, i2)
                 
                 # Get the corresponding replacement if it exists
                 if tag == 'replace':
-                    replacement_phrase = ' '.join(translated_words[j1:j2])
+                    replacement_phrase = edit_script.rewritten_text(j1, j2)
                 else:  # for 'delete' operations
                     replacement_phrase = ""
                 
@@ -394,13 +806,15 @@ class TextProcessor:
                 
                 # Add to transformations list if we have a valid friction word
                 if friction_type:
-                    self.transformations.append({
+                    transformations.append({
                         'type': translation_type,
                         'pattern': friction_type,
                         'original': original_phrase,
                         'replacement': replacement_phrase,
                         'context': self._get_context(original, original_phrase)
                     })
+        
+        return transformations
     
     def _identify_friction_pattern(self, phrase, translation_type):
         """
@@ -413,25 +827,11 @@ class TextProcessor:
         Returns:
             str: The matched pattern or None
         """
-        if translation_type == 'but':
-            for pattern in self.but_patterns:
-                match = re.search(pattern, phrase, re.IGNORECASE)
-                if match:
-                    return match.group(0)
-        
-        elif translation_type == 'should':
-            for pattern in self.should_patterns:
-                match = re.search(pattern, phrase, re.IGNORECASE)
-                if match:
-                    return match.group(0)
+        if translation_type not in ('but', 'should', 'not'):
+            return None
         
-        elif translation_type == 'not':
-            for pattern in self.not_patterns:
-                match = re.search(pattern, phrase, re.IGNORECASE)
-                if match:
-                    return match.group(0)
-        
-        return None
+        matches = self.friction_patterns.by_priority(phrase, translation_type)
+        return matches[0].text if matches else None
     
     def _get_context(self, sentence, phrase):
         """
@@ -471,130 +871,165 @@ class TextProcessor:
         
         return context
     
-    def _extract_friction_words(self, original_text, translated_text):
+    def _extract_friction_words(self, changes):
         """
         Extract friction words and their replacements by analyzing changes.
         This is maintained for reporting purposes.
+        
+        Args:
+            changes (list): Change records of one text
+            
+        Returns:
+            list: Friction word records, one per friction word found in a changed sentence
         """
+        friction_words = []
         # Process each change to identify friction words
-        for change in self.changes:
+        for change in changes:
             change_type = change['type']
             orig = change['original']
             trans = change['translated']
+            # Every stage input was recorded in the engine's detection memo while it was
+            # translated (detect() for the sentence, updated() after each rewrite), so this
+            # is normally a memo lookup. It scans the text again only if the record has been
+            # evicted or the sentence was served from the sentence cache.
+            detection = self.friction_patterns.detect(orig)
             
             # Extract "should/could/would" type friction words
             if change_type == 'should':
-                for pattern in self.should_patterns:
-                    matches = re.finditer(pattern, orig, re.IGNORECASE)
-                    for match in matches:
-                        friction_word = match.group(0)
-                        # Try to identify the type of replacement based on the translated text
-                        if "might" in trans.lower():
-                            context = 'high'
-                            replacement = 'might'
-                        elif "recommend" in trans.lower():
-                            context = 'moderate'
-                            replacement = 'recommend'
-                        elif "must" in trans.lower():
-                            context = 'low'
-                            replacement = 'must'
-                        elif "want you to" in trans.lower():
-                            context = 'low'
-                            replacement = 'want you to'
-                        elif "surprised by" in trans.lower() and "believe" in orig.lower():
-                            context = 'special'
-                            replacement = 'was surprised by'
-                        else:
-                            context = 'general'
-                            replacement = '(Azure OpenAI translation)'
-                        
-                        # Get prompt for this friction word if available
-                        prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
-                        
-                        # Add to friction words list
-                        self.friction_words.append({
-                            'type': 'should',
-                            'original': friction_word,
-                            'replacement': replacement,
-                            'prompt': prompt_rule['prompt'] if prompt_rule else None,
-                            'example': prompt_rule['example'] if prompt_rule else None
-                        })
+                for match in detection.of('should'):
+                    friction_word = match.text
+                    # Try to identify the type of replacement based on the translated text
+                    if "might" in trans.lower():
+                        context = 'high'
+                        replacement = 'might'
+                    elif "recommend" in trans.lower():
+                        context = 'moderate'
+                        replacement = 'recommend'
+                    elif "must" in trans.lower():
+                        context = 'low'
+                        replacement = 'must'
+                    elif "want you to" in trans.lower():
+                        context = 'low'
+                        replacement = 'want you to'
+                    elif "surprised by" in trans.lower() and "believe" in orig.lower():
+                        context = 'special'
+                        replacement = 'was surprised by'
+                    else:
+                        context = 'general'
+                        replacement = '(Azure OpenAI translation)'
+                    
+                    # Get prompt for this friction word if available
+                    prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
+                    
+                    # Add to friction words list
+                    friction_words.append({
+                        'type': 'should',
+                        'original': friction_word,
+                        'replacement': replacement,
+                        'prompt': prompt_rule['prompt'] if prompt_rule else None,
+                        'example': prompt_rule['example'] if prompt_rule else None
+                    })
             
             # Extract "but" type friction words
             elif change_type == 'but':
-                for pattern in self.but_patterns:
-                    matches = re.finditer(pattern, orig, re.IGNORECASE)
-                    for match in matches:
-                        friction_word = match.group(0)
-                        # Try to identify the type of replacement
-                        if "and at the same time" in trans.lower():
-                            context = 'contrast'
-                            replacement = 'and at the same time'
-                        elif "and" in trans.lower() and "but" not in trans.lower() and "yet" not in trans.lower():
-                            context = 'clarification'
-                            replacement = 'and'
-                        elif "except" in trans.lower():
-                            context = 'exception'
-                            replacement = 'except'
-                        else:
-                            context = 'general'
-                            replacement = '(Azure OpenAI translation)'
-                        
-                        # Get prompt for this friction word if available
-                        prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
-                        
-                        # Add to friction words list
-                        self.friction_words.append({
-                            'type': 'but',
-                            'original': friction_word,
-                            'replacement': replacement,
-                            'prompt': prompt_rule['prompt'] if prompt_rule else None,
-                            'example': prompt_rule['example'] if prompt_rule else None
-                        })
+                for match in detection.of('but'):
+                    friction_word = match.text
+                    # Try to identify the type of replacement
+                    if "and at the same time" in trans.lower():
+                        context = 'contrast'
+                        replacement = 'and at the same time'
+                    elif "and" in trans.lower() and "but" not in trans.lower() and "yet" not in trans.lower():
+                        context = 'clarification'
+                        replacement = 'and'
+                    elif "except" in trans.lower():
+                        context = 'exception'
+                        replacement = 'except'
+                    else:
+                        context = 'general'
+                        replacement = '(Azure OpenAI translation)'
+                    
+                    # Get prompt for this friction word if available
+                    prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
+                    
+                    # Add to friction words list
+                    friction_words.append({
+                        'type': 'but',
+                        'original': friction_word,
+                        'replacement': replacement,
+                        'prompt': prompt_rule['prompt'] if prompt_rule else None,
+                        'example': prompt_rule['example'] if prompt_rule else None
+                    })
             
             # Extract "not" type friction words
             elif change_type == 'not':
-                for pattern in self.not_patterns:
-                    matches = re.finditer(pattern, orig, re.IGNORECASE)
-                    for match in matches:
-                        friction_word = match.group(0)
-                        
-                        # Try to identify the context
-                        if any(re.search(rf'\b{friction_word}\s+\w*\s*(find|locate)', orig, re.IGNORECASE) for friction_word in ['can\'t', 'cannot', 'couldn\'t']):
-                            context = 'ability'
-                        elif any(re.search(pattern, orig, re.IGNORECASE) for pattern in [r'\bis\s+not\b', r'\bisn\'t\b', r'\bam\s+not\b']):
-                            context = 'state'
-                        elif re.search(r'\bno\s+\w+', orig, re.IGNORECASE):
-                            context = 'determiner'
-                        else:
-                            context = 'reframe'
-                        
-                        # Get prompt for this friction word if available
-                        prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
-                        
-                        # Add to friction words list
-                        self.friction_words.append({
-                            'type': 'not',
-                            'original': friction_word,
-                            'replacement': '(Azure OpenAI translation)',
-                            'prompt': prompt_rule['prompt'] if prompt_rule else None,
-                            'example': prompt_rule['example'] if prompt_rule else None
-                        })
+                # Identify the context once for the sentence
+                if any(re.search(rf'\b{friction_word}\s+\w*\s*(find|locate)', orig, re.IGNORECASE) for friction_word in ['can\'t', 'cannot', 'couldn\'t']):
+                    context = 'ability'
+                elif detection.subtypes('state') & {'is not', "isn't", 'am not'}:
+                    context = 'state'
+                elif detection.contains('determiner'):
+                    context = 'determiner'
+                else:
+                    context = 'reframe'
+                
+                for match in detection.of('not'):
+                    friction_word = match.text
+                    
+                    # Get prompt for this friction word if available
+                    prompt_rule = self.prompt_manager.get_prompt_for_word(friction_word, context)
+                    
+                    # Add to friction words list
+                    friction_words.append({
+                        'type': 'not',
+                        'original': friction_word,
+                        'replacement': '(Azure OpenAI translation)',
+                        'prompt': prompt_rule['prompt'] if prompt_rule else None,
+                        'example': prompt_rule['example'] if prompt_rule else None
+                    })
+        return friction_words
+    
+    def _publish(self, result):
+        """Record a result as the calling thread's latest, for the legacy getters, and return it."""
+        self._latest.result = result
+        return result
+    
+    def latest_result(self):
+        """
+        Get the result of the latest process_text() call made by the calling thread.
+        Prefer the result returned by process_text() itself.
+        
+        Returns:
+            ProcessingResult: The latest result, or an empty one if this thread has none
+        """
+        result = getattr(self._latest, 'result', None)
+        return result if result is not None else ProcessingResult('')
+    
+    # Compatibility shims for code written when results were kept on the instance.
+    # They read the calling thread's latest result, so concurrent requests stay separate.
+    
+    @property
+    def changes(self):
+        return list(self.latest_result().changes)
+    
+    @property
+    def friction_words(self):
+        return list(self.latest_result().friction_words)
+    
+    @property
+    def transformations(self):
+        return list(self.latest_result().transformations)
     
     def get_friction_replacements(self):
         """
-        Get a summarized list of friction words and their replacements.
+        Get a summarized list of friction words and their replacements from the calling
+        thread's latest run. Compatibility shim: use ProcessingResult.friction_words.
         """
-        unique_replacements = {}
-        for item in self.friction_words:
-            key = f"{item['type']}_{item['original']}"
-            if key not in unique_replacements:
-                unique_replacements[key] = item
-        return list(unique_replacements.values())
+        return self.friction_words
     
     def get_specific_transformations(self):
         """
-        Get the list of specific transformations that were made.
+        Get the list of specific transformations made in the calling thread's latest run.
+        Compatibility shim: use ProcessingResult.transformations.
         
         Returns:
             list: Transformation details
@@ -603,7 +1038,8 @@ class TextProcessor:
 
     def highlight_changes(self, original_text, processed_text):
         """
-        Create an HTML-highlighted version of the text showing changes.
+        Create an HTML-highlighted version of the text showing the changes of the
+        calling thread's latest run.
         """
         highlighted = processed_text
         for change in self.changes:
@@ -622,7 +1058,8 @@ class TextProcessor:
     def highlight_changes_inline(self, original_text, processed_text):
         """
         Create an HTML version of the processed text with changes highlighted inline.
-        Uses improved word-level diffing for more accurate highlighting.
+        Paragraphs are paired by position and diffed token by token; the pipeline itself
+        uses _highlight_sentence, which works from the edits each stage recorded.
         
         Args:
             original_text (str): The original text
@@ -631,174 +1068,107 @@ class TextProcessor:
         Returns:
             str: HTML string with highlighted changes
         """
-        # If texts are identical, return without highlighting
-        if original_text.strip() == processed_text.strip():
-            return processed_text
-            
-        # Split texts into paragraphs
         original_paragraphs = original_text.split('\n')
         processed_paragraphs = processed_text.split('\n')
         
         result = []
-        
-        # Process each paragraph
-        for i, orig_para in enumerate(original_paragraphs):
-            if i < len(processed_paragraphs):
-                proc_para = processed_paragraphs[i]
-                
-                # Check if paragraphs are identical
-                if orig_para.strip() == proc_para.strip():
-                    result.append(proc_para)
-                else:
-                    # Highlight differences at the word level for better accuracy
-                    result.append(self._highlight_paragraph_changes(orig_para, proc_para))
-            else:
-                # Original paragraph was removed
-                pass
-                
-        # Add any additional paragraphs in processed text
-        for i in range(len(original_paragraphs), len(processed_paragraphs)):
-            result.append(processed_paragraphs[i])
+        for i, proc_para in enumerate(processed_paragraphs):
+            # Paragraphs beyond the end of the original are entirely new
+            orig_para = original_paragraphs[i] if i < len(original_paragraphs) else ''
+            result.append(self._render_highlighted(diff_engine.diff(orig_para, proc_para)))
         
         # Join paragraphs with line breaks
-        html_result = result[0] if result else ""
-        for part in result[1:]:
-            html_result += "<br>\n" + part
-            
-        return html_result
+        return '<br>\n'.join(result)
     
-    def _highlight_paragraph_changes(self, original_para, processed_para):
+    def _highlight_sentence(self, sentence, processed, changes):
         """
-        Highlight differences between paragraphs using word-by-word comparison
-        for better accuracy with identical text that may be rearranged.
+        Highlight the changes made to one sentence. The edits of the translator stages
+        (already diffed, and memoized, when each stage's output was checked) are
+        composed into a single edit script from the sentence to its final form.
         
         Args:
-            original_para (str): Original paragraph text
-            processed_para (str): Processed paragraph text
+            sentence (str): Sentence as it entered the pipeline
+            processed (str): Final processed sentence
+            changes (list): The sentence's change records, one per stage that changed it
             
         Returns:
-            str: HTML with changes highlighted
+            str: HTML of the processed sentence with changes highlighted
         """
-        if original_para.strip() == processed_para.strip():
-            return processed_para
-            
-        # Normalize for comparison
-        orig_normalized = self._normalize_text(original_para)
-        proc_normalized = self._normalize_text(processed_para)
-        
-        # Get exact matches before diffing
-        exact_matches = self._find_exact_matches(orig_normalized, proc_normalized)
-        
-        # Split into words for more accurate comparison
-        orig_words = self._tokenize_text(original_para)
-        proc_words = self._tokenize_text(processed_para)
-        
-        # Create a word-by-word diff
-        matcher = difflib.SequenceMatcher(None, orig_words, proc_words)
-        result = []
+        texts = [sentence]
+        for change in changes:
+            if change['original'] != texts[-1]:
+                texts.append(change['original'])
+            texts.append(change['translated'])
+        if processed != texts[-1]:
+            texts.append(processed)
+        with metrics.stage_duration.time(stage='highlighting'):
+            return self._render_highlighted(diff_engine.compose(texts))
+    
+    def _render_highlighted(self, edit_script):
+        """
+        Render the rewritten side of an edit script as HTML in one pass. Replaced text is
+        marked "highlight-change" (with the original as its title), inserted text
+        "highlight-add", deletions are omitted and all text is HTML-escaped.
         
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            orig_part = ' '.join(orig_words[i1:i2])
-            proc_part = ' '.join(proc_words[j1:j2])
+        Args:
+            edit_script (EditScript): Diff from the original to the processed text
             
+        Returns:
+            str: HTML string with highlighted changes
+        """
+        text = edit_script.rewritten
+        spans = edit_script.rewritten_spans
+        parts = []
+        position = 0
+        
+        for tag, i1, i2, j1, j2 in edit_script.opcodes:
+            if tag == 'delete':
+                continue
+            start, end = spans[j1][0], spans[j2 - 1][1]
+            # Spacing between blocks is kept exactly as in the processed text
+            parts.append(html.escape(text[position:start]))
+            segment = html.escape(text[start:end])
             if tag == 'equal':
-                # Exact match - no highlighting
-                result.append(proc_part)
+                parts.append(segment)
             elif tag == 'replace':
-                # Check if this is an exact match from our preprocessing
-                if proc_part.strip() in exact_matches:
-                    # This is actually an exact match despite difflib marking it as different
-                    result.append(proc_part)
-                else:
-                    # Truly changed text - yellow highlight
-                    result.append(f'<span class="highlight-change" title="Original: {orig_part}">{proc_part}</span>')
-            elif tag == 'delete':
-                # Deleted text - not included in result
-                pass
-            elif tag == 'insert':
-                # Check if this is actually a match somewhere in the original
-                if proc_part.strip() in orig_normalized or any(self._is_substring_match(proc_part, m) for m in exact_matches):
-                    # This is an exact match from the original text - no highlight
-                    result.append(proc_part)
-                else:
-                    # Truly new text - green highlight
-                    result.append(f'<span class="highlight-add">{proc_part}</span>')
-        highlighted = ' '.join(result)
-        highlighted = re.sub(r'\s+([,.;:?!])', r'\1', highlighted)
-        highlighted = re.sub(r',\s+(?=\d)', ',', highlighted)
-        return highlighted.strip()
-    
-    def _normalize_text(self, text):
-        """Normalize text for comparison by removing extra spaces and lowercasing"""
-        return ' '.join(text.lower().split())
-    
-    def _tokenize_text(self, text):
-        """Split text into meaningful tokens (words with punctuation)"""
-        # This regex preserves punctuation as part of words where appropriate
-        return re.findall(r'\b[\w\'-]+\b|\S', text)
-    
-    def _find_exact_matches(self, original, processed):
-        """Find exact text chunks that appear in both original and processed text"""
-        # Extract sentences or phrases
-        orig_phrases = re.split(r'[.!?;:]', original)
-        proc_phrases = re.split(r'[.!?;:]', processed)
-        
-        # Find exact matches
-        matches = set()
-        for orig in orig_phrases:
-            orig = orig.strip()
-            if not orig:
-                continue
-                
-            for proc in proc_phrases:
-                proc = proc.strip()
-                if not proc:
-                    continue
-                    
-                # Check for exact matches or if one contains the other
-                if orig == proc or orig in proc or proc in orig:
-                    matches.add(proc)
-                    
-        # Also check for smaller clause-level matches
-        orig_clauses = re.split(r'[,]', original)
-        proc_clauses = re.split(r'[,]', processed)
+                original = html.escape(edit_script.original_text(i1, i2))
+                parts.append(f'<span class="highlight-change" title="Original: {original}">{segment}</span>')
+            else:
+                parts.append(f'<span class="highlight-add">{segment}</span>')
+            position = end
         
-        for orig in orig_clauses:
-            orig = orig.strip()
-            if not orig:
-                continue
-                
-            for proc in proc_clauses:
-                proc = proc.strip()
-                if not proc:
-                    continue
-                    
-                # Check for exact matches or if one contains the other
-                if orig == proc or orig in proc or proc in orig:
-                    matches.add(proc)
+        parts.append(html.escape(text[position:]))
+        return ''.join(parts)
         
-        return matches
-    
-    def _is_substring_match(self, text, potential_match):
-        """Check if text is a substring of potential_match allowing for minor differences"""
-        text = text.strip().lower()
-        potential_match = potential_match.strip().lower()
+    def with_prompt(self, word_type, prompt):
+        """
+        Get a processor that uses a different prompt for one translator, for trying a prompt
+        out. It shares this processor's prompt manager, parser, caches and connections; only
+        the affected translator is copied. Cached results stay separate because the cache
+        key includes a hash of the active prompts.
         
-        # Direct substring check
-        if text in potential_match:
-            return True
-            
-        # Check if text is a substring with minor differences (like punctuation)
-        text_words = set(re.findall(r'\b\w+\b', text))
-        match_words = set(re.findall(r'\b\w+\b', potential_match))
-        
-        # If most words from text are in the potential match, consider it a match
-        common_words = text_words.intersection(match_words)
-        if len(common_words) >= len(text_words) * 0.8:  # 80% threshold
-            return True
+        Args:
+            word_type (str): Type of word ('should', 'but', or 'not')
+            prompt (str): Custom prompt template
             
-        return False
-        
+        Returns:
+            TextProcessor: The processor with the prompt applied
+        """
+        attribute = f"{word_type.lower()}_translator"
+        if word_type.lower() not in ('should', 'but', 'not'):
+            raise ValueError(f"Unknown word type: {word_type}")
+        
+        processor = copy.copy(self)
+        setattr(processor, attribute, copy.copy(getattr(self, attribute)))
+        processor.combined_translator = CombinedTranslator(
+            processor.but_translator, processor.should_translator, processor.not_translator,
+            self.api_key, self.endpoint
+        )
+        # Its latest results are its own
+        processor._latest = threading.local()
+        processor.set_prompts(word_type, prompt)
+        return processor
+    
     def set_prompts(self, word_type, prompt):
         """
         Set custom prompts for a specific translator.
@@ -814,4 +1184,17 @@ class TextProcessor:
         elif word_type.lower() == 'not':
             self.not_translator.set_prompt(prompt)
         else:
-            raise ValueError(f"Unknown word type: {word_type}")
\ No newline at end of file
+            raise ValueError(f"Unknown word type: {word_type}")
+        
+        # Cached sentence results were produced with the old prompt
+        self._prompt_version = None
+
+
+def _unique_friction_words(friction_words):
+    """Keep the first record of each (type, word) pair, in order."""
+    unique = {}
+    for item in friction_words:
+        key = f"{item['type']}_{item['original']}"
+        if key not in unique:
+            unique[key] = item
+    return list(unique.values())
@@ -2,8 +2,60 @@ import requests
 import json
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, DEFAULT_DEPLOYMENT_NAME, DEFAULT_API_VERSION
+from processor.cache import TTLCache
+from processor.single_flight import SingleFlight
+from processor.translators.http_transport import get_transport
+from processor.translators.rate_limiter import rate_limiter, estimate_tokens, parse_retry_after
+from processor.translators.circuit_breaker import get_breaker, hedged_call
+from processor.translators.cassette import get_cassette, request_key
+from processor.friction_patterns import friction_patterns
+from processor import metrics
+
+SYSTEM_MESSAGE = "You are a specialized language transformation assistant."
+
+# Process-wide cache of LLM responses, shared by every translator instance
+response_cache = TTLCache(
+    maxsize=int(os.environ.get('AZURE_OPENAI_CACHE_SIZE', 2048)),
+    ttl=float(os.environ.get('AZURE_OPENAI_CACHE_TTL', 24 * 3600)),
+    disk_path=os.environ.get('AZURE_OPENAI_CACHE_DB') or None
+)
+
+# Coalesces identical in-flight requests from concurrent threads
+llm_flight = SingleFlight()
+
+# Sentences sent per batched completion. Batching is opt-in: the default of 1 sends
+# every sentence on its own; set e.g. 8 to share one JSON-array completion
+BATCH_SIZE = int(os.environ.get('AZURE_OPENAI_BATCH_SIZE', 1))
+# 'list' sends one numbered sentence per line, 'paragraph' sends the sentences
+# as running text with [n] markers so the model sees their context
+BATCH_STYLE = os.environ.get('AZURE_OPENAI_BATCH_STYLE', 'list')
+# Extra completion tokens allowed per sentence for the JSON wrapping
+BATCH_TOKEN_OVERHEAD = 20
+
+BATCH_OUTPUT_INSTRUCTIONS = """
+BATCH MODE:
+The input above contains {count} separate sentences, each introduced by a number in square brackets, e.g. [1].
+Apply the instructions above to each sentence independently. A sentence that needs no change is returned exactly as given.
+Respond with ONLY a JSON array and nothing else, with one object per input sentence:
+[{{"id": 1, "text": "<transformed sentence 1>"}}, {{"id": 2, "text": "<transformed sentence 2>"}}]
+"""
+
+# Per-thread count of LLM calls that ended in an error, so callers can tell
+# whether a result was produced from real completions
+_call_state = threading.local()
+
+
+def llm_failure_count():
+    """Number of failed LLM calls made so far on the current thread."""
+    return getattr(_call_state, 'failures', 0)
+
+
+def _record_llm_failure():
+    _call_state.failures = llm_failure_count() + 1
 
 class AzureTranslator:
     """Base class for Azure OpenAI API integration for all translators."""
@@ -30,19 +82,106 @@ class AzureTranslator:
         
         print(f"Initialized AzureTranslator with endpoint: {self.endpoint} and deployment: {self.deployment_name}")
 
-    def call_azure_openai_api(self, prompt_text, max_tokens=150, temperature=0.3):
+    @property
+    def transport(self):
+        """The pooled keep-alive transport shared by all translators in this process."""
+        return get_transport()
+
+    @property
+    def rate_limit_key(self):
+        """Identifies the deployment whose quota this translator's calls count against."""
+        return f"{self.endpoint}{self.deployment_name}"
+
+    @property
+    def breaker(self):
+        """The circuit breaker shared by every call to this endpoint and deployment."""
+        return get_breaker(self.rate_limit_key, name=self.deployment_name)
+
+    def _cache_key(self, prompt_text, max_tokens, temperature):
+        """Content-address a request by everything that influences the completion."""
+        return request_key(self.deployment_name, self.api_version, SYSTEM_MESSAGE,
+                           prompt_text, temperature, max_tokens)
+
+    def call_azure_openai_api(self, prompt_text, max_tokens=150, temperature=0.3, raw=False):
         """
         Call the Azure OpenAI API to process the text using direct REST calls.
-        Includes retry logic with exponential backoff for rate limiting.
+        Calls are scheduled by the shared rate limiter, which queues them briefly
+        to stay under the deployment quota instead of sleeping on 429 responses.
+        Successful responses are cached, so identical requests skip the network.
+        While the deployment's circuit breaker is open the call fails fast. A failed
+        call (breaker open, quota wait exceeded, retries exhausted) returns an empty
+        response, so translators keep the original text.
         
         Args:
             prompt_text (str): The formatted prompt text to send to the API
             max_tokens (int, optional): Maximum number of tokens to generate. Defaults to 150.
             temperature (float, optional): Sampling temperature. Defaults to 0.3.
+            raw (bool, optional): Return the completion as it came back, without
+                fix_punctuation_spacing (e.g. JSON to be parsed). Defaults to False.
             
         Returns:
             str: The API response text
         """
+        cache_key = self._cache_key(prompt_text, max_tokens, temperature)
+        cached_response = response_cache.get(cache_key)
+        if cached_response is None:
+            # Identical requests already in flight on other threads share one API call
+            response_text, succeeded = llm_flight.do(
+                cache_key, lambda: self._request_completion(cache_key, prompt_text, max_tokens, temperature)
+            )
+            if not succeeded:
+                _record_llm_failure()
+                return response_text
+            cached_response = response_text
+        
+        # The cache holds completions as received; punctuation is fixed per caller
+        return cached_response if raw else self.fix_punctuation_spacing(cached_response)
+    
+    def _request_completion(self, cache_key, prompt_text, max_tokens, temperature):
+        """
+        Get one completion from the cassette (see processor.translators.cassette) or
+        the API. In record and hybrid mode successful API responses are recorded;
+        in replay mode a prompt missing from the cassette fails without a live call.
+        
+        Returns:
+            tuple: (response_text, succeeded)
+        """
+        cassette = get_cassette()
+        if cassette is None:
+            return self._send_completion(cache_key, prompt_text, max_tokens, temperature)
+        
+        request = {
+            'deployment': self.deployment_name,
+            'api_version': self.api_version,
+            'system': SYSTEM_MESSAGE,
+            'prompt': prompt_text,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        if cassette.replaying:
+            recorded = cassette.replay(cache_key, request)
+            if recorded is not None:
+                metrics.llm_requests.inc(translator=type(self).__name__, outcome='replayed')
+                if recorded:
+                    response_cache.set(cache_key, recorded)
+                return recorded, True
+            if not cassette.recording:
+                print(f"No cassette entry matches this prompt ({cassette.path}); replay mode makes no live calls")
+                return "", False
+        
+        started = time.monotonic()
+        response_text, succeeded = self._send_completion(cache_key, prompt_text, max_tokens, temperature)
+        if succeeded and cassette.recording:
+            cassette.record(cache_key, request, response_text, time.monotonic() - started)
+        return response_text, succeeded
+    
+    def _send_completion(self, cache_key, prompt_text, max_tokens, temperature):
+        """
+        Send one chat completion request, retrying transport errors.
+        
+        Returns:
+            tuple: (response_text, succeeded)
+        """
         url = f"{self.endpoint}openai/deployments/{self.deployment_name}/chat/completions?api-version={self.api_version}"
         
         headers = {
@@ -52,7 +191,7 @@ class AzureTranslator:
         
         payload = {
             "messages": [
-                {"role": "system", "content": "You are a specialized language transformation assistant."},
+                {"role": "system", "content": SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt_text}
             ],
             "temperature": temperature,
@@ -62,27 +201,65 @@ class AzureTranslator:
             "presence_penalty": 0
         }
         
-        # Implement retry logic with exponential backoff
+        # Retry transport errors with exponential backoff; 429s are handled by the rate limiter
         max_retries = 5
         retry_delay = 1  # Start with 1 second delay
+        estimated_tokens = estimate_tokens(prompt_text, max_tokens)
+        
+        body = json.dumps(payload)
+        breaker = self.breaker
+        # Metrics are labelled by translator class, e.g. ButTranslator
+        name = type(self).__name__
         
         for attempt in range(max_retries):
+            # Fail fast while the deployment is unhealthy instead of piling onto it
+            if not breaker.allow():
+                print(f"Circuit breaker open for deployment: {self.deployment_name}, skipping API call")
+                metrics.llm_requests.inc(translator=name, outcome='breaker_open')
+                return "", False
+            
+            # Queue for quota instead of firing straight into a 429
+            if not rate_limiter.acquire(self.rate_limit_key, estimated_tokens):
+                print(f"Rate limiter queue wait exceeded for deployment: {self.deployment_name}")
+                metrics.llm_requests.inc(translator=name, outcome='queue_timeout')
+                return "", False
+            
             try:
                 print(f"Calling API with deployment: {self.deployment_name}, API version: {self.api_version} (attempt {attempt+1})")
-                response = requests.post(url, headers=headers, data=json.dumps(payload))
+                started = time.monotonic()
+                # A hedge only goes out if it fits in the quota without queueing
+                with metrics.llm_in_flight.track(translator=name):
+                    try:
+                        response = hedged_call(
+                            lambda: self.transport.post(url, headers=headers, data=body),
+                            breaker,
+                            allow_hedge=lambda: rate_limiter.acquire(self.rate_limit_key, estimated_tokens, max_wait=0)
+                        )
+                    finally:
+                        metrics.llm_request_duration.observe(time.monotonic() - started, translator=name)
+                latency = time.monotonic() - started
+                rate_limiter.update_from_headers(self.rate_limit_key, response.headers)
+                
+                # Server errors count against the breaker; raise_for_status below handles the retry
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success(latency)
                 
                 # Handle rate limit errors (429)
                 if response.status_code == 429:
+                    metrics.llm_throttled.inc(translator=name)
                     if attempt < max_retries - 1:
-                        # Extract retry-after header if available, otherwise use exponential backoff
-                        retry_after = int(response.headers.get('Retry-After', retry_delay))
-                        print(f"Rate limited (429). Retrying in {retry_after} seconds...")
-                        time.sleep(retry_after)
-                        retry_delay = min(retry_delay * 2, 60)  # Double delay up to max of 60 seconds
+                        metrics.llm_retries.inc(translator=name, reason='429')
+                        # Block this deployment for Retry-After; the next acquire() queues until then
+                        retry_after = parse_retry_after(response.headers)
+                        rate_limiter.penalize(self.rate_limit_key, retry_after)
+                        print(f"Rate limited (429). Queued for {retry_after:.1f} seconds...")
                         continue
                     else:
                         print(f"Max retries reached for rate limiting")
-                        return f"Error: Rate limit exceeded after {max_retries} attempts"
+                        metrics.llm_requests.inc(translator=name, outcome='rate_limited')
+                        return "", False
                 
                 # Raise for other HTTP errors
                 response.raise_for_status()
@@ -93,26 +270,54 @@ class AzureTranslator:
                 if "choices" in result and len(result["choices"]) > 0:
                     if "message" in result["choices"][0] and "content" in result["choices"][0]["message"]:
                         raw_response = result["choices"][0]["message"]["content"].strip()
-                        # Fix punctuation spacing before returning
-                        return self.fix_punctuation_spacing(raw_response)
+                        # Kept as received; call_azure_openai_api fixes punctuation spacing, so
+                        # JSON responses can be parsed before any text is rewritten
+                        if raw_response:
+                            response_cache.set(cache_key, raw_response)
+                        metrics.llm_requests.inc(translator=name, outcome='ok')
+                        self._count_tokens(name, result, prompt_text, raw_response)
+                        return raw_response, True
                 
                 # If we couldn't extract the response properly, log and return empty string
                 print(f"Unexpected response format from Azure OpenAI Chat API: {result}")
-                return ""
+                metrics.llm_requests.inc(translator=name, outcome='bad_response')
+                return "", False
             
             except requests.exceptions.RequestException as e:
+                # Connection errors and timeouts never produced a response to judge above
+                if getattr(e, 'response', None) is None:
+                    breaker.record_failure()
                 if attempt < max_retries - 1:
+                    metrics.llm_retries.inc(translator=name, reason='error')
                     print(f"Request error: {str(e)}. Retrying in {retry_delay} seconds...")
                     time.sleep(retry_delay)
                     retry_delay = min(retry_delay * 2, 60)  # Double delay up to max of 60 seconds
                 else:
                     print(f"Error calling Azure OpenAI API after {max_retries} attempts: {str(e)}")
-                    return f"Error: {str(e)}"
+                    metrics.llm_requests.inc(translator=name, outcome='error')
+                    return "", False
+    
+    def _count_tokens(self, name, result, prompt_text, response_text):
+        """
+        Add a completion's token usage to the metrics.
+        
+        Args:
+            name (str): Translator label
+            result (dict): Parsed API response; its 'usage' block is used when present
+            prompt_text (str): Prompt sent, for the estimate when usage is missing
+            response_text (str): Completion received, for the same estimate
+        """
+        usage = result.get("usage") or {}
+        # Roughly four characters per token when the API does not report usage
+        prompt_tokens = usage.get("prompt_tokens", (len(SYSTEM_MESSAGE) + len(prompt_text)) // 4)
+        completion_tokens = usage.get("completion_tokens", len(response_text) // 4)
+        metrics.llm_tokens.inc(prompt_tokens, translator=name, kind='prompt')
+        metrics.llm_tokens.inc(completion_tokens, translator=name, kind='completion')
     
     def stream_response(self, prompt_text, max_tokens=150, temperature=0.3):
         """
         Stream the response from Azure OpenAI API using direct REST calls.
-        Includes retry logic with exponential backoff for rate limiting.
+        Calls are scheduled by the shared rate limiter like call_azure_openai_api.
         
         Args:
             prompt_text (str): The formatted prompt text to send to the API
@@ -120,7 +325,8 @@ class AzureTranslator:
             temperature (float, optional): Sampling temperature. Defaults to 0.3.
             
         Returns:
-            Generator: A generator yielding response chunks
+            Generator: A generator yielding response chunks; it ends without output
+                when the call fails, never with error text
         """
         url = f"{self.endpoint}openai/deployments/{self.deployment_name}/chat/completions?api-version={self.api_version}"
         
@@ -131,7 +337,7 @@ class AzureTranslator:
         
         payload = {
             "messages": [
-                {"role": "system", "content": "You are a specialized language transformation assistant."},
+                {"role": "system", "content": SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt_text}
             ],
             "temperature": temperature,
@@ -142,27 +348,46 @@ class AzureTranslator:
             "presence_penalty": 0
         }
         
-        # Implement retry logic with exponential backoff
+        # Retry transport errors with exponential backoff; 429s are handled by the rate limiter
         max_retries = 5
         retry_delay = 1  # Start with 1 second delay
+        estimated_tokens = estimate_tokens(prompt_text, max_tokens)
+        
+        breaker = self.breaker
         
         for attempt in range(max_retries):
+            # Fail fast while the deployment is unhealthy instead of piling onto it
+            if not breaker.allow():
+                print(f"Circuit breaker open for deployment: {self.deployment_name}, skipping streaming call")
+                return
+            
+            # Queue for quota instead of firing straight into a 429
+            if not rate_limiter.acquire(self.rate_limit_key, estimated_tokens):
+                print(f"Rate limiter queue wait exceeded for deployment: {self.deployment_name}")
+                return
+            
             try:
                 print(f"Streaming API call with deployment: {self.deployment_name} (attempt {attempt+1})")
-                response = requests.post(url, headers=headers, json=payload, stream=True)
+                started = time.monotonic()
+                response = self.transport.post(url, headers=headers, json=payload, stream=True)
+                rate_limiter.update_from_headers(self.rate_limit_key, response.headers)
+                
+                # Time to first byte is the latency that matters for a stream
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success(time.monotonic() - started)
                 
                 # Handle rate limit errors (429)
                 if response.status_code == 429:
                     if attempt < max_retries - 1:
-                        # Extract retry-after header if available, otherwise use exponential backoff
-                        retry_after = int(response.headers.get('Retry-After', retry_delay))
-                        print(f"Rate limited (429). Retrying in {retry_after} seconds...")
-                        time.sleep(retry_after)
-                        retry_delay = min(retry_delay * 2, 60)  # Double delay up to max of 60 seconds
+                        # Block this deployment for Retry-After; the next acquire() queues until then
+                        retry_after = parse_retry_after(response.headers)
+                        rate_limiter.penalize(self.rate_limit_key, retry_after)
+                        print(f"Rate limited (429). Queued for {retry_after:.1f} seconds...")
                         continue
                     else:
                         print(f"Max retries reached for rate limiting")
-                        yield f"Error: Rate limit exceeded after {max_retries} attempts"
                         return
                 
                 # Raise for other HTTP errors
@@ -198,13 +423,14 @@ class AzureTranslator:
                 return
             
             except requests.exceptions.RequestException as e:
+                if getattr(e, 'response', None) is None:
+                    breaker.record_failure()
                 if attempt < max_retries - 1:
                     print(f"Request error during streaming: {str(e)}. Retrying in {retry_delay} seconds...")
                     time.sleep(retry_delay)
                     retry_delay = min(retry_delay * 2, 60)  # Double delay up to max of 60 seconds
                 else:
                     print(f"Error streaming response after {max_retries} attempts: {str(e)}")
-                    yield f"Error: {str(e)}"
                     return
     
     def fix_punctuation_spacing(self, text):
@@ -251,6 +477,204 @@ class AzureTranslator:
 
         return fixed_text.strip()
 
+    def _detection_for(self, text, detection=None):
+        """
+        Get the friction detection record for a text, reusing the one handed in by the
+        caller. A record made for a slightly different text (e.g. before quote
+        normalization) is updated incrementally instead of rescanning.
+        
+        Args:
+            text (str): Text being translated
+            detection (FrictionDetection, optional): Record computed by the caller
+            
+        Returns:
+            FrictionDetection: Record for text
+        """
+        if detection is None:
+            return friction_patterns.detect(text)
+        return detection.updated(text)
+
+    def _plan_translation(self, text, detection=None):
+        """
+        Decide how a sentence would be sent to the LLM, without calling it.
+        Subclasses that support batching override this together with _finalize_translation.
+        
+        Args:
+            text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
+            
+        Returns:
+            dict or None: Plan with 'template', 'text' and 'max_tokens' keys, or None
+                when the text needs no LLM call
+        """
+        return None
+
+    def _finalize_translation(self, text, translated_text, plan):
+        """
+        Validate an LLM output for a planned sentence and return the final text.
+        
+        Args:
+            text (str): The original text
+            translated_text (str): The LLM output for plan['text']
+            plan (dict): The plan returned by _plan_translation
+            
+        Returns:
+            str: Final translated text
+        """
+        return translated_text or text
+
+    def translate_batch(self, texts, batch_size=None, max_workers=1, failed=None, detections=None):
+        """
+        Translate several texts, sending sentences that share a prompt template in one
+        completion that returns a JSON array. Sentences missing from a malformed or
+        partial response are retried on their own, so every text gets a result.
+        
+        Args:
+            texts (list): Texts to translate
+            batch_size (int, optional): Sentences per completion. Defaults to AZURE_OPENAI_BATCH_SIZE.
+            max_workers (int, optional): Completions sent concurrently. Defaults to 1.
+            failed (set, optional): Receives the indices of texts whose LLM calls failed
+            detections (list, optional): Friction detection record for each text
+            
+        Returns:
+            list: Translated texts, in input order
+        """
+        batch_size = batch_size or BATCH_SIZE
+        results = list(texts)
+        
+        # Group sentences by prompt template; only identical instructions can share a request
+        groups = {}
+        for index, text in enumerate(texts):
+            plan = self._plan_translation(text, detections[index] if detections else None)
+            if plan is not None:
+                groups.setdefault(plan['template'], []).append((index, plan))
+        
+        chunks = [
+            members[start:start + batch_size]
+            for members in groups.values()
+            for start in range(0, len(members), batch_size)
+        ]
+        if not chunks:
+            return results
+        
+        workers = max(1, min(max_workers, len(chunks)))
+        if workers == 1:
+            chunk_results = [self._translate_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+                chunk_results = list(executor.map(self._translate_chunk, chunks))
+        
+        for chunk, (outputs, chunk_failed) in zip(chunks, chunk_results):
+            if chunk_failed:
+                # Surface failures from worker threads on the caller's thread
+                _record_llm_failure()
+                if failed is not None:
+                    failed.update(index for index, _ in chunk)
+            for (index, plan), output in zip(chunk, outputs):
+                # Finalizing can make more calls on this thread (e.g. NotTranslator retries)
+                failures_before = llm_failure_count()
+                results[index] = self._finalize_translation(texts[index], output, plan)
+                if failed is not None and llm_failure_count() != failures_before:
+                    failed.add(index)
+        return results
+
+    def _translate_chunk(self, chunk):
+        """
+        Get raw LLM outputs for one chunk of planned sentences.
+        
+        Returns:
+            tuple: (list of outputs in chunk order, whether any LLM call failed)
+        """
+        failures_before = llm_failure_count()
+        plans = [plan for _, plan in chunk]
+        
+        outputs = [None] * len(plans)
+        if len(plans) > 1:
+            outputs = self._call_batch(plans)
+        
+        # Sentences the batch did not answer cleanly are sent on their own
+        for position, plan in enumerate(plans):
+            if outputs[position] is None:
+                outputs[position] = self.call_azure_openai_api(
+                    plan['template'].format(text=plan['text']), max_tokens=plan['max_tokens']
+                )
+        return outputs, llm_failure_count() != failures_before
+
+    def _call_batch(self, plans):
+        """
+        Send several planned sentences in one completion.
+        
+        Args:
+            plans (list): Plans sharing the same prompt template
+            
+        Returns:
+            list: Output per plan, or None where the response had no usable entry
+        """
+        if BATCH_STYLE == 'paragraph':
+            numbered = ' '.join(f"[{n}] {plan['text']}" for n, plan in enumerate(plans, 1))
+        else:
+            numbered = '\n'.join(f"[{n}] {plan['text']}" for n, plan in enumerate(plans, 1))
+        
+        prompt_text = plans[0]['template'].format(text=numbered)
+        prompt_text += BATCH_OUTPUT_INSTRUCTIONS.format(count=len(plans))
+        max_tokens = sum(plan['max_tokens'] + BATCH_TOKEN_OVERHEAD for plan in plans)
+        
+        # Parsed as it came back; punctuation is fixed per sentence, never on the JSON
+        response_text = self.call_azure_openai_api(prompt_text, max_tokens=max_tokens, raw=True)
+        outputs = [
+            self.fix_punctuation_spacing(output) if output is not None else None
+            for output in self._parse_batch_response(response_text, len(plans))
+        ]
+        
+        missing = sum(1 for output in outputs if output is None)
+        if missing:
+            print(f"Batch response unusable for {missing}/{len(plans)} sentence(s), retrying them singly")
+        return outputs
+
+    def _parse_batch_response(self, response_text, count):
+        """
+        Match a JSON-array batch response back to its sentences.
+        Accepts objects with "id"/"text" keys or a bare array of strings of the right length,
+        optionally wrapped in a code fence or surrounding prose.
+        
+        Args:
+            response_text (str): Raw completion text
+            count (int): Number of sentences in the batch
+            
+        Returns:
+            list: Text per sentence (1-based ids mapped to positions), None where missing
+        """
+        outputs = [None] * count
+        if not response_text:
+            return outputs
+        
+        start = response_text.find('[')
+        end = response_text.rfind(']')
+        if start == -1 or end <= start:
+            return outputs
+        
+        try:
+            items = json.loads(response_text[start:end + 1])
+        except ValueError:
+            return outputs
+        if not isinstance(items, list):
+            return outputs
+        
+        if len(items) == count and all(isinstance(item, str) for item in items):
+            return [item.strip() or None for item in items]
+        
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            text = item.get('text')
+            try:
+                position = int(item.get('id')) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= position < count and isinstance(text, str) and text.strip() and outputs[position] is None:
+                outputs[position] = text.strip()
+        return outputs
+
 
 # Example usage
 if __name__ == "__main__":
@@ -1,7 +1,60 @@
-import re
 import os
-import difflib
 from processor.translators.azure_translator import AzureTranslator
+from processor.diff_engine import diff_engine
+from processor.friction_patterns import friction_patterns
+
+# Specialized prompt for 'not just X, but Y' constructions
+NOT_JUST_BUT_PROMPT = """
+You are a specialized language transformation assistant focusing on the "not just X, but Y" and "not only X, but Y" constructions.
+
+CRITICAL INSTRUCTION: Your task is to transform sentences with "not just X, but Y" or "not only X, but Y" constructions into a form that preserves the exact meaning while removing the negative construction. Follow these specific rules carefully:
+
+TRANSFORMATION RULES:
+1. For "not only X but also Y" constructions:
+   - Replace with "X and Y" or "X and also Y"
+   - Example: "Not only did she finish the project ahead of schedule, but she also exceeded every expectation." → "She finished the project ahead of schedule, and she also exceeded every expectation."
+   - Example: "He is not only a brilliant strategist but also a compassionate leader." → "He is a brilliant strategist and also a compassionate leader."
+
+2. For "not just X, but Y" constructions:
+   - Replace with "both X and Y" or similar phrasing
+   - Example: "growth becomes not just possible---but sustainable" → "growth becomes both possible and sustainable"
+   - Example: "And growth becomes not just possible—but sustainable." → "And growth becomes both possible and sustainable."
+
+3. For phrases with em dashes or hyphens (---, —, --):
+   - PRESERVE THE EXACT PUNCTUATION, but replace "not just...but" with appropriate phrasing
+   - Example: "becomes not just possible---but sustainable" → "becomes both possible---and sustainable"
+   - Example: "becomes not just possible—but sustainable" → "becomes both possible—and sustainable"
+
+4. For constructions with "for" or similar prepositions:
+   - Preserve the prepositions and convert to a list format
+   - Example: "not just for your strategy, but for your culture" → "for your strategy and for your culture alike"
+   - Example: "not just for strategy, but for culture, leadership, and legacy" → "for strategy, for culture, for leadership, and for legacy"
+
+5. For lists with multiple items:
+   - Convert to a simple list format 
+   - Example: "She speaks not only French but also German, Italian, and Japanese." → "She speaks French, German, Italian, and Japanese."
+
+REQUIREMENTS:
+1. Maintain the exact meaning and intensity of the original sentence
+2. PRESERVE ALL punctuation marks like hyphens, em dashes, etc. exactly as they appear
+3. Keep ALL other words in the sentence exactly as they appear
+4. Do not rewrite or rephrase any other part of the sentence
+5. Return ONLY the transformed sentence without explanations
+
+EXAMPLES:
+- "Not only did she finish the project ahead of schedule, but she also exceeded every expectation." → "She finished the project ahead of schedule, and she also exceeded every expectation."
+- "He is not only a brilliant strategist but also a compassionate leader." → "He is a brilliant strategist and also a compassionate leader."
+- "The concert was not only well-organized but absolutely unforgettable." → "The concert was well-organized and absolutely unforgettable."
+- "growth becomes not just possible---but sustainable" → "growth becomes both possible and sustainable"
+- "Together, these conditions become the blueprint for sustainable growth---not just for your strategy, but for your culture, your leadership, and your legacy." → "Together, these conditions become the blueprint for sustainable growth---for your strategy, and for your culture, your leadership, and your legacy."
+- "When trust is broken, performance suffers. But when trust is strong, teams move faster. People contribute more. Customers come back. And growth becomes not just possible---but sustainable." → "When trust is broken, performance suffers. But when trust is strong, teams move faster. People contribute more. Customers come back. And growth becomes both possible and sustainable."
+
+INPUT:
+{text}
+
+TRANSFORMED SENTENCE:
+"""
+
 
 class ButTranslator(AzureTranslator):
     def __init__(self, api_key=None, endpoint=None):
@@ -14,11 +67,8 @@ class ButTranslator(AzureTranslator):
         """
         super().__init__(api_key, endpoint)
         
-        # Patterns to detect "but" and "yet" constructions
-        self.but_patterns = [
-            r'\bbut\b',
-            r'\byet\b'
-        ]
+        # Patterns to detect "but" and "yet" constructions (detection uses the shared engine)
+        self.but_patterns = friction_patterns.pattern_strings('but')
         
         # Comprehensive prompt based on the dataset, enhanced to include "yet"
         self.prompt_template = """
@@ -84,51 +134,26 @@ INPUT SENTENCE:
 TRANSFORMED SENTENCE:
 """
 
-    def is_not_just_but_construction(self, text):
+    def is_not_just_but_construction(self, text, detection=None):
         """
         Check if text contains 'not just/only...but' construction that needs special handling.
         Enhanced to detect various punctuation between the elements.
         
         Args:
             text (str): Text to check
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             bool: True if special construction found, False otherwise
         """
-        patterns = [
-            # Standard patterns
-            r'not\s+just\s+.+?\s+but\s+',
-            r'not\s+only\s+.+?\s+but\s+',
-            
-            # Patterns with em dashes or hyphens
-            r'not\s+just\s+.+?[-—]+\s*but\s+',
-            r'not\s+only\s+.+?[-—]+\s*but\s+',
-            r'becomes\s+not\s+just\s+.+?[-—]+\s*but\s+',
-            
-            # Multiple dash variations (---, —, --)
-            r'not\s+just\s+.+?---\s*but\s+',
-            r'not\s+just\s+.+?--\s*but\s+',
-            r'not\s+just\s+.+?—\s*but\s+',
-            
-            # Patterns with specific prepositions
-            r'not\s+just\s+for\s+.+?\s+but\s+for\s+',
-            r'not\s+only\s+for\s+.+?\s+but\s+for\s+',
-            
-            # Additional patterns that may appear in content
-            r'becomes\s+not\s+just\s+.+?\s+but\s+',
-            r'becomes\s+not\s+only\s+.+?\s+but\s+',
-            
-            # Match pattern that ends sentences
-            r'not\s+just\s+.+?\s+but\s+.+?\.$',
-            r'not\s+only\s+.+?\s+but\s+.+?\.$'
-        ]
-        
         normalized_text = text.replace("'", "'").lower()
+        detection = self._detection_for(text, detection)
         
-        for pattern in patterns:
-            if re.search(pattern, normalized_text, re.IGNORECASE):
-                print(f"✅ Special 'not just...but' construction detected using pattern: '{pattern}'")
-                return True
+        # Standard, dashed, prepositional and sentence-final forms are all one compiled pattern
+        match = detection.first('not_just_but')
+        if match:
+            print(f"✅ Special 'not just...but' construction detected: '{match.text}'")
+            return True
                 
         # Additional check for the specific phrase structures
         if ("not just" in normalized_text or "not only" in normalized_text) and "but" in normalized_text:
@@ -149,65 +174,17 @@ TRANSFORMED SENTENCE:
         Returns:
             str: Properly transformed text
         """
-        # Format a specialized prompt for this construction
-        prompt = """
-You are a specialized language transformation assistant focusing on the "not just X, but Y" and "not only X, but Y" constructions.
-
-CRITICAL INSTRUCTION: Your task is to transform sentences with "not just X, but Y" or "not only X, but Y" constructions into a form that preserves the exact meaning while removing the negative construction. Follow these specific rules carefully:
-
-TRANSFORMATION RULES:
-1. For "not only X but also Y" constructions:
-   - Replace with "X and Y" or "X and also Y"
-   - Example: "Not only did she finish the project ahead of schedule, but she also exceeded every expectation." → "She finished the project ahead of schedule, and she also exceeded every expectation."
-   - Example: "He is not only a brilliant strategist but also a compassionate leader." → "He is a brilliant strategist and also a compassionate leader."
-
-2. For "not just X, but Y" constructions:
-   - Replace with "both X and Y" or similar phrasing
-   - Example: "growth becomes not just possible---but sustainable" → "growth becomes both possible and sustainable"
-   - Example: "And growth becomes not just possible—but sustainable." → "And growth becomes both possible and sustainable."
-
-3. For phrases with em dashes or hyphens (---, —, --):
-   - PRESERVE THE EXACT PUNCTUATION, but replace "not just...but" with appropriate phrasing
-   - Example: "becomes not just possible---but sustainable" → "becomes both possible---and sustainable"
-   - Example: "becomes not just possible—but sustainable" → "becomes both possible—and sustainable"
-
-4. For constructions with "for" or similar prepositions:
-   - Preserve the prepositions and convert to a list format
-   - Example: "not just for your strategy, but for your culture" → "for your strategy and for your culture alike"
-   - Example: "not just for strategy, but for culture, leadership, and legacy" → "for strategy, for culture, for leadership, and for legacy"
-
-5. For lists with multiple items:
-   - Convert to a simple list format 
-   - Example: "She speaks not only French but also German, Italian, and Japanese." → "She speaks French, German, Italian, and Japanese."
-
-REQUIREMENTS:
-1. Maintain the exact meaning and intensity of the original sentence
-2. PRESERVE ALL punctuation marks like hyphens, em dashes, etc. exactly as they appear
-3. Keep ALL other words in the sentence exactly as they appear
-4. Do not rewrite or rephrase any other part of the sentence
-5. Return ONLY the transformed sentence without explanations
-
-EXAMPLES:
-- "Not only did she finish the project ahead of schedule, but she also exceeded every expectation." → "She finished the project ahead of schedule, and she also exceeded every expectation."
-- "He is not only a brilliant strategist but also a compassionate leader." → "He is a brilliant strategist and also a compassionate leader."
-- "The concert was not only well-organized but absolutely unforgettable." → "The concert was well-organized and absolutely unforgettable."
-- "growth becomes not just possible---but sustainable" → "growth becomes both possible and sustainable"
-- "Together, these conditions become the blueprint for sustainable growth---not just for your strategy, but for your culture, your leadership, and your legacy." → "Together, these conditions become the blueprint for sustainable growth---for your strategy, and for your culture, your leadership, and your legacy."
-- "When trust is broken, performance suffers. But when trust is strong, teams move faster. People contribute more. Customers come back. And growth becomes not just possible---but sustainable." → "When trust is broken, performance suffers. But when trust is strong, teams move faster. People contribute more. Customers come back. And growth becomes both possible and sustainable."
-
-INPUT:
-{text}
-
-TRANSFORMED SENTENCE:
-"""
-        
         # Call the API with the specialized prompt
-        formatted_prompt = prompt.format(text=text)
+        formatted_prompt = NOT_JUST_BUT_PROMPT.format(text=text)
         
         # Increase max tokens for these special constructions to ensure complete response
         max_tokens = 200
         transformed_text = self.call_azure_openai_api(formatted_prompt, max_tokens=max_tokens)
         
+        return self._finalize_not_just_but(text, transformed_text)
+
+    def _finalize_not_just_but(self, text, transformed_text):
+        """Return the special-construction rewrite, or the original text if the API call failed."""
         # Return original text if API call failed
         if not transformed_text:
             print(f"❌ Special handling API call failed, returning original text")
@@ -225,68 +202,95 @@ TRANSFORMED SENTENCE:
         """
         self.prompt_template = prompt
         
-    def contains_but_or_yet(self, text):
+    def contains_but_or_yet(self, text, detection=None):
         """
         Check if the text contains 'but' or 'yet'.
         
         Args:
             text (str): Text to check
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             bool: True if text contains 'but' or 'yet', False otherwise
         """
-        # Text should already be normalized at the TextProcessor level,
-        # but we'll normalize here as well for extra safety
-        normalized_text = text.replace("'", "'").lower()
-        
-        # Check for 'but' or 'yet' patterns
-        for pattern in self.but_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                matched_word = match.group(0)
-                print(f"✅ 'but/yet' pattern matched: '{pattern}' found '{matched_word}' in text")
-                return True
+        # Matching is case-insensitive and quote-agnostic, so the text is used as given
+        match = self._detection_for(text, detection).first('but')
+        if match:
+            print(f"✅ 'but/yet' pattern matched: found '{match.text}' in text")
+            return True
                 
         return False
 
-    def _tokenize_text(self, text):
-        """Split text into tokens for comparison."""
-        return re.findall(r'\b[\w\'-]+\b|\S', text)
 
-    def translate(self, text):
+    def translate(self, text, detection=None):
         """
         Translate 'but' and 'yet' friction language in the given text using Azure OpenAI.
         Enhanced with special handling for 'not just X, but Y' constructions.
         
         Args:
             text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             str: Translated text
         """
-        if not text:
+        plan = self._plan_translation(text, detection)
+        if plan is None:
             return text
+        
+        translated_text = self.call_azure_openai_api(
+            plan['template'].format(text=plan['text']), max_tokens=plan['max_tokens']
+        )
+        return self._finalize_translation(text, translated_text, plan)
+
+    def _plan_translation(self, text, detection=None):
+        """
+        Pick the prompt for a sentence, or None if it has no 'but'/'yet' friction.
+        
+        Args:
+            text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
+            
+        Returns:
+            dict or None: Plan with 'template', 'text', 'max_tokens', 'special' and 'detection' keys
+        """
+        if not text:
+            return None
+        detection = self._detection_for(text, detection)
             
         # Check for special 'not just...but' construction first
         print(f"BUT Translator checking: '{text}'")
         
         # Prioritize detection of the special case
-        if self.is_not_just_but_construction(text):
+        if self.is_not_just_but_construction(text, detection):
             print(f"BUT Translator: Special 'not just...but' construction found, using specialized handler")
-            return self.handle_not_just_but_construction(text)
+            # Increase max tokens for these special constructions to ensure complete response
+            return {'template': NOT_JUST_BUT_PROMPT, 'text': text, 'max_tokens': 200, 'special': True,
+                    'detection': detection}
         
         # Continue with normal processing for other 'but' cases
-        if not self.contains_but_or_yet(text):
+        if not self.contains_but_or_yet(text, detection):
             print(f"BUT Translator: No 'but' or 'yet' found, returning original text")
-            return text
+            return None
             
         print(f"BUT Translator: 'but' or 'yet' found, proceeding with translation")
-            
-        # Format the prompt
-        formatted_prompt = self.prompt_template.format(text=text)
+        return {'template': self.prompt_template, 'text': text, 'max_tokens': 150, 'special': False,
+                'detection': detection}
+
+    def _finalize_translation(self, text, translated_text, plan):
+        """
+        Apply the conservative change limit to an LLM output.
         
-        # Call the Azure OpenAI API using the parent class method
-        translated_text = self.call_azure_openai_api(formatted_prompt)
+        Args:
+            text (str): The original text
+            translated_text (str): The LLM output
+            plan (dict): The plan returned by _plan_translation
+            
+        Returns:
+            str: Translated text, or the original text if the output was rejected
+        """
+        if plan['special']:
+            return self._finalize_not_just_but(text, translated_text)
         
         # Return the original text if the API call failed or returned empty
         if not translated_text:
@@ -295,19 +299,13 @@ TRANSFORMED SENTENCE:
         
         # Add conservative check to limit changes
         if translated_text and translated_text != text:
-            # Compare word by word and only accept minimal changes
-            words_original = self._tokenize_text(text)
-            words_translated = self._tokenize_text(translated_text)
-            
-            # Use difflib to find exact changes
-            matcher = difflib.SequenceMatcher(None, words_original, words_translated)
-            
-            # Get the changes
-            operations = matcher.get_opcodes()
+            # Compare word by word and only accept minimal changes. The edit script is
+            # memoized, so the text processor reuses it when recording transformations.
+            edit_script = diff_engine.diff(text, translated_text)
             
             # Count how many words were changed
-            changed_words = sum(1 for tag, i1, i2, j1, j2 in operations if tag != 'equal')
-            total_words = len(words_original)
+            changed_words = edit_script.changed_blocks()
+            total_words = len(edit_script.original_spans)
             
             # Calculate percentage for logging
             change_percentage = (changed_words / total_words) * 100 if total_words > 0 else 0
@@ -325,4 +323,4 @@ TRANSFORMED SENTENCE:
         print(f"BUT Translator: Successfully translated to: '{translated_text}'")
             
         # Return the processed text
-        return translated_text
\ No newline at end of file
+        return translated_text
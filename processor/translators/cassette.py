@@ -0,0 +1,304 @@
+"""
+Record/replay cassettes for Azure OpenAI traffic.
+
+In record mode every completion the translators get from the API is appended
+to a cassette file together with its prompt, parameters and how long the call
+took. In replay mode the translators answer from the cassette instead of the
+network: requests are matched exactly by the same content hash the response
+cache uses, with an optional fuzzy fallback to the most similar recorded prompt
+of the same template. Replays can sleep for the recorded duration (or a
+multiple of it), so benchmarks see production-like latency and response
+lengths on an offline box. Only call_azure_openai_api() traffic, which is what
+the translators use, goes through the cassette; stream_response() always calls
+the API.
+
+A cassette is a JSON Lines file (gzip-compressed when the name ends in .gz):
+a header line followed by one entry per recorded call. benchmarks/cassette_tool.py
+samples, anonymizes and merges them.
+
+Settings (environment variables):
+    AZURE_OPENAI_CASSETTE_MODE     off (default), record, replay, or hybrid
+                                   (replay, and record live calls for misses)
+    AZURE_OPENAI_CASSETTE          Cassette path; "{pid}" is replaced by the process id,
+                                   so each worker can record its own file
+    AZURE_OPENAI_CASSETTE_FUZZY    Minimum similarity (0-1) for a fuzzy match; 0 disables
+    AZURE_OPENAI_CASSETTE_LATENCY  off (default), recorded, or a factor applied to
+                                   the recorded durations
+"""
+
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+CASSETTE_MODE = os.environ.get('AZURE_OPENAI_CASSETTE_MODE', 'off').lower()
+CASSETTE_PATH = os.environ.get('AZURE_OPENAI_CASSETTE', 'llm_cassette.jsonl.gz')
+CASSETTE_FUZZY = float(os.environ.get('AZURE_OPENAI_CASSETTE_FUZZY', 0))
+CASSETTE_LATENCY = os.environ.get('AZURE_OPENAI_CASSETTE_LATENCY', 'off').lower()
+
+MODES = ('off', 'record', 'replay', 'hybrid')
+
+FORMAT_NAME = 'llm-cassette'
+FORMAT_VERSION = 1
+
+# Leading characters of a prompt that identify its template; fuzzy matches are
+# only looked for among recordings of the same template
+TEMPLATE_PREFIX = 200
+
+
+def request_key(deployment, api_version, system_message, prompt_text, temperature, max_tokens):
+    """
+    Content hash identifying a completion request; also the response cache key.
+
+    Args:
+        deployment (str): Deployment name
+        api_version (str): API version
+        system_message (str): System message sent with the prompt
+        prompt_text (str): User prompt
+        temperature (float): Sampling temperature
+        max_tokens (int): Completion token limit
+
+    Returns:
+        str: Hex SHA-256 of everything that influences the completion
+    """
+    material = json.dumps(
+        [deployment, api_version, system_message, prompt_text, temperature, max_tokens],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def entry_key(entry):
+    """Recompute the request key of a cassette entry (e.g. after its prompt was edited)."""
+    return request_key(entry['deployment'], entry['api_version'], entry['system'],
+                       entry['prompt'], entry['temperature'], entry['max_tokens'])
+
+
+def read_entries(path):
+    """
+    Read the entries of a cassette file. A file cut short by a crash while
+    recording yields every complete entry before the cut.
+
+    Args:
+        path (str): Cassette path
+
+    Returns:
+        list: Entry dicts in recording order
+    """
+    entries = []
+    opener = gzip.open if path.endswith('.gz') else open
+    try:
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable cassette line in {path}")
+                    continue
+                if 'key' in record:
+                    entries.append(record)
+    except (EOFError, gzip.BadGzipFile):
+        print(f"Cassette {path} ends in an incomplete record; using the {len(entries)} complete entries")
+    return entries
+
+
+def write_entries(path, entries, **header):
+    """
+    Write a cassette file from scratch.
+
+    Args:
+        path (str): Cassette path; compressed when it ends in .gz
+        entries (iterable): Entry dicts
+        **header: Extra fields for the header line (e.g. where the entries came from)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(_header(**header)) + '\n')
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def _header(**fields):
+    header = {'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'created': time.time()}
+    header.update(fields)
+    return header
+
+
+class Cassette:
+    """One cassette file, open for replay, recording or both."""
+
+    def __init__(self, path, mode='replay', fuzzy=0.0, latency='off'):
+        """
+        Open a cassette.
+
+        Args:
+            path (str): Cassette file; it is created when recording and it does not exist
+            mode (str): 'record', 'replay' or 'hybrid'
+            fuzzy (float): Minimum similarity for a fuzzy match; 0 allows exact matches only
+            latency (str or float): 'off', 'recorded', or a factor for the recorded durations
+        """
+        if mode not in MODES or mode == 'off':
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.fuzzy = fuzzy
+        self.latency_factor = _latency_factor(latency)
+
+        self._lock = threading.Lock()
+        self._entries = {}        # key -> entry
+        self._templates = {}      # (deployment, temperature, template prefix) -> keys
+        self._file = None
+        self.counters = {'hits': 0, 'fuzzy_hits': 0, 'misses': 0, 'recorded': 0}
+
+        if self.replaying and os.path.exists(path):
+            for entry in read_entries(path):
+                self._add(entry)
+            print(f"Loaded {len(self._entries)} cassette entries from {path}")
+
+    @property
+    def replaying(self):
+        return self.mode in ('replay', 'hybrid')
+
+    @property
+    def recording(self):
+        return self.mode in ('record', 'hybrid')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def replay(self, key, request):
+        """
+        Answer a request from the cassette, sleeping for its recorded duration if
+        latency emulation is on.
+
+        Args:
+            key (str): request_key() of the request
+            request (dict): deployment, api_version, system, prompt, temperature and max_tokens
+
+        Returns:
+            str or None: The recorded response, or None if nothing matches
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.counters['hits'] += 1
+            elif self.fuzzy > 0:
+                entry = self._closest(request)
+                if entry is not None:
+                    self.counters['fuzzy_hits'] += 1
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+
+        if self.latency_factor:
+            time.sleep(entry.get('elapsed', 0) * self.latency_factor)
+        return entry['response']
+
+    def record(self, key, request, response, elapsed):
+        """
+        Append a completed call to the cassette.
+
+        Args:
+            key (str): request_key() of the request
+            request (dict): deployment, api_version, system, prompt, temperature and max_tokens
+            response (str): Response text the translator received
+            elapsed (float): Seconds the call took, including retries
+        """
+        entry = dict(request, key=key, response=response, elapsed=round(elapsed, 4),
+                     recorded_at=round(time.time(), 3))
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = self._open_for_append()
+            self._file.write(line)
+            # Flushed per entry so a worker that is killed keeps what it recorded
+            self._file.flush()
+            self.counters['recorded'] += 1
+            self._add(entry)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update({'mode': self.mode, 'path': self.path, 'entries': len(self._entries)})
+        return stats
+
+    def _add(self, entry):
+        self._entries[entry['key']] = entry
+        template = (entry['deployment'], entry['temperature'], entry['prompt'][:TEMPLATE_PREFIX])
+        self._templates.setdefault(template, []).append(entry['key'])
+
+    def _closest(self, request):
+        """The recorded entry of the same template whose prompt is most similar, above the threshold."""
+        prompt = request['prompt']
+        template = (request['deployment'], request['temperature'], prompt[:TEMPLATE_PREFIX])
+        matcher = difflib.SequenceMatcher(None, '', prompt, autojunk=False)
+        best, best_ratio = None, self.fuzzy
+        for key in self._templates.get(template, ()):
+            entry = self._entries[key]
+            matcher.set_seq1(entry['prompt'])
+            # The cheap upper bounds rule most candidates out before the full comparison
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = entry, ratio
+        return best
+
+    def _open_for_append(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if self.path.endswith('.gz'):
+            f = gzip.open(self.path, 'at', encoding='utf-8')
+        else:
+            f = open(self.path, 'a', encoding='utf-8')
+        if is_new:
+            f.write(json.dumps(_header(pid=os.getpid())) + '\n')
+        return f
+
+
+def _latency_factor(latency):
+    if latency in (None, '', 'off', 'none', '0'):
+        return 0.0
+    if latency == 'recorded':
+        return 1.0
+    return float(latency)
+
+
+# Cassette configured through the environment, opened on first use
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """
+    Get the process's cassette.
+
+    Returns:
+        Cassette or None: The cassette set up by AZURE_OPENAI_CASSETTE_MODE, or None when it is off
+    """
+    global _cassette
+    if CASSETTE_MODE == 'off':
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(CASSETTE_PATH.replace('{pid}', str(os.getpid())), mode=CASSETTE_MODE,
+                                     fuzzy=CASSETTE_FUZZY, latency=CASSETTE_LATENCY)
+    return _cassette
@@ -0,0 +1,273 @@
+"""
+Circuit breakers and hedged requests for Azure OpenAI deployments.
+
+A breaker watches the outcome and latency of recent calls to one endpoint and
+deployment. When too many fail or run slow it opens, and calls fail fast (the
+translators then keep the original text) until a probe call succeeds again.
+The same latency history drives hedging: a request still running after the
+observed p95 gets a duplicate, and whichever answers first wins.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Breaker thresholds (override through environment variables)
+FAILURE_THRESHOLD = int(os.environ.get('AZURE_OPENAI_BREAKER_FAILURES', 5))
+ERROR_RATE_THRESHOLD = float(os.environ.get('AZURE_OPENAI_BREAKER_ERROR_RATE', 0.5))
+SLOW_CALL_SECONDS = float(os.environ.get('AZURE_OPENAI_BREAKER_SLOW_SECONDS', 20))
+WINDOW_SIZE = int(os.environ.get('AZURE_OPENAI_BREAKER_WINDOW', 20))
+MIN_CALLS = int(os.environ.get('AZURE_OPENAI_BREAKER_MIN_CALLS', 10))
+OPEN_SECONDS = float(os.environ.get('AZURE_OPENAI_BREAKER_OPEN_SECONDS', 30))
+
+# Hedging is opt-in because a hedge spends a second request's worth of quota
+HEDGE_ENABLED = os.environ.get('AZURE_OPENAI_HEDGE', '').lower() in ('1', 'true', 'yes')
+HEDGE_MIN_SAMPLES = int(os.environ.get('AZURE_OPENAI_HEDGE_MIN_SAMPLES', 20))
+HEDGE_MIN_DELAY = float(os.environ.get('AZURE_OPENAI_HEDGE_MIN_DELAY', 0.5))
+HEDGE_WORKERS = int(os.environ.get('AZURE_OPENAI_HEDGE_WORKERS', 16))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Tracks recent call outcomes for one deployment and decides whether calls may proceed."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, error_rate=ERROR_RATE_THRESHOLD,
+                 slow_call_seconds=SLOW_CALL_SECONDS, window_size=WINDOW_SIZE,
+                 min_calls=MIN_CALLS, open_seconds=OPEN_SECONDS, name=None):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker.
+            error_rate (float): Share of failed or slow calls in the window that opens the breaker.
+            slow_call_seconds (float): Calls taking longer than this count against the breaker.
+            window_size (int): Number of recent calls considered for the error rate.
+            min_calls (int): Calls needed in the window before the error rate is applied.
+            open_seconds (float): How long the breaker stays open before a probe is allowed.
+            name (str, optional): Deployment name reported by stats() (never the endpoint URL)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._outcomes = deque(maxlen=window_size)  # True for a bad (failed or slow) call
+        self._latencies = deque(maxlen=200)
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+        # Counters reported by stats()
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """
+        Check whether a call may be sent now.
+
+        Returns:
+            bool: True if the call may proceed, False if it should fail fast
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == HALF_OPEN:
+                # Let exactly one probe through to test the deployment. A probe that never
+                # reported back (e.g. it gave up waiting for quota) is replaced after a while.
+                now = time.monotonic()
+                if self._probe_in_flight and now - self._probe_started < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+                self._probe_started = now
+            return True
+
+    def record_success(self, latency):
+        """
+        Record a completed call.
+
+        Args:
+            latency (float): Seconds the call took
+        """
+        slow = latency > self.slow_call_seconds
+        with self._lock:
+            self._latencies.append(latency)
+            if self.state == HALF_OPEN:
+                if slow:
+                    self._trip()
+                else:
+                    self._close()
+                return
+            self.consecutive_failures = 0
+            self._outcomes.append(slow)
+            self._evaluate()
+
+    def record_failure(self):
+        """Record a call that failed with a transport or server error."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trip()
+                return
+            self.consecutive_failures += 1
+            self._outcomes.append(True)
+            self._evaluate()
+
+    def latency_percentile(self, fraction):
+        """
+        Get a percentile of recent successful call latencies.
+
+        Args:
+            fraction (float): Percentile as a fraction, e.g. 0.95
+
+        Returns:
+            float or None: Latency in seconds, or None without enough samples
+        """
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self):
+        """
+        Get breaker state and counters.
+
+        Returns:
+            dict: Deployment name, state, consecutive failures, bad-call rate in the window, opens and rejections
+        """
+        with self._lock:
+            bad = sum(self._outcomes)
+            return {
+                'deployment': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'bad_call_rate': (bad / len(self._outcomes)) if self._outcomes else 0.0,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
+    def _evaluate(self):
+        """Open the breaker if the thresholds are exceeded. Lock must be held."""
+        if self.consecutive_failures >= self.failure_threshold:
+            self._trip()
+            return
+        if len(self._outcomes) >= self.min_calls:
+            if sum(self._outcomes) / len(self._outcomes) >= self.error_rate:
+                self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._probe_in_flight = False
+        print(f"Circuit breaker opened for {self.open_seconds:.0f} seconds")
+
+    def _close(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._outcomes.clear()
+        self._probe_in_flight = False
+        print("Circuit breaker closed")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key, name=None):
+    """
+    Get the breaker for an endpoint and deployment, creating it on first use.
+
+    Args:
+        key (str): Deployment identifier (endpoint and deployment name)
+        name (str, optional): Deployment name to report in stats, without the endpoint
+
+    Returns:
+        CircuitBreaker: The shared breaker for that deployment
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(name=name)
+        return breaker
+
+
+def breaker_stats():
+    """Get stats for every breaker, keyed by deployment."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {key: breaker.stats() for key, breaker in breakers.items()}
+
+
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+        return _hedge_executor
+
+
+def _reset_hedge_executor():
+    """Drop the executor in forked children; its threads do not survive fork."""
+    global _hedge_executor
+    _hedge_executor = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_hedge_executor)
+
+
+def hedged_call(fn, breaker, allow_hedge=None):
+    """
+    Run fn(), firing a duplicate call if the first one outlives the observed p95 latency.
+    The first call to succeed wins; if both fail, the primary's error is raised.
+
+    Args:
+        fn (callable): Zero-argument function sending the request
+        breaker (CircuitBreaker): Supplies the latency history for the deployment
+        allow_hedge (callable, optional): Checked before hedging (e.g. for spare quota)
+
+    Returns:
+        The result of whichever call finished first
+    """
+    delay = breaker.latency_percentile(0.95) if HEDGE_ENABLED else None
+    if delay is None:
+        return fn()
+
+    executor = _get_hedge_executor()
+    primary = executor.submit(fn)
+    done, _ = wait([primary], timeout=max(delay, HEDGE_MIN_DELAY))
+    if done or (allow_hedge is not None and not allow_hedge()):
+        return primary.result()
+
+    print(f"Request exceeded p95 latency ({delay:.2f}s), sending hedged request")
+    pending = {primary, executor.submit(fn)}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # The slower call finishes in the background and its result is discarded
+                return future.result()
+            if future is primary or first_error is None:
+                first_error = future.exception()
+    raise first_error
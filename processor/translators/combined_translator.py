@@ -0,0 +1,180 @@
+import json
+from processor.translators.azure_translator import AzureTranslator, llm_failure_count
+
+COMBINED_PROMPT_HEADER = """
+You are a specialized language transformation assistant. The sentence below contains several kinds of friction language.
+Apply each of the following steps in order, each step to the result of the previous one.
+Each step keeps its own rules; only its output format is replaced by the OUTPUT FORMAT at the end.
+"""
+
+COMBINED_PROMPT_FOOTER = """
+INPUT SENTENCE:
+{text}
+
+OUTPUT FORMAT:
+Respond with ONLY a JSON object and nothing else, with one entry per step in step order:
+{{"steps": [{{"category": "<step category>", "text": "<sentence after this step>"}}]}}
+If a step needs no change, repeat the text from the previous step.
+"""
+
+# Extra completion tokens for the JSON wrapping around each step
+STEP_TOKEN_OVERHEAD = 30
+
+
+class CombinedTranslator(AzureTranslator):
+    """
+    Applies the BUT, SHOULD and NOT rules to a sentence in a single LLM call.
+
+    The prompt is assembled from the prompts the individual translators would use,
+    limited to the categories detected in the sentence, and the response reports the
+    sentence after each step so changes can be recorded exactly as with the chained
+    translators.
+    """
+
+    def __init__(self, but_translator, should_translator, not_translator, api_key=None, endpoint=None):
+        """
+        Initialize the CombinedTranslator.
+
+        Args:
+            but_translator (ButTranslator): Supplies the BUT rules and output validation
+            should_translator (ShouldTranslator): Supplies the SHOULD rules and output validation
+            not_translator (NotTranslator): Supplies the NOT rules and output validation
+            api_key (str, optional): API key for Azure OpenAI. Defaults to environment variable.
+            endpoint (str, optional): Azure OpenAI endpoint. Defaults to environment variable.
+        """
+        super().__init__(api_key, endpoint)
+        self.translators = {
+            'but': but_translator,
+            'should': should_translator,
+            'not': not_translator
+        }
+
+    def translate(self, text, categories=('but', 'should', 'not'), detection=None):
+        """
+        Translate all friction categories in one call.
+
+        Args:
+            text (str): Text to translate
+            categories (tuple, optional): Categories to apply, in order
+            detection (FrictionDetection, optional): Friction matches already found in text
+
+        Returns:
+            str or None: Translated text, or None if the response could not be used
+        """
+        steps = self.translate_steps(text, categories, detection)
+        if steps is None:
+            return None
+        return steps[-1][1] if steps else text
+
+    def translate_steps(self, text, categories, detection=None):
+        """
+        Translate the given friction categories in one call and report each intermediate result.
+
+        Args:
+            text (str): Sentence to translate
+            categories (list): Detected categories ('but', 'should', 'not'), in the order to apply them
+            detection (FrictionDetection, optional): Friction matches already found in text
+
+        Returns:
+            list or None: (category, text_after_step) per applied category. Empty when no
+                category needs the LLM or the call failed (the sentence stays unchanged).
+                None when the response was malformed and the caller should fall back to
+                the chained translators.
+        """
+        detection = self._detection_for(text, detection)
+        plans = []
+        for category in categories:
+            plan = self.translators[category]._plan_translation(text, detection)
+            if plan is None:
+                continue
+            if plan.get('quoted'):
+                # Numbered quoted examples only rewrite part of the text; use the chain
+                return None
+            plans.append((category, plan))
+
+        if not plans:
+            return []
+
+        print(f"COMBINED Translator: Applying {[category for category, _ in plans]} in one call")
+        failures_before = llm_failure_count()
+        max_tokens = sum(plan['max_tokens'] + STEP_TOKEN_OVERHEAD for _, plan in plans)
+        # Parsed as it came back; punctuation is fixed per step, never on the JSON
+        response_text = self.call_azure_openai_api(self._build_prompt(text, plans), max_tokens=max_tokens, raw=True)
+
+        if llm_failure_count() != failures_before or not response_text:
+            print(f"COMBINED Translator: API call failed, returning original text")
+            return []
+
+        outputs = self._parse_steps(response_text, [category for category, _ in plans])
+        if outputs is None:
+            print(f"COMBINED Translator: Malformed response, falling back to chained translators")
+            return None
+        outputs = [self.fix_punctuation_spacing(output) for output in outputs]
+
+        # Validate every step with the rules of the translator that owns it
+        steps = []
+        current = text
+        for (category, plan), output in zip(plans, outputs):
+            step_plan = dict(plan, text=current)
+            current = self.translators[category]._finalize_translation(current, output, step_plan)
+            steps.append((category, current))
+        return steps
+
+    def _build_prompt(self, text, plans):
+        """Assemble one prompt from the instruction part of each step's template."""
+        sections = [COMBINED_PROMPT_HEADER]
+        for number, (category, plan) in enumerate(plans, 1):
+            sections.append(f"\n=== STEP {number}: {category.upper()} ===\n{self._instructions(plan['template'])}\n")
+        sections.append(COMBINED_PROMPT_FOOTER.format(text=text))
+        return ''.join(sections)
+
+    def _instructions(self, template):
+        """
+        Strip the input placeholder and its heading (e.g. "INPUT SENTENCE:") from a prompt
+        template, leaving only the rules.
+        """
+        rules = template.split('{text}')[0].replace('{{', '{').replace('}}', '}')
+        lines = rules.rstrip().split('\n')
+        if lines and lines[-1].strip().endswith(':'):
+            lines.pop()
+        return '\n'.join(lines).strip()
+
+    def _parse_steps(self, response_text, categories):
+        """
+        Match the JSON steps in a response to the requested categories.
+
+        Args:
+            response_text (str): Raw completion text
+            categories (list): Categories in step order
+
+        Returns:
+            list or None: Text after each step, or None if any step is missing
+        """
+        start = response_text.find('{')
+        end = response_text.rfind('}')
+        if start == -1 or end <= start:
+            return None
+
+        try:
+            data = json.loads(response_text[start:end + 1])
+        except ValueError:
+            return None
+
+        steps = data.get('steps') if isinstance(data, dict) else None
+        if not isinstance(steps, list):
+            return None
+
+        by_category = {}
+        for step in steps:
+            if isinstance(step, dict) and isinstance(step.get('text'), str) and step['text'].strip():
+                by_category.setdefault(str(step.get('category', '')).lower(), step['text'].strip())
+
+        if all(category in by_category for category in categories):
+            return [by_category[category] for category in categories]
+
+        # Fall back to position when the model dropped or renamed the categories
+        if len(steps) == len(categories) and all(
+            isinstance(step, dict) and isinstance(step.get('text'), str) and step['text'].strip() for step in steps
+        ):
+            return [step['text'].strip() for step in steps]
+        return None
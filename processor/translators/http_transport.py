@@ -0,0 +1,156 @@
+"""
+Process-wide pooled HTTP transport for Azure OpenAI calls.
+
+Every translator instance shares one keep-alive connection pool, so the
+TCP and TLS handshakes are paid once per connection instead of once per
+LLM call.
+"""
+
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Pool and timeout settings (override through environment variables)
+POOL_CONNECTIONS = int(os.environ.get('AZURE_OPENAI_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.environ.get('AZURE_OPENAI_POOL_MAXSIZE', 32))
+CONNECT_TIMEOUT = float(os.environ.get('AZURE_OPENAI_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.environ.get('AZURE_OPENAI_READ_TIMEOUT', 60))
+HTTP2_ENABLED = os.environ.get('AZURE_OPENAI_HTTP2', '').lower() in ('1', 'true', 'yes')
+
+
+class HttpTransport:
+    """Keep-alive transport built on a pooled requests.Session."""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_connections (int): Number of per-host pools to keep.
+            pool_maxsize (int): Maximum open connections kept per endpoint.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait between bytes of the response.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        # Retries are handled by AzureTranslator, so the adapter must not retry on its own
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def post(self, url, headers=None, data=None, json=None, stream=False, timeout=None):
+        """
+        Send a POST request over the shared pool.
+
+        Returns:
+            requests.Response: The response object
+        """
+        return self.session.post(url, headers=headers, data=data, json=json, stream=stream,
+                                 timeout=timeout or self.timeout)
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+class Http2Transport:
+    """HTTP/2 transport built on httpx, exposing the same interface as HttpTransport."""
+
+    def __init__(self, pool_maxsize=POOL_MAXSIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        import httpx
+
+        self._httpx = httpx
+        self.timeout = (connect_timeout, read_timeout)
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    def post(self, url, headers=None, data=None, json=None, stream=False, timeout=None):
+        """
+        Send a POST request over the shared HTTP/2 connection.
+
+        Transport errors are re-raised as requests exceptions so callers only
+        need to handle one exception family.
+        """
+        connect_timeout, read_timeout = timeout or self.timeout
+        try:
+            request = self.client.build_request(
+                'POST', url, headers=headers, content=data, json=json,
+                timeout=self._httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+            return _Http2Response(self.client.send(request, stream=stream))
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except self._httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def close(self):
+        """Close the underlying client."""
+        self.client.close()
+
+
+class _Http2Response:
+    """Adapter giving an httpx response the parts of the requests.Response API we use."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def json(self):
+        return json.loads(self._response.read())
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            self._response.read()
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self._response.url}")
+
+    def iter_lines(self):
+        for line in self._response.iter_lines():
+            yield line.encode('utf-8')
+
+    def close(self):
+        self._response.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Get the process-wide transport, creating it on first use.
+
+    Returns:
+        HttpTransport or Http2Transport: The shared transport
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                if HTTP2_ENABLED:
+                    try:
+                        _transport = Http2Transport()
+                    except ImportError:
+                        print("HTTP/2 requested but httpx[http2] is not installed. Falling back to HTTP/1.1.")
+                if _transport is None:
+                    _transport = HttpTransport()
+    return _transport
+
+
+def reset_transport():
+    """Drop the shared transport so the next call builds a fresh pool."""
+    global _transport, _transport_lock
+    _transport = None
+    _transport_lock = threading.Lock()
+
+
+# Pooled sockets must never be shared between a parent and a forked worker
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_transport)
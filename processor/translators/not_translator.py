@@ -1,7 +1,7 @@
-import re
 import os
-import difflib
 from processor.translators.azure_translator import AzureTranslator
+from processor.diff_engine import diff_engine
+from processor.friction_patterns import friction_patterns, is_yes_no_response
 
 class NotTranslator(AzureTranslator):
     def __init__(self, prompt_manager=None, api_key=None, endpoint=None):
@@ -16,76 +16,14 @@ class NotTranslator(AzureTranslator):
         super().__init__(api_key, endpoint)
         self.prompt_manager = prompt_manager
         
-        # Define comprehensive patterns to detect all forms of negative constructions
-        self.not_patterns = [
-            # Basic negation words
-            r'\bnot\b', r'\bnever\b', r'\bwithout\b', 
-            r'\bno\b', r'\bnone\b', r'\bnobody\b', r'\bnothing\b', r'\bnowhere\b',
-            
-            # Complete list of negative contractions
-            r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b',
-            r'\bdoesn\'t\b', r'\bdon\'t\b', r'\bdidn\'t\b', 
-            r'\bhasn\'t\b', r'\bhaven\'t\b', r'\bhadn\'t\b',
-            r'\bcan\'t\b', r'\bcouldn\'t\b', r'\bwon\'t\b', r'\bwouldn\'t\b',
-            r'\bshan\'t\b', r'\bshouldn\'t\b', r'\bmustn\'t\b', 
-            r'\bmightn\'t\b', r'\bmayn\'t\b', r'\bain\'t\b',
-            
-            # Full forms of contractions
-            r'\bcannot\b', r'\bwill\s+not\b', r'\bshall\s+not\b', r'\bdo\s+not\b',
-            r'\bdoes\s+not\b', r'\bdid\s+not\b', r'\bis\s+not\b', r'\bare\s+not\b',
-            r'\bwas\s+not\b', r'\bwere\s+not\b', r'\bhas\s+not\b', r'\bhave\s+not\b', 
-            r'\bhad\s+not\b', r'\bcould\s+not\b', r'\bwould\s+not\b', r'\bshould\s+not\b',
-            r'\bmust\s+not\b', r'\bmight\s+not\b', r'\bmay\s+not\b',
-            
-            # Other negative words or phrases (expanded list)
-            r'\bunable\b', r'\bimpossible\b', r'\bdifficult\s+to\b', r'\black\s+of\b',
-            r'\bfailing\s+to\b', r'\bfailed\s+to\b', r'\bfails\s+to\b',
-            r'\bhardly\b', r'\brarely\b', r'\bscarcely\b', r'\bseldom\b'
-        ]
-        
-        # Define specific patterns for "cannot" constructions
-        self.cannot_patterns = [
-            r'\bcannot\s+believe\b',
-            r'\bcannot\s+attend\b', 
-            r'\bcannot\s+move\s+forward\b',
-            r'\bcannot\s+understand\b',
-            r'\bcannot\s+expect\b',
-            r'\bcannot\s+find\b',
-            r'\bcannot\s+be\s+implemented\b',
-            r'\bcannot\s+overstate\b',
-            r'\bcannot\s+start\b',
-            r'\bcannot\s+ignore\b'
-        ]
-        
-        # Define patterns to detect ability statements
-        self.ability_patterns = [
-            r'\bcan\'t\s+\w*\s*(find|locate|understand|finish|complete|do|make|get|achieve|accomplish|reach|solve|figure|know|see|hear|feel|remember|recall)\b',
-            r'\bcouldn\'t\s+\w*\s*(find|locate|understand|finish|complete|do|make|get|achieve|accomplish|reach|solve|figure|know|see|hear|feel|remember|recall)\b',
-            r'\b(unable|impossible|hard|difficult|tough|challenging)\s+to\s+\w*\s*(find|locate|understand|finish|complete|do|make|get|achieve|accomplish|reach|solve|figure)\b'
-        ]
-        
-        # Define patterns to detect state-of-being statements
-        self.state_patterns = [
-            r'\bis\s+not\b', r'\bisn\'t\b', r'\bare\s+not\b', r'\baren\'t\b',
-            r'\bwas\s+not\b', r'\bwasn\'t\b', r'\bwere\s+not\b', r'\bweren\'t\b',
-            r'\bam\s+not\b', r'\bi\'m\s+not\b', r'\bthey\'re\s+not\b', r'\bhe\'s\s+not\b', r'\bshe\'s\s+not\b'
-        ]
-        
-        # Define patterns for "not just/only...but" constructions
-        self.not_just_but_patterns = [
-            r'not\s+just\s+.+?\s+but\s+',
-            r'not\s+only\s+.+?\s+but\s+',
-            r'becomes\s+not\s+just\s+.+?\s+but\s+',
-            r'not\s+just\s+for\s+.+?\s+but\s+for\s+'
-        ]
-        
-        # Define patterns to check for negative constructions in translated text
-        self.output_check_patterns = [
-            r'\bnot\b', r'\bnever\b', r'\bwithout\b', r'\bno\b', r'\bnone\b', r'\bnobody\b', r'\bnothing\b', r'\bnowhere\b',
-            r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b', r'\bdoesn\'t\b', r'\bdon\'t\b', r'\bdidn\'t\b',
-            r'\bhasn\'t\b', r'\bhaven\'t\b', r'\bhadn\'t\b', r'\bcan\'t\b', r'\bcouldn\'t\b', r'\bwon\'t\b', r'\bwouldn\'t\b',
-            r'\bshouldn\'t\b', r'\bmustn\'t\b', r'\bunable\b', r'\bimpossible\b', r'\black\s+of\b'
-        ]
+        # Pattern lists for the negative constructions handled here. Detection goes
+        # through the shared friction-pattern engine; the lists are derived from it.
+        self.not_patterns = friction_patterns.pattern_strings('negation')
+        self.cannot_patterns = friction_patterns.pattern_strings('cannot')
+        self.ability_patterns = friction_patterns.pattern_strings('ability')
+        self.state_patterns = friction_patterns.pattern_strings('state')
+        self.not_just_but_patterns = friction_patterns.pattern_strings('not_just_but')
+        self.output_check_patterns = friction_patterns.pattern_strings('negative_output')
         
         # Comprehensive prompt based on the dataset with enhanced instructions to completely eliminate negations
         self.prompt_template = """
@@ -214,34 +152,39 @@ TRANSFORMED SENTENCE:
         """
         self.prompt_template = prompt
 
-    def is_not_just_but_construction(self, text):
+    def is_not_just_but_construction(self, text, detection=None):
         """
         Check if text contains 'not just/only...but' construction that should be skipped.
     
         Args:
             text (str): Text to check
+            detection (FrictionDetection, optional): Friction matches already found in text
         
         Returns:
             bool: True if special construction found, False otherwise
         """
-        for pattern in self.not_just_but_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                print(f"✅ Special 'not just/only...but' construction detected - skipping NOT translation")
-                return True
+        if self._detection_for(text, detection).contains('not_just_but'):
+            print(f"✅ Special 'not just/only...but' construction detected - skipping NOT translation")
+            return True
         return False
-    def contains_negation(self, text):
+    def contains_negation(self, text, detection=None):
         """
         Check if the text contains any negative constructions.
         Enhanced to catch all forms of negation patterns.
+        
+        Args:
+            text (str): Text to check
+            detection (FrictionDetection, optional): Friction matches already found in text
         """
 
         # ─── Normalize smart quotes → straight quotes ────────────────────────
         text = text.replace("’", "'").replace("‘", "'")
         text = text.replace("“", '"').replace("”", '"')
         # ──────────────────────────────────────────────────────────────────────
+        detection = self._detection_for(text, detection)
 
         # 1) If “not…just/only…but” skip it
-        if self.is_not_just_but_construction(text):
+        if self.is_not_just_but_construction(text, detection):
             return False
 
         # 2) Standalone “No” or “No.” skip
@@ -250,70 +193,33 @@ TRANSFORMED SENTENCE:
             return False
 
         # 3) Yes/No answer patterns
-        yes_no_patterns = [
-            r'^(yes|no)[\.\?]?$',
-            r'^(yes|no),',
-            r'^(?:answer|response|replied|response is|answer is):\s*["\']?(no)["\']?[\.\?]?$',
-            r'^(?:answer|response|replied|the answer)(?:\s+(?:is|was))?\s+["\']?(no)["\']?[\.\?]?$'
-        ]
-        for pattern in yes_no_patterns:
-            if re.search(pattern, text.strip().lower(), re.IGNORECASE):
-                matched = re.search(pattern, text.strip().lower(), re.IGNORECASE)
-                print(f"✅ Special case: Yes/No response pattern detected: '{matched.group(0)}' - will not process")
-                return False
-
-        # 4) Now you can treat `text` as “normalized.” Continue with your contraction checks.
+        if is_yes_no_response(text):
+            print(f"✅ Special case: Yes/No response pattern detected: '{text.strip()}' - will not process")
+            return False
+
+        # 4) Now you can treat `text` as “normalized.”
         normalized_text = text.lower()
         print(f"Checking for negation in: '{normalized_text}'")
 
-        # 5) Contraction patterns (flexible apostrophes)
-        contraction_patterns = [
-            r"\bisn[\'']t\b", r"\baren[\'']t\b", r"\bwasn[\'']t\b", r"\bweren[\'']t\b",
-            r"\bdoesn[\'']t\b", r"\bdon[\'']t\b", r"\bdidn[\'']t\b",
-            r"\bhasn[\'']t\b", r"\bhaven[\'']t\b", r"\bhadn[\'']t\b",
-            r"\bcan[\'']t\b", r"\bcouldn[\'']t\b", r"\bwon[\'']t\b", r"\bwouldn[\'']t\b",
-            r"\bshouldn[\'']t\b", r"\bmustn[\'']t\b", r"\bmightn[\'']t\b",
-            r"\bmayn[\'']t\b", r"\bain[\'']t\b",
-            # (You can keep or remove these duplicates at end if you want…
-            r"\bisn[\'']t", r"\baren[\'']t", r"\bwasn[\'']t", r"\bweren[\'']t\b",
-            r"\bdoesn[\'']t\b", r"\bdon[\'']t\b", r"\bdidn[\'']t\b",
-        ]
-
-        for pattern in contraction_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                print(f"✅ Contraction pattern matched: '{pattern}' found '{match.group(0)}'")
-                return True
-
-        # 6) Other “not” patterns
-        for pattern in self.not_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                print(f"✅ Negative pattern matched: '{pattern}' found '{match.group(0)}'")
-                return True
-
-        # 7) Edge‐case “is not”, “do not”, etc.
-        edge_case_patterns = [
-            r'\bis\s+not\b', r'\bare\s+not\b', r'\bwas\s+not\b', r'\bwere\s+not\b',
-            r'\bdo\s+not\b', r'\bdoes\s+not\b', r'\bdid\s+not\b',
-            r'\bhave\s+not\b', r'\bhas\s+not\b', r'\bhad\s+not\b',
-            r'\bcould\s+not\b', r'\bwould\s+not\b', r'\bshould\s+not\b',
-            r'\bmust\s+not\b', r'\bmight\s+not\b', r'\bmay\s+not\b'
-        ]
-        for pattern in edge_case_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                print(f"✅ Edge case pattern matched: '{pattern}' found '{match.group(0)}'")
-                return True
+        # 5) Negation words, contractions and full forms ("is not", "do not", ...) in one scan
+        match = detection.first('negation')
+        if match:
+            print(f"✅ Negative pattern matched: '{match.subtype}' found '{match.text}'")
+            return True
 
         print(f"❌ No negative patterns found in text")
         return False
 
 
         
-    def contains_negative_output(self, text):
+    def contains_negative_output(self, text, detection=None):
         """
         Check if the translated output still contains negative constructions.
+        
+        Args:
+            text (str): Translated text to check
+            detection (FrictionDetection, optional): Record for the input sentence; only the
+                part the LLM rewrote is re-detected
         """
         # ─── Normalize curly quotes to straight quotes ────────────────────
         text = text.replace("’", "'").replace("‘", "'")
@@ -327,33 +233,20 @@ TRANSFORMED SENTENCE:
             return False
             
         # Skip checking for Yes/No response patterns
-        yes_no_patterns = [
-            r'^(yes|no)[\.\?]?$',
-            r'^(yes|no),',
-            r'^(?:answer|response|replied|response is|answer is):\s*["\']?(no)["\']?[\.\?]?$',
-            r'^(?:answer|response|replied|the answer)(?:\s+(?:is|was))?\s+["\']?(no)["\']?[\.\?]?$'
-        ]
-        
-        for pattern in yes_no_patterns:
-            if re.search(pattern, normalized_text.strip(), re.IGNORECASE):
-                return False
+        if is_yes_no_response(normalized_text):
+            return False
         
         # Check for negative patterns in the output
-        for pattern in self.output_check_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                matched_word = match.group(0)
-                print(f"⚠️ Output still contains negative pattern: '{matched_word}' in text")
-                return True
+        match = self._detection_for(text, detection).first('negative_output')
+        if match:
+            print(f"⚠️ Output still contains negative pattern: '{match.text}' in text")
+            return True
                 
         return False
 
 
-    def _tokenize_text(self, text):
-        """Split text into tokens for comparison."""
-        return re.findall(r'\b[\w\'-]+\b|\S', text)
 
-    def translate(self, text):
+    def translate(self, text, detection=None):
         """
         Translate negative friction language in the given text using Azure OpenAI.
         Enhanced to handle complex cases and ensure complete processing.
@@ -362,39 +255,52 @@ TRANSFORMED SENTENCE:
         
         Args:
             text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             str: Translated text
         """
-        if not text:
+        plan = self._plan_translation(text, detection)
+        if plan is None:
             return text
         
+        # Initial translation attempt
+        translated_text = self.call_azure_openai_api(
+            plan['template'].format(text=plan['text']), max_tokens=plan['max_tokens']
+        )
+        return self._finalize_translation(text, translated_text, plan)
+
+    def _plan_translation(self, text, detection=None):
+        """
+        Pick the prompt template and token budget for a sentence, or None if it has no negation.
+        
+        Args:
+            text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
+            
+        Returns:
+            dict or None: Plan with 'template', 'text', 'max_tokens', 'negation_count' and
+                'detection' keys
+        """
+        if not text:
+            return None
+        
         # ─── Normalize curly quotes → straight quotes ────────────────────
         text = text.replace("’", "'").replace("‘", "'")
         text = text.replace("“", '"').replace("”", '"')
         # ─────────────────────────────────────────────────────────────────
+        detection = self._detection_for(text, detection)
 
         print(f"NOT Translator checking: '{text}'")
-        if not self.contains_negation(text):
+        if not self.contains_negation(text, detection):
             print(f"NOT Translator: No negation found, returning original text")
-            return text
+            return None
         
         print(f"NOT Translator: Negation found, proceeding with translation")
             
         # Count the number of negation instances for better handling
-        negation_count = 0
-        for pattern in self.not_patterns:
-            negation_count += len(re.findall(pattern, text, re.IGNORECASE))
-            
-        # Also count cannot patterns
-        for pattern in self.cannot_patterns:
-            negation_count += len(re.findall(pattern, text, re.IGNORECASE))
-            
-        print(f"NOT Translator: Found {negation_count} negation(s) in the text")
-            
-        # Also count cannot patterns
-        for pattern in self.cannot_patterns:
-            negation_count += len(re.findall(pattern, text, re.IGNORECASE))
+        # "cannot" constructions are counted on top of the plain negations (twice, as before)
+        negation_count = detection.count('negation') + 2 * detection.count('cannot')
             
         print(f"NOT Translator: Found {negation_count} negation(s) in the text")
         
@@ -404,49 +310,43 @@ TRANSFORMED SENTENCE:
         if self.prompt_manager:
             print(f"NOT Translator: Checking for custom prompts")
             
+            # The "cannot", ability, state-of-being and determiner constructions were all
+            # found by the same detection pass
+            
             # First check for "cannot" specific patterns
-            for pattern in self.cannot_patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    print(f"NOT Translator: Found specific 'cannot' pattern: '{match.group(0)}'")
-                    context_type = "cannot"
-                    custom_prompt = self.prompt_manager.get_prompt_for_word("cannot", text)
-                    if custom_prompt:
-                        print(f"NOT Translator: Using cannot-specific prompt")
-                        break
+            if detection.contains('cannot'):
+                print(f"NOT Translator: Found specific 'cannot' pattern: '{detection.first('cannot').text}'")
+                context_type = "cannot"
+                custom_prompt = self.prompt_manager.get_prompt_for_word("cannot", text)
+                if custom_prompt:
+                    print(f"NOT Translator: Using cannot-specific prompt")
             
             # Then check for ability statements
-            if not custom_prompt:
-                for pattern in self.ability_patterns:
-                    if re.search(pattern, text, re.IGNORECASE):
-                        custom_prompt = self.prompt_manager.get_prompt_for_word("ability", text)
-                        context_type = "ability"
-                        if custom_prompt:
-                            print(f"NOT Translator: Using ability context prompt")
-                            break
+            if not custom_prompt and detection.contains('ability'):
+                custom_prompt = self.prompt_manager.get_prompt_for_word("ability", text)
+                context_type = "ability"
+                if custom_prompt:
+                    print(f"NOT Translator: Using ability context prompt")
             
             # Then check for state-of-being statements
-            if not custom_prompt:
-                for pattern in self.state_patterns:
-                    if re.search(pattern, text, re.IGNORECASE):
-                        custom_prompt = self.prompt_manager.get_prompt_for_word("state", text)
-                        context_type = "state"
-                        if custom_prompt:
-                            print(f"NOT Translator: Using state context prompt")
-                            break
+            if not custom_prompt and detection.contains('state'):
+                custom_prompt = self.prompt_manager.get_prompt_for_word("state", text)
+                context_type = "state"
+                if custom_prompt:
+                    print(f"NOT Translator: Using state context prompt")
             
             # Then check for "no" as determiner pattern
             if not custom_prompt:
-                no_determiner_match = re.search(r'\bno\s+(\w+)', text, re.IGNORECASE)
+                no_determiner_match = detection.first('determiner')
                 if no_determiner_match:
-                    word_after_no = no_determiner_match.group(1)
+                    word_after_no = no_determiner_match.text.split()[-1]
                     custom_prompt = self.prompt_manager.get_prompt_for_word("determiner", text)
                     context_type = "determiner"
                     if custom_prompt:
                         print(f"NOT Translator: Using determiner context prompt for 'no {word_after_no}'")
             
             # Check for "nothing" specifically
-            if not custom_prompt and re.search(r'\bnothing\b', text, re.IGNORECASE):
+            if not custom_prompt and 'nothing' in detection.subtypes('negation'):
                 custom_prompt = self.prompt_manager.get_prompt_for_word("nothing", text)
                 context_type = "nothing"
                 if custom_prompt:
@@ -463,33 +363,30 @@ TRANSFORMED SENTENCE:
             
             # Finally, check for standard negation patterns
             if not custom_prompt:
-                for pattern in self.not_patterns:
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    if match:
-                        friction_word = match.group(0)
-                        custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, text)
-                        context_type = friction_word
-                        if custom_prompt:
-                            print(f"NOT Translator: Using custom prompt for '{friction_word}'")
-                            break
+                for match in detection.by_priority('negation'):
+                    friction_word = match.text
+                    custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, text)
+                    context_type = friction_word
+                    if custom_prompt:
+                        print(f"NOT Translator: Using custom prompt for '{friction_word}'")
+                        break
             
             # Also check for "need to" patterns
-            if not custom_prompt and re.search(r'\bwe need to\b', text, re.IGNORECASE):
+            if not custom_prompt and 'we need to' in detection.subtypes('should'):
                 custom_prompt = self.prompt_manager.get_prompt_for_word("need to", text)
                 context_type = "need to"
                 if custom_prompt:
                     print(f"NOT Translator: Using custom prompt for 'need to'")
         
-        # Format the prompt with the user's text
-        formatted_prompt = ""
+        # Pick the prompt template for the user's text
         if custom_prompt and isinstance(custom_prompt, dict) and 'prompt' in custom_prompt:
-            formatted_prompt = custom_prompt['prompt'].format(text=text)
+            template = custom_prompt['prompt']
             print(f"NOT Translator: Using custom prompt for context: {context_type or 'unknown'}")
         elif custom_prompt and isinstance(custom_prompt, str):
-            formatted_prompt = custom_prompt.format(text=text)
+            template = custom_prompt
             print(f"NOT Translator: Using custom prompt string for context: {context_type or 'unknown'}")
         else:
-            formatted_prompt = self.prompt_template.format(text=text)
+            template = self.prompt_template
             print(f"NOT Translator: Using default prompt template")
         
         # For longer texts or texts with multiple negations, increase max tokens to ensure complete processing
@@ -498,8 +395,30 @@ TRANSFORMED SENTENCE:
             max_tokens = 300
             print(f"NOT Translator: Increased max tokens to {max_tokens} for {'longer text' if len(text.split()) > 100 else 'multiple negations'}")
         
-        # Initial translation attempt
-        translated_text = self.call_azure_openai_api(formatted_prompt, max_tokens=max_tokens)
+        return {
+            'template': template,
+            'text': text,
+            'max_tokens': max_tokens,
+            'negation_count': negation_count,
+            'detection': detection
+        }
+
+    def _finalize_translation(self, text, translated_text, plan):
+        """
+        Apply the conservative change limit to an LLM output and retry while it still
+        contains negative constructions.
+        
+        Args:
+            text (str): The original text
+            translated_text (str): The LLM output for plan['text']
+            plan (dict): The plan returned by _plan_translation
+            
+        Returns:
+            str: Translated text, or the normalized original text if the output was rejected
+        """
+        text = plan['text']
+        negation_count = plan['negation_count']
+        max_tokens = plan['max_tokens']
         
         # Return the original text if the API call failed or returned empty
         if not translated_text:
@@ -508,19 +427,13 @@ TRANSFORMED SENTENCE:
         
         # Add conservative check to limit changes
         if translated_text and translated_text != text:
-            # Compare word by word and only accept minimal changes
-            words_original = self._tokenize_text(text)
-            words_translated = self._tokenize_text(translated_text)
-            
-            # Use difflib to find exact changes
-            matcher = difflib.SequenceMatcher(None, words_original, words_translated)
-            
-            # Get the changes
-            operations = matcher.get_opcodes()
+            # Compare word by word and only accept minimal changes. The edit script is
+            # memoized, so the text processor reuses it when recording transformations.
+            edit_script = diff_engine.diff(text, translated_text)
             
             # Count how many words were changed
-            changed_words = sum(1 for tag, i1, i2, j1, j2 in operations if tag != 'equal')
-            total_words = len(words_original)
+            changed_words = edit_script.changed_blocks()
+            total_words = len(edit_script.original_spans)
             
             # Calculate percentage for logging
             change_percentage = (changed_words / total_words) * 100 if total_words > 0 else 0
@@ -544,7 +457,7 @@ TRANSFORMED SENTENCE:
         attempts = 1
         max_attempts = 3  # Maximum number of retry attempts
         
-        while self.contains_negative_output(translated_text) and attempts < max_attempts:
+        while self.contains_negative_output(translated_text, plan.get('detection')) and attempts < max_attempts:
             # If translation still contains negative words, retry with stronger emphasis
             retry_prompt = f"""
 You need to revise the following sentence to remove ALL negative words and constructions.
@@ -567,12 +480,15 @@ REQUIREMENTS:
             print(f"NOT Translator: Attempt {attempts+1} - Translation still contains negative words, retrying...")
             
             # Try again with the stronger prompt
-            translated_text = self.call_azure_openai_api(retry_prompt, max_tokens=max_tokens)
+            retry_text = self.call_azure_openai_api(retry_prompt, max_tokens=max_tokens)
             
-            # If retry failed, use last attempt
-            if not translated_text:
+            # A failed call (breaker open, quota wait exceeded, retries exhausted) returns
+            # an empty response; keep the last good attempt instead
+            if not retry_text:
+                print(f"NOT Translator: Retry failed, keeping the previous translation")
                 break
                 
+            translated_text = retry_text
             attempts += 1
         
         print(f"NOT Translator: Successfully translated to: '{translated_text}'")
@@ -0,0 +1,251 @@
+"""
+Process-wide token-bucket rate limiter for Azure OpenAI deployments.
+
+Tracks requests-per-minute and tokens-per-minute per deployment and makes
+callers queue briefly for capacity instead of collecting 429 responses.
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Configured quotas per deployment (0 = learn them from the response headers)
+RPM_LIMIT = int(os.environ.get('AZURE_OPENAI_RPM_LIMIT', 0))
+TPM_LIMIT = int(os.environ.get('AZURE_OPENAI_TPM_LIMIT', 0))
+# Longest a call may queue for capacity before it gives up
+MAX_QUEUE_WAIT = float(os.environ.get('AZURE_OPENAI_MAX_QUEUE_WAIT', 10))
+# Pause applied when the service reports an exhausted window without saying for how long
+DEFAULT_BACKOFF = 1.0
+
+
+def estimate_tokens(prompt_text, max_tokens):
+    """
+    Estimate the tokens a call counts against the TPM quota.
+    Uses the usual ~4 characters per token approximation for the prompt.
+    """
+    return len(prompt_text) // 4 + max_tokens
+
+
+def parse_retry_after(headers, default=DEFAULT_BACKOFF):
+    """
+    Read how long the service asked us to wait.
+
+    Args:
+        headers (dict): Response headers
+        default (float): Value used when no usable header is present
+
+    Returns:
+        float: Seconds to wait
+    """
+    for name in ('retry-after-ms', 'x-ms-retry-after-ms'):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / 1000.0
+            except ValueError:
+                pass
+
+    value = headers.get('Retry-After')
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return default
+
+
+class TokenBucket:
+    """A bucket refilled continuously at capacity-per-minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.level = min(self.capacity, self.level + elapsed * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def consume(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def clamp(self, remaining, now):
+        """Align the bucket with the remaining quota reported by the service."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+    def resize(self, per_minute):
+        self.level = min(self.level, float(per_minute))
+        self.capacity = float(per_minute)
+
+
+class _DeploymentState:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """Schedules Azure OpenAI calls so each deployment stays under its quota."""
+
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT, max_wait=MAX_QUEUE_WAIT):
+        """
+        Initialize the limiter.
+
+        Args:
+            rpm (int): Requests per minute per deployment. 0 learns the limit from headers.
+            tpm (int): Tokens per minute per deployment. 0 learns the limit from headers.
+            max_wait (float): Longest a caller queues before acquire() gives up.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self._deployments = {}
+        self._condition = threading.Condition()
+        self.waiting = 0
+        self.throttled = 0
+        self.timeouts = 0
+
+    def _state(self, key):
+        state = self._deployments.get(key)
+        if state is None:
+            state = self._deployments[key] = _DeploymentState(self.rpm, self.tpm)
+        return state
+
+    def acquire(self, key, tokens, max_wait=None):
+        """
+        Wait until the deployment has capacity for one request of `tokens` tokens.
+
+        Args:
+            key (str): Deployment identifier
+            tokens (int): Estimated tokens for the call
+            max_wait (float, optional): Override for the queueing limit
+
+        Returns:
+            bool: True when capacity was reserved, False when waiting would exceed max_wait
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+
+        with self._condition:
+            state = self._state(key)
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = max(0.0, state.blocked_until - now)
+                    if state.requests:
+                        wait = max(wait, state.requests.wait_time(1, now))
+                    if state.tokens:
+                        wait = max(wait, state.tokens.wait_time(tokens, now))
+
+                    if wait <= 0:
+                        if state.requests:
+                            state.requests.consume(1)
+                        if state.tokens:
+                            state.tokens.consume(tokens)
+                        return True
+
+                    if now + wait > deadline:
+                        self.timeouts += 1
+                        return False
+
+                    self._condition.wait(wait)
+            finally:
+                self.waiting -= 1
+
+    def update_from_headers(self, key, headers):
+        """
+        Update the deployment state from the x-ratelimit-* response headers.
+
+        Args:
+            key (str): Deployment identifier
+            headers (dict): Response headers
+        """
+        limit_requests = _int_header(headers, 'x-ratelimit-limit-requests')
+        limit_tokens = _int_header(headers, 'x-ratelimit-limit-tokens')
+        remaining_requests = _int_header(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens = _int_header(headers, 'x-ratelimit-remaining-tokens')
+        if all(v is None for v in (limit_requests, limit_tokens, remaining_requests, remaining_tokens)):
+            return
+
+        with self._condition:
+            state = self._state(key)
+            now = time.monotonic()
+
+            # Learn quotas that were not configured explicitly
+            if limit_requests and not self.rpm:
+                if state.requests:
+                    state.requests.resize(limit_requests)
+                else:
+                    state.requests = TokenBucket(limit_requests)
+            if limit_tokens and not self.tpm:
+                if state.tokens:
+                    state.tokens.resize(limit_tokens)
+                else:
+                    state.tokens = TokenBucket(limit_tokens)
+
+            for bucket, remaining in ((state.requests, remaining_requests), (state.tokens, remaining_tokens)):
+                if remaining is None:
+                    continue
+                if bucket:
+                    bucket.clamp(remaining, now)
+                elif remaining <= 0:
+                    # Quota unknown but exhausted: hold new calls briefly
+                    state.blocked_until = max(state.blocked_until, now + DEFAULT_BACKOFF)
+
+    def penalize(self, key, retry_after):
+        """
+        Record a 429 response: no call to this deployment starts before retry_after seconds.
+
+        Args:
+            key (str): Deployment identifier
+            retry_after (float): Seconds requested by the service
+        """
+        with self._condition:
+            state = self._state(key)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+            self.throttled += 1
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Get limiter counters.
+
+        Returns:
+            dict: Callers currently queued, 429s recorded and acquire timeouts
+        """
+        with self._condition:
+            return {
+                'waiting': self.waiting,
+                'throttled': self.throttled,
+                'timeouts': self.timeouts
+            }
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+# Shared by every AzureTranslator instance in the process
+rate_limiter = RateLimiter()
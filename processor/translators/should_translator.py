@@ -1,7 +1,8 @@
 import re
 import os
-import difflib
 from processor.translators.azure_translator import AzureTranslator
+from processor.diff_engine import diff_engine
+from processor.friction_patterns import friction_patterns
 
 class ShouldTranslator(AzureTranslator):
     def __init__(self, prompt_manager=None, api_key=None, endpoint=None):
@@ -16,13 +17,9 @@ class ShouldTranslator(AzureTranslator):
         super().__init__(api_key, endpoint)
         self.prompt_manager = prompt_manager
         
-        # Define patterns to detect if the text contains modal verbs with improved negative form detection
-        self.should_patterns = [
-            r'\bshould\b', r'\bshouldn\'?t\b', 
-            r'\bcould\b', r'\bcouldn\'?t\b', 
-            r'\bwould\b', r'\bwouldn\'?t\b',
-            r'\bwe need to\b'
-        ]
+        # Patterns for modal verbs, including negative forms without an apostrophe
+        # (detection uses the shared engine; the list is kept for reference)
+        self.should_patterns = friction_patterns.pattern_strings('should')
         
         # Comprehensive prompt based on the dataset with improved instructions
         self.prompt_template = """
@@ -115,31 +112,26 @@ TRANSFORMED SENTENCE:
         """
         self.prompt_template = prompt
 
-    def contains_modal_verbs(self, text):
+    def contains_modal_verbs(self, text, detection=None):
         """
         Check if the text contains any modal verbs or "we need to" phrases.
         
         Args:
             text (str): Text to check
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             bool: True if text contains modal verbs, False otherwise
         """
-        normalized_text = text.replace("'", "'").lower()
-        for pattern in self.should_patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
-            if match:
-                matched_word = match.group(0)
-                print(f"✅ Modal verb matched: '{pattern}' found '{matched_word}' in text")
-                return True
+        match = self._detection_for(text, detection).first('should')
+        if match:
+            print(f"✅ Modal verb matched: '{match.subtype}' found '{match.text}' in text")
+            return True
         print(f"❌ No modal verbs found in text")
         return False
 
-    def _tokenize_text(self, text):
-        """Split text into tokens for comparison."""
-        return re.findall(r'\b[\w\'-]+\b|\S', text)
 
-    def translate(self, text):
+    def translate(self, text, detection=None):
         """
         Translate modal verbs in the given text using Azure OpenAI.
         Enhanced with conservative approach to prevent over-correction.
@@ -147,25 +139,47 @@ TRANSFORMED SENTENCE:
         
         Args:
             text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             str: Translated text
         """
-        if not text:
+        plan = self._plan_translation(text, detection)
+        if plan is None:
             return text
         
+        # Call the Azure OpenAI API using the parent class method
+        translated_text = self.call_azure_openai_api(
+            plan['template'].format(text=plan['text']), max_tokens=plan['max_tokens']
+        )
+        return self._finalize_translation(text, translated_text, plan)
+
+    def _plan_translation(self, text, detection=None):
+        """
+        Pick the prompt template and token budget for a sentence, or None if it has no modal verbs.
+        
+        Args:
+            text (str): Text to translate
+            detection (FrictionDetection, optional): Friction matches already found in text
+            
+        Returns:
+            dict or None: Plan with 'template', 'text', 'max_tokens', 'modal_verb_count',
+                'quoted' and 'detection' keys
+        """
+        if not text:
+            return None
+        detection = self._detection_for(text, detection)
+        
         # Only process if text contains modal verbs or "we need to" phrases
         print(f"SHOULD Translator checking: '{text}'")
-        if not self.contains_modal_verbs(text):
+        if not self.contains_modal_verbs(text, detection):
             print(f"SHOULD Translator: No modal verbs found, returning original text")
-            return text
+            return None
             
         print(f"SHOULD Translator: Modal verbs found, proceeding with translation")
         
         # Count the number of modal verbs for better handling
-        modal_verb_count = 0
-        for pattern in self.should_patterns:
-            modal_verb_count += len(re.findall(pattern, text, re.IGNORECASE))
+        modal_verb_count = detection.count('should')
             
         print(f"SHOULD Translator: Found {modal_verb_count} modal verb(s) in the text")
         
@@ -179,64 +193,21 @@ TRANSFORMED SENTENCE:
                 # Process just the quoted part
                 # Get custom prompt from manager if available
                 custom_prompt = None
+                quoted_detection = friction_patterns.detect(quoted_text)
                 if self.prompt_manager:
-                    for pattern in self.should_patterns:
-                        match = re.search(pattern, quoted_text, re.IGNORECASE)
-                        if match:
-                            friction_word = match.group(0)
-                            custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, quoted_text)
-                            break
-                
-                # Format the prompt
-                formatted_prompt = ""
-                if custom_prompt and isinstance(custom_prompt, dict) and 'prompt' in custom_prompt:
-                    formatted_prompt = custom_prompt['prompt'].format(text=quoted_text)
-                elif custom_prompt and isinstance(custom_prompt, str):
-                    formatted_prompt = custom_prompt.format(text=quoted_text)
-                else:
-                    formatted_prompt = self.prompt_template.format(text=quoted_text)
-                
-                # Call the API using the parent class method
-                translated_quoted = self.call_azure_openai_api(formatted_prompt)
-                
-                # Use original if API call failed or returned empty
-                if not translated_quoted:
-                    return text
-                
-                # Apply conservative check to the quoted part
-                words_original = self._tokenize_text(quoted_text)
-                words_translated = self._tokenize_text(translated_quoted)
-                
-                # Use difflib to find exact changes
-                matcher = difflib.SequenceMatcher(None, words_original, words_translated)
-                
-                # Get the changes
-                operations = matcher.get_opcodes()
-                
-                # Count how many words were changed
-                changed_words = sum(1 for tag, i1, i2, j1, j2 in operations if tag != 'equal')
-                total_words = len(words_original)
-                
-                # Calculate percentage for logging
-                change_percentage = (changed_words / total_words) * 100 if total_words > 0 else 0
-                
-                # Output detailed change information for debugging
-                print(f"Words changed: {changed_words}/{total_words} ({change_percentage:.1f}%)")
+                    matches = quoted_detection.by_priority('should')
+                    if matches:
+                        friction_word = matches[0].text
+                        custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, quoted_text)
                 
-                # If more than 30% of words changed, it's probably over-correcting
-                # For multiple modal verbs, we allow a higher percentage of changes (40%)
-                max_change_percentage = 0.3
-                if modal_verb_count > 1:
-                    max_change_percentage = 0.4
-                
-                if changed_words / total_words > max_change_percentage and total_words > 5:
-                    print(f"WARNING: Excessive changes detected ({changed_words}/{total_words} words, {change_percentage:.1f}%). Using original text.")
-                    print(f"Original: '{quoted_text}'")
-                    print(f"Rejected: '{translated_quoted}'")
-                    return text
-                
-                # Replace the quoted part in the original text
-                return text.replace(quoted_text, translated_quoted)
+                return {
+                    'template': self._select_template(custom_prompt),
+                    'text': quoted_text,
+                    'max_tokens': 150,
+                    'modal_verb_count': modal_verb_count,
+                    'quoted': True,
+                    'detection': quoted_detection
+                }
             except (AttributeError, IndexError):
                 # If there's an issue parsing, just process the whole text
                 pass
@@ -245,38 +216,58 @@ TRANSFORMED SENTENCE:
         custom_prompt = None
         context_type = None
         if self.prompt_manager:
-            for pattern in self.should_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    friction_word = match.group(0)
-                    # Determine context for the word
-                    context = self._determine_context(friction_word, text)
-                    context_type = context
-                    custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, context)
-                    if custom_prompt:
-                        print(f"SHOULD Translator: Using custom prompt for '{friction_word}' with context: '{context}'")
-                    break
+            matches = detection.by_priority('should')
+            if matches:
+                friction_word = matches[0].text
+                # Determine context for the word
+                context = self._determine_context(friction_word, text, detection)
+                context_type = context
+                custom_prompt = self.prompt_manager.get_prompt_for_word(friction_word, context)
+                if custom_prompt:
+                    print(f"SHOULD Translator: Using custom prompt for '{friction_word}' with context: '{context}'")
         
-        # Format the prompt
-        formatted_prompt = ""
-        if custom_prompt and isinstance(custom_prompt, dict) and 'prompt' in custom_prompt:
-            formatted_prompt = custom_prompt['prompt'].format(text=text)
-            print(f"SHOULD Translator: Using custom prompt dict for context: {context_type or 'unknown'}")
-        elif custom_prompt and isinstance(custom_prompt, str):
-            formatted_prompt = custom_prompt.format(text=text)
-            print(f"SHOULD Translator: Using custom prompt string for context: {context_type or 'unknown'}")
-        else:
-            formatted_prompt = self.prompt_template.format(text=text)
+        template = self._select_template(custom_prompt)
+        if template is self.prompt_template:
             print(f"SHOULD Translator: Using default prompt template")
+        else:
+            print(f"SHOULD Translator: Using custom prompt for context: {context_type or 'unknown'}")
         
-        # Call the Azure OpenAI API using the parent class method
         # Increase max tokens for sentences with multiple modal verbs
         max_tokens = 150
         if modal_verb_count > 1:
             max_tokens = 250
             print(f"SHOULD Translator: Increased max tokens to {max_tokens} for multiple modal verbs")
+        
+        return {
+            'template': template,
+            'text': text,
+            'max_tokens': max_tokens,
+            'modal_verb_count': modal_verb_count,
+            'quoted': False,
+            'detection': detection
+        }
+
+    def _select_template(self, custom_prompt):
+        """Return the custom prompt template if one was found, otherwise the default template."""
+        if custom_prompt and isinstance(custom_prompt, dict) and 'prompt' in custom_prompt:
+            return custom_prompt['prompt']
+        elif custom_prompt and isinstance(custom_prompt, str):
+            return custom_prompt
+        return self.prompt_template
+
+    def _finalize_translation(self, text, translated_text, plan):
+        """
+        Apply the conservative change limit to an LLM output.
+        
+        Args:
+            text (str): The original text
+            translated_text (str): The LLM output for plan['text']
+            plan (dict): The plan returned by _plan_translation
             
-        translated_text = self.call_azure_openai_api(formatted_prompt, max_tokens=max_tokens)
+        Returns:
+            str: Translated text, or the original text if the output was rejected
+        """
+        source_text = plan['text']
         
         # Return the original text if the API call failed or returned empty
         if not translated_text:
@@ -284,20 +275,14 @@ TRANSFORMED SENTENCE:
             return text
             
         # Add conservative check to limit changes
-        if translated_text and translated_text != text:
-            # Compare word by word and only accept minimal changes
-            words_original = self._tokenize_text(text)
-            words_translated = self._tokenize_text(translated_text)
-            
-            # Use difflib to find exact changes
-            matcher = difflib.SequenceMatcher(None, words_original, words_translated)
-            
-            # Get the changes
-            operations = matcher.get_opcodes()
+        if translated_text != source_text:
+            # Compare word by word and only accept minimal changes. The edit script is
+            # memoized, so the text processor reuses it when recording transformations.
+            edit_script = diff_engine.diff(source_text, translated_text)
             
             # Count how many words were changed
-            changed_words = sum(1 for tag, i1, i2, j1, j2 in operations if tag != 'equal')
-            total_words = len(words_original)
+            changed_words = edit_script.changed_blocks()
+            total_words = len(edit_script.original_spans)
             
             # Calculate percentage for logging
             change_percentage = (changed_words / total_words) * 100 if total_words > 0 else 0
@@ -307,32 +292,34 @@ TRANSFORMED SENTENCE:
             
             # For sentences with multiple modal verbs, allow a higher percentage of changes
             max_change_percentage = 0.3  # Default 30% for one modal verb
-            if modal_verb_count > 1:
+            if plan['modal_verb_count'] > 1:
                 max_change_percentage = 0.4  # 40% for multiple modal verbs
                 
             # If more than allowed percentage of words changed, it's probably over-correcting
             if changed_words / total_words > max_change_percentage and total_words > 5:
                 print(f"WARNING: Excessive changes detected ({changed_words}/{total_words} words, {change_percentage:.1f}%). Using original text.")
-                print(f"Original: '{text}'")
+                print(f"Original: '{source_text}'")
                 print(f"Rejected: '{translated_text}'")
                 return text
-                
+            
             # Check if all modal verbs were properly handled
-            remaining_modal_verbs = []
-            for pattern in self.should_patterns:
-                matches = re.finditer(pattern, translated_text, re.IGNORECASE)
-                for match in matches:
-                    remaining_modal_verbs.append(match.group(0))
+            # Re-detect only the part of the sentence the LLM rewrote
+            output_detection = self._detection_for(translated_text, plan.get('detection'))
+            remaining_modal_verbs = [match.text for match in output_detection.of('should')]
                     
             if remaining_modal_verbs:
                 print(f"WARNING: Translated text still contains modal verbs: {remaining_modal_verbs}")
         
+        if plan['quoted']:
+            # Replace the quoted part in the original text
+            return text.replace(source_text, translated_text)
+        
         print(f"SHOULD Translator: Successfully translated to: '{translated_text}'")
             
         # Return the processed text
         return translated_text
 
-    def _determine_context(self, friction_word, text):
+    def _determine_context(self, friction_word, text, detection=None):
         """
         Determine the appropriate context (high, moderate, low optionality) based on the text.
         This is a simple heuristic and can be improved for better context detection.
@@ -340,6 +327,7 @@ TRANSFORMED SENTENCE:
         Args:
             friction_word (str): The detected friction word
             text (str): The full text
+            detection (FrictionDetection, optional): Friction matches already found in text
             
         Returns:
             str: The context type ('high', 'moderate', or 'low')
@@ -363,7 +351,7 @@ TRANSFORMED SENTENCE:
         lower_text = text.lower()
         
         # If it's a "we need to" phrase, default to low optionality
-        if "we need to" in lower_text:
+        if 'we need to' in self._detection_for(text, detection).subtypes('should'):
             return 'low'
             
         # Check for special case of "couldn't believe"
@@ -3,6 +3,10 @@ import os
 import re
 
 class PromptManager:
+    # Bumped whenever any instance changes a prompt, so caches keyed on the
+    # active prompts know to invalidate themselves
+    generation = 0
+    
     def __init__(self, prompts_file='prompts.json'):
         """
         Initialize the PromptManager with custom prompts from file.
@@ -531,6 +535,8 @@ TRANSFORMED TEXT:
         if example and isinstance(example, dict) and 'from' in example and 'to' in example:
             self.prompts[word_type][context]['example'] = example
         
+        PromptManager.generation += 1
+        
         # Save to file
         return self.save_prompts()
     
@@ -4,10 +4,10 @@ This extends the existing translator functionality to provide real-time analysis
 without modifying the original text.
 """
 
-import re
 import json
 import logging
 from processor.sentence_parser import SentenceParser
+from processor.friction_patterns import friction_patterns
 
 class RealTimeAnalyzer:
     """
@@ -41,24 +41,15 @@ class RealTimeAnalyzer:
             
         self.logger.debug(f"Analyzing text: {repr(text[:100])}...")
         
-        # Parse the text into sentences
-        sentences = self.sentence_parser.parse(text)
+        # Locate the sentences; spans are positions in the original text, so sentences
+        # with curly quotes or repeated sentences are placed correctly
+        spans = self.sentence_parser.parse_spans(text)
         
         # Track all friction points
         friction_points = []
         
-        # Keep track of the character position in the original text
-        current_pos = 0
-        
-        for sentence in sentences:
-            # Find the actual position of this sentence in the original text
-            sentence_start = text.find(sentence, current_pos)
-            if sentence_start == -1:
-                # If exact match not found, try to find similar text
-                continue
-                
-            sentence_end = sentence_start + len(sentence)
-            current_pos = sentence_end  # Update for next search
+        for sentence_start, sentence_end in spans:
+            sentence = text[sentence_start:sentence_end]
             
             # Process sentence with each translator to identify friction points
             friction_points.extend(self._check_but_friction(text, sentence, sentence_start))
@@ -98,38 +89,35 @@ class RealTimeAnalyzer:
             return friction_points
             
         # Find all 'but' and 'yet' instances in the sentence
-        patterns = [r'\bbut\b', r'\byet\b']
-        
-        for pattern in patterns:
-            for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                word_start = sentence_start + match.start()
-                word_end = sentence_start + match.end()
-                original_word = match.group(0)
-                
-                # Figure out what it was replaced with
-                if original_word.lower() == 'but':
-                    replacement = 'and at the same time'
-                    suggestion = "Consider replacing 'but' with 'and at the same time' to give equal weight to both parts of the sentence."
-                else:  # 'yet'
-                    replacement = 'and at the same time'
-                    suggestion = "Consider replacing 'yet' with 'and at the same time' to avoid minimizing what comes before it."
-                    
-                # Get context
-                context_start = max(0, word_start - 20)
-                context_end = min(len(full_text), word_end + 20)
-                context = full_text[context_start:context_end]
-                
-                # Add to friction points
-                friction_points.append({
-                    'type': 'but',
-                    'start_pos': word_start,
-                    'end_pos': word_end,
-                    'original': original_word,
-                    'replacement': replacement,
-                    'context': context,
-                    'suggestion': suggestion
-                })
+        for match in friction_patterns.scan(sentence, ('but',)):
+            word_start = sentence_start + match.start
+            word_end = sentence_start + match.end
+            original_word = match.text
+            
+            # Figure out what it was replaced with
+            if original_word.lower() == 'but':
+                replacement = 'and at the same time'
+                suggestion = "Consider replacing 'but' with 'and at the same time' to give equal weight to both parts of the sentence."
+            else:  # 'yet'
+                replacement = 'and at the same time'
+                suggestion = "Consider replacing 'yet' with 'and at the same time' to avoid minimizing what comes before it."
                 
+            # Get context
+            context_start = max(0, word_start - 20)
+            context_end = min(len(full_text), word_end + 20)
+            context = full_text[context_start:context_end]
+            
+            # Add to friction points
+            friction_points.append({
+                'type': 'but',
+                'start_pos': word_start,
+                'end_pos': word_end,
+                'original': original_word,
+                'replacement': replacement,
+                'context': context,
+                'suggestion': suggestion
+            })
+            
         return friction_points
     
     def _check_should_friction(self, full_text, sentence, sentence_start):
@@ -157,62 +145,54 @@ class RealTimeAnalyzer:
         if translated == sentence:
             return friction_points
             
-        # Check for each modal verb pattern
-        patterns = [
-            r'\bshould\b', r'\bshouldn\'t\b', 
-            r'\bcould\b', r'\bcouldn\'t\b', 
-            r'\bwould\b', r'\bwouldn\'t\b',
-            r'\bwe need to\b'
-        ]
-        
-        for pattern in patterns:
-            for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                word_start = sentence_start + match.start()
-                word_end = sentence_start + match.end()
-                original_word = match.group(0)
-                
-                # Determine replacement based on word
-                if original_word.lower() == 'should':
-                    replacement = 'might'
-                    suggestion = "Consider using 'might' instead of 'should' to reduce the sense of obligation."
-                elif original_word.lower() == 'shouldn\'t':
-                    replacement = 'might not want to'
-                    suggestion = "Consider using 'might not want to' instead of 'shouldn't' to reduce the sense of prohibition."
-                elif original_word.lower() == 'could':
-                    replacement = 'might be able to'
-                    suggestion = "Consider using 'might be able to' instead of 'could' for a more open possibility."
-                elif original_word.lower() == 'couldn\'t':
-                    replacement = 'might not be able to'
-                    suggestion = "Consider using 'might not be able to' instead of 'couldn't' to focus on possibility."
-                elif original_word.lower() == 'would':
-                    replacement = 'might'
-                    suggestion = "Consider using 'might' instead of 'would' to reduce certainty and create openness."
-                elif original_word.lower() == 'wouldn\'t':
-                    replacement = 'might not'
-                    suggestion = "Consider using 'might not' instead of 'wouldn't' to reduce certainty."
-                elif original_word.lower() == 'we need to':
-                    replacement = 'it would be beneficial to'
-                    suggestion = "Consider using 'it would be beneficial to' instead of 'we need to' to reduce imperative tone."
-                else:
-                    replacement = original_word  # fallback
-                    suggestion = f"Consider replacing '{original_word}' with a less forceful alternative."
-                
-                # Get context
-                context_start = max(0, word_start - 20)
-                context_end = min(len(full_text), word_end + 20)
-                context = full_text[context_start:context_end]
-                
-                # Add to friction points
-                friction_points.append({
-                    'type': 'should',
-                    'start_pos': word_start,
-                    'end_pos': word_end,
-                    'original': original_word,
-                    'replacement': replacement,
-                    'context': context,
-                    'suggestion': suggestion
-                })
-                
+        # Find every modal verb and "we need to" in the sentence
+        for match in friction_patterns.scan(sentence, ('should',)):
+            word_start = sentence_start + match.start
+            word_end = sentence_start + match.end
+            original_word = match.text
+            
+            # Determine replacement based on word
+            if original_word.lower() == 'should':
+                replacement = 'might'
+                suggestion = "Consider using 'might' instead of 'should' to reduce the sense of obligation."
+            elif original_word.lower() == 'shouldn\'t':
+                replacement = 'might not want to'
+                suggestion = "Consider using 'might not want to' instead of 'shouldn't' to reduce the sense of prohibition."
+            elif original_word.lower() == 'could':
+                replacement = 'might be able to'
+                suggestion = "Consider using 'might be able to' instead of 'could' for a more open possibility."
+            elif original_word.lower() == 'couldn\'t':
+                replacement = 'might not be able to'
+                suggestion = "Consider using 'might not be able to' instead of 'couldn't' to focus on possibility."
+            elif original_word.lower() == 'would':
+                replacement = 'might'
+                suggestion = "Consider using 'might' instead of 'would' to reduce certainty and create openness."
+            elif original_word.lower() == 'wouldn\'t':
+                replacement = 'might not'
+                suggestion = "Consider using 'might not' instead of 'wouldn't' to reduce certainty."
+            elif original_word.lower() == 'we need to':
+                replacement = 'it would be beneficial to'
+                suggestion = "Consider using 'it would be beneficial to' instead of 'we need to' to reduce imperative tone."
+            else:
+                replacement = original_word  # fallback
+                suggestion = f"Consider replacing '{original_word}' with a less forceful alternative."
+            
+            # Get context
+            context_start = max(0, word_start - 20)
+            context_end = min(len(full_text), word_end + 20)
+            context = full_text[context_start:context_end]
+            
+            # Add to friction points
+            friction_points.append({
+                'type': 'should',
+                'start_pos': word_start,
+                'end_pos': word_end,
+                'original': original_word,
+                'replacement': replacement,
+                'context': context,
+                'suggestion': suggestion
+            })
+            
         return friction_points
     
     def _check_not_friction(self, full_text, sentence, sentence_start):
@@ -240,62 +220,59 @@ class RealTimeAnalyzer:
         if translated == sentence:
             return friction_points
             
-        # Check for each negative pattern
-        patterns = self.text_processor.not_translator.not_patterns
-        
-        for pattern in patterns:
-            for match in re.finditer(pattern, sentence, re.IGNORECASE):
-                word_start = sentence_start + match.start()
-                word_end = sentence_start + match.end()
-                original_word = match.group(0)
-                
-                # Generate an appropriate replacement based on the negative word
-                # This is simplified - ideally we would extract from the translated version
-                if original_word.lower() == 'not':
-                    replacement = ''  # Will need to be determined by context
-                    suggestion = "Consider replacing the negative construction with a positive statement."
-                elif original_word.lower() == 'never':
-                    replacement = 'rarely'
-                    suggestion = "Consider using 'rarely' instead of 'never' to acknowledge possibilities."
-                elif original_word.lower() == 'without':
-                    replacement = 'lacking'
-                    suggestion = "Consider using 'lacking' instead of 'without' for a more neutral tone."
-                elif original_word.lower() == 'no':
-                    replacement = 'few'
-                    suggestion = "Consider using 'few' instead of 'no' to allow for exceptions."
-                elif original_word.lower() == 'isn\'t' or original_word.lower() == 'is not':
-                    replacement = 'differs from'
-                    suggestion = "Consider using 'differs from' instead of 'isn't' to focus on what is true."
-                elif original_word.lower() == 'aren\'t' or original_word.lower() == 'are not':
-                    replacement = 'differ from'
-                    suggestion = "Consider using 'differ from' instead of 'aren't' to focus on what is true."
-                elif original_word.lower() == 'can\'t' or original_word.lower() == 'cannot':
-                    replacement = 'am still working to'
-                    suggestion = "Consider using 'am still working to' instead of 'can't' to focus on progress."
-                elif original_word.lower() == 'don\'t' or original_word.lower() == 'do not':
-                    replacement = 'prefer to avoid'
-                    suggestion = "Consider using 'prefer to avoid' instead of 'don't' to express preference rather than negation."
-                else:
-                    # For other patterns, we'll use a generic replacement
-                    replacement = 'positive alternative'
-                    suggestion = f"Consider replacing '{original_word}' with a positive alternative."
-                
-                # Get context
-                context_start = max(0, word_start - 20)
-                context_end = min(len(full_text), word_end + 20)
-                context = full_text[context_start:context_end]
-                
-                # Add to friction points
-                friction_points.append({
-                    'type': 'not',
-                    'start_pos': word_start,
-                    'end_pos': word_end,
-                    'original': original_word,
-                    'replacement': replacement,
-                    'context': context,
-                    'suggestion': suggestion
-                })
-                
+        # Find every negative construction in the sentence
+        for match in friction_patterns.scan(sentence, ('negation',)):
+            word_start = sentence_start + match.start
+            word_end = sentence_start + match.end
+            original_word = match.text
+            
+            # Generate an appropriate replacement based on the negative word
+            # This is simplified - ideally we would extract from the translated version
+            if original_word.lower() == 'not':
+                replacement = ''  # Will need to be determined by context
+                suggestion = "Consider replacing the negative construction with a positive statement."
+            elif original_word.lower() == 'never':
+                replacement = 'rarely'
+                suggestion = "Consider using 'rarely' instead of 'never' to acknowledge possibilities."
+            elif original_word.lower() == 'without':
+                replacement = 'lacking'
+                suggestion = "Consider using 'lacking' instead of 'without' for a more neutral tone."
+            elif original_word.lower() == 'no':
+                replacement = 'few'
+                suggestion = "Consider using 'few' instead of 'no' to allow for exceptions."
+            elif original_word.lower() == 'isn\'t' or original_word.lower() == 'is not':
+                replacement = 'differs from'
+                suggestion = "Consider using 'differs from' instead of 'isn't' to focus on what is true."
+            elif original_word.lower() == 'aren\'t' or original_word.lower() == 'are not':
+                replacement = 'differ from'
+                suggestion = "Consider using 'differ from' instead of 'aren't' to focus on what is true."
+            elif original_word.lower() == 'can\'t' or original_word.lower() == 'cannot':
+                replacement = 'am still working to'
+                suggestion = "Consider using 'am still working to' instead of 'can't' to focus on progress."
+            elif original_word.lower() == 'don\'t' or original_word.lower() == 'do not':
+                replacement = 'prefer to avoid'
+                suggestion = "Consider using 'prefer to avoid' instead of 'don't' to express preference rather than negation."
+            else:
+                # For other patterns, we'll use a generic replacement
+                replacement = 'positive alternative'
+                suggestion = f"Consider replacing '{original_word}' with a positive alternative."
+            
+            # Get context
+            context_start = max(0, word_start - 20)
+            context_end = min(len(full_text), word_end + 20)
+            context = full_text[context_start:context_end]
+            
+            # Add to friction points
+            friction_points.append({
+                'type': 'not',
+                'start_pos': word_start,
+                'end_pos': word_end,
+                'original': original_word,
+                'replacement': replacement,
+                'context': context,
+                'suggestion': suggestion
+            })
+            
         return friction_points
     
     def generate_alternatives(self, type, text):
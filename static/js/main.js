@@ -251,27 +251,61 @@ TRANSFORMED SENTENCE:`
       
           const highlightChanges = highlightToggle && highlightToggle.checked;
       
-          fetch('/translate', {
+          // Sentences are rendered as they stream in; the summary replaces them at the end
+          const sentenceHtml = [];  // paragraph index -> { sentence index: html }
+          let firstResult = true;
+      
+          const renderPartial = () => {
+            const paragraphCount = sentenceHtml.length;
+            output.innerHTML = Array.from({ length: paragraphCount }, (_, p) => {
+              const sentences = sentenceHtml[p] || {};
+              return Object.keys(sentences)
+                .sort((a, b) => a - b)
+                .map(i => sentences[i])
+                .join(' ');
+            }).join('\n');
+          };
+      
+          fetch('/translate-stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ text, highlight: highlightChanges })
           })
           .then(resp => {
             if (!resp.ok) throw new Error(resp.statusText);
-            return resp.json();
-          })
-          .then(data => {
-            originalText && (originalText.textContent = data.original);
+            return readNdjsonStream(resp, event => {
+              if (event.event === 'error') throw new Error(event.error);
       
-            if (output) {
-              if (highlightChanges && data.highlighted) {
-                output.innerHTML = data.highlighted.trim();
-              } else {
-                output.textContent = data.translated.trim();
+              if (event.event === 'sentence') {
+                if (!output) return;
+                if (firstResult) {
+                  // Show the first result immediately instead of waiting for the whole document
+                  firstResult = false;
+                  loader && (loader.style.display = 'none');
+                  output.style.display = 'block';
+                }
+                const html = highlightChanges && event.highlighted && event.changes.length
+                  ? event.highlighted.trim()
+                  : escapeHtml(event.translated.trim());
+                (sentenceHtml[event.paragraph] = sentenceHtml[event.paragraph] || {})[event.index] = html;
+                renderPartial();
+                return;
               }
-            }
       
-            displayTranslationResults(data);
+              if (event.event === 'summary') {
+                originalText && (originalText.textContent = event.original);
+      
+                if (output) {
+                  if (highlightChanges && event.highlighted) {
+                    output.innerHTML = event.highlighted.trim();
+                  } else {
+                    output.textContent = event.translated.trim();
+                  }
+                }
+      
+                displayTranslationResults(event);
+              }
+            });
           })
           .catch(err => {
             console.error('Translate error', err);
@@ -0,0 +1,37 @@
+/**
+ * Streaming helpers shared by main.js and real-time-corrections.js
+ * Loaded before both scripts
+ */
+
+/**
+ * Read a newline-delimited JSON response, calling onEvent for each object as it arrives
+ * @param {Response} response - The fetch response
+ * @param {Function} onEvent - Called with each parsed event
+ */
+window.readNdjsonStream = async function(response, onEvent) {
+    if (!response.body || !response.body.getReader) {
+        // No streaming support: parse the whole body at once
+        const text = await response.text();
+        text.split('\n').filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+        return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) onEvent(JSON.parse(line));
+        }
+    }
+
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+};
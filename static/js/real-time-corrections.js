@@ -16,7 +16,9 @@ document.addEventListener('DOMContentLoaded', function() {
   // Track friction points and processed sentences
   let frictionPoints = [];
   let processedSentences = new Map(); // sentence -> processed version
+  let sentenceResults = new Map(); // sentence -> its translation result, reused while the sentence is unchanged
   let isProcessing = false;
+  let analysisController = null; // aborts a superseded streaming analysis
   
   // Set up debounced text analysis
   let analysisTimeout;
@@ -63,6 +65,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (liveSuggestions) liveSuggestions.style.display = 'none';
     frictionPoints = [];
     processedSentences.clear();
+    sentenceResults.clear();
     updateSuggestionCount();
   }
   
@@ -108,10 +111,10 @@ document.addEventListener('DOMContentLoaded', function() {
       const sentences = parseTextIntoSentences(rawText);
       console.log(`📝 Found ${sentences.length} sentences to analyze`);
       
-      const allFrictionPoints = [];
+      // Locate every sentence in the raw text up front
+      const located = [];
       let currentPosition = 0;
       
-      // Process each sentence individually
       for (let i = 0; i < sentences.length; i++) {
         const sentence = sentences[i];
         
@@ -120,8 +123,6 @@ document.addEventListener('DOMContentLoaded', function() {
           continue;
         }
         
-        console.log(`🔍 Processing sentence ${i + 1}: "${sentence}"`);
-        
         // Find the actual position of this sentence in the raw text
         const sentencePosition = findSentencePosition(rawText, sentence, currentPosition);
         
@@ -131,13 +132,48 @@ document.addEventListener('DOMContentLoaded', function() {
           continue;
         }
         
-        // Process this sentence with the backend
-        const sentenceFrictions = await processSentenceForFriction(sentence, sentencePosition);
-        allFrictionPoints.push(...sentenceFrictions);
-        
+        located.push({ sentence, sentencePosition });
         currentPosition = sentencePosition + sentence.length;
       }
       
+      // Cancel a previous analysis that is still streaming
+      if (analysisController) analysisController.abort();
+      const controller = new AbortController();
+      analysisController = controller;
+      
+      // Sentences analyzed before keep their results (shifted to where they are now);
+      // only new or edited sentences are sent, so editing one word costs one sentence
+      const allFrictionPoints = [];
+      const dirty = [];
+      located.forEach(item => {
+        const cached = sentenceResults.get(item.sentence.trim());
+        if (cached) {
+          allFrictionPoints.push(...frictionPointsFromResult(cached, item.sentence, item.sentencePosition));
+        } else {
+          dirty.push(item);
+        }
+      });
+      
+      // Forget sentences that are no longer in the text
+      const currentSentences = new Set(located.map(item => item.sentence.trim()));
+      for (const key of [...sentenceResults.keys()]) {
+        if (!currentSentences.has(key)) sentenceResults.delete(key);
+      }
+      console.log(`♻️ Reusing ${located.length - dirty.length} sentences, analyzing ${dirty.length}`);
+      
+      // Send the changed sentences in one streaming request and show each result as it arrives
+      await streamSentencesForFriction(dirty, controller.signal, sentenceFrictions => {
+        allFrictionPoints.push(...sentenceFrictions);
+        if (sentenceFrictions.length && analysisController === controller) {
+          frictionPoints = [...allFrictionPoints].sort((a, b) => a.start_pos - b.start_pos);
+          displaySuggestions();
+        }
+      });
+      
+      // A newer analysis has taken over
+      if (analysisController !== controller) return;
+      analysisController = null;
+      
       // Update global state
       frictionPoints = allFrictionPoints.sort((a, b) => a.start_pos - b.start_pos);
       
@@ -243,60 +279,128 @@ document.addEventListener('DOMContentLoaded', function() {
   }
   
   /**
-   * Process a single sentence for friction language
+   * Stream results for several located sentences from /translate-stream.
+   * Calls onSentence with the friction points of each sentence as soon as it is processed.
    */
-  async function processSentenceForFriction(sentence, sentencePosition) {
+  async function streamSentencesForFriction(located, signal, onSentence) {
+    if (!located.length) return;
+    const received = new Set();
+    
     try {
-      console.log(`🔄 Processing sentence at position ${sentencePosition}: "${sentence}"`);
-      
-      const response = await fetch('/translate', {
+      const response = await fetch('/translate-stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ 
-          text: sentence.trim(), 
-          highlight: false 
-        })
+        body: JSON.stringify({
+          sentences: located.map(item => item.sentence.trim()),
+          highlight: false
+        }),
+        signal
       });
       
       if (!response.ok) {
         throw new Error(`API error: ${response.status} ${response.statusText}`);
       }
       
-      const data = await response.json();
-      console.log(`📊 API response for sentence:`, data);
+      await readNdjsonStream(response, event => {
+        if (event.event === 'error') {
+          throw new Error(event.error);
+        }
+        if (event.event !== 'sentence') return;
+        
+        received.add(event.index);
+        const { sentence, sentencePosition } = located[event.index];
+        onSentence(frictionPointsFromResult(event, sentence, sentencePosition));
+      });
+    } catch (error) {
+      if (error.name === 'AbortError') return;
+      console.error('❌ Streaming analysis failed, falling back to a batch request', error);
       
-      // Store the processed version of this sentence
-      if (data.translated && data.translated !== sentence.trim()) {
-        processedSentences.set(sentence.trim(), data.translated);
-        console.log(`💾 Stored translation: "${sentence.trim()}" → "${data.translated}"`);
-      }
+      // Only the sentences that have not arrived yet are requested again
+      const missing = located.filter((item, index) => !received.has(index));
+      await processSentencesForFriction(missing, signal, onSentence);
+    }
+  }
+  
+  /**
+   * Process several sentences for friction language with one /translate-batch request.
+   * Calls onSentence with the friction points of each sentence that succeeded.
+   */
+  async function processSentencesForFriction(located, signal, onSentence) {
+    if (!located.length) return;
+    
+    try {
+      console.log(`🔄 Processing ${located.length} sentences in one batch`);
       
-      // Convert transformations to friction points
-      const frictionPoints = [];
+      const response = await fetch('/translate-batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          items: located.map(item => item.sentence.trim()),
+          highlight: false
+        }),
+        signal
+      });
       
-      if (data.transformations && Array.isArray(data.transformations)) {
-        data.transformations.forEach((transform, index) => {
-          const frictionPoint = createFrictionPoint(
-            transform, 
-            sentence, 
-            sentencePosition, 
-            `${sentencePosition}-${index}`,
-            data.translated
-          );
-          
-          if (frictionPoint) {
-            frictionPoints.push(frictionPoint);
-            console.log(`🎯 Created friction point: "${frictionPoint.original}" at ${frictionPoint.start_pos}-${frictionPoint.end_pos}`);
-          }
-        });
+      if (!response.ok) {
+        throw new Error(`API error: ${response.status} ${response.statusText}`);
       }
       
-      return frictionPoints;
+      const data = await response.json();
+      console.log(`📊 Batch response: ${data.succeeded} succeeded, ${data.failed} failed`);
+      
+      // A failed sentence is skipped; the others still get their suggestions
+      data.results.forEach(result => {
+        const { sentence, sentencePosition } = located[result.index];
+        if (!result.success) {
+          console.error(`❌ Error processing sentence: "${sentence}"`, result.error);
+          return;
+        }
+        onSentence(frictionPointsFromResult(result, sentence, sentencePosition));
+      });
       
     } catch (error) {
-      console.error(`❌ Error processing sentence: "${sentence}"`, error);
-      return [];
+      if (error.name === 'AbortError') return;
+      console.error('❌ Error processing sentence batch', error);
+    }
+  }
+  
+  /**
+   * Convert one sentence's translation result into friction points
+   */
+  function frictionPointsFromResult(data, sentence, sentencePosition) {
+    // Remember the result so the sentence is not sent again while it stays unchanged
+    sentenceResults.set(sentence.trim(), {
+      translated: data.translated,
+      transformations: data.transformations
+    });
+    
+    // Store the processed version of this sentence
+    if (data.translated && data.translated !== sentence.trim()) {
+      processedSentences.set(sentence.trim(), data.translated);
+      console.log(`💾 Stored translation: "${sentence.trim()}" → "${data.translated}"`);
     }
+    
+    // Convert transformations to friction points
+    const frictionPoints = [];
+    
+    if (data.transformations && Array.isArray(data.transformations)) {
+      data.transformations.forEach((transform, index) => {
+        const frictionPoint = createFrictionPoint(
+          transform, 
+          sentence, 
+          sentencePosition, 
+          `${sentencePosition}-${index}`,
+          data.translated
+        );
+        
+        if (frictionPoint) {
+          frictionPoints.push(frictionPoint);
+          console.log(`🎯 Created friction point: "${frictionPoint.original}" at ${frictionPoint.start_pos}-${frictionPoint.end_pos}`);
+        }
+      });
+    }
+    
+    return frictionPoints;
   }
   
   /**
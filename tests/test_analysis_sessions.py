@@ -0,0 +1,117 @@
+import sys
+import os
+import random
+import re
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.analysis_sessions import AnalysisSessions, text_hash
+
+DOCUMENT = ("We should plan the launch. The budget is not final, but the team is ready. "
+            "Dr. Smith could review it... and approve it.\nNext steps: nobody's waiting. Done!")
+
+
+def find_friction(sentence):
+    """Friction points of one sentence, with offsets relative to it."""
+    return [{'word': match.group(0), 'start_pos': match.start(), 'end_pos': match.end()}
+            for match in re.finditer(r"\b(?:should|could|not|but)\b", sentence)]
+
+
+class CountingAnalyzer:
+    def __init__(self):
+        self.sentences = []
+
+    def __call__(self, sentence):
+        self.sentences.append(sentence)
+        return find_friction(sentence)
+
+
+def _full_analysis(text):
+    session, _ = AnalysisSessions().analyze(None, find_friction, text=text)
+    return session
+
+
+def _assert_matches_full_analysis(session):
+    fresh = _full_analysis(session.text)
+    assert [sentence[:2] for sentence in session.sentences] == [sentence[:2] for sentence in fresh.sentences]
+    assert session.friction_points() == fresh.friction_points()
+    for point in session.friction_points():
+        assert session.text[point['start_pos']:point['end_pos']] == point['word']
+
+
+def test_first_request_analyzes_every_sentence():
+    analyzer = CountingAnalyzer()
+    session, stats = AnalysisSessions().analyze('doc', analyzer, text=DOCUMENT)
+    assert stats == {'analyzed': len(session.sentences), 'reused': 0}
+    assert session.hash == text_hash(DOCUMENT)
+    _assert_matches_full_analysis(session)
+
+
+def test_an_edit_only_reanalyzes_the_sentences_it_touches():
+    sessions = AnalysisSessions()
+    sessions.analyze('doc', find_friction, text=DOCUMENT)
+    analyzer = CountingAnalyzer()
+    edited = DOCUMENT.replace("is not final", "is final")
+    session, stats = sessions.analyze('doc', analyzer, text=edited)
+    assert stats['analyzed'] <= 2
+    assert stats['reused'] == len(session.sentences) - stats['analyzed']
+    assert any("is final" in sentence for sentence in analyzer.sentences)
+    _assert_matches_full_analysis(session)
+
+
+def test_unchanged_text_reuses_everything():
+    sessions = AnalysisSessions()
+    first, _ = sessions.analyze('doc', find_friction, text=DOCUMENT)
+    analyzer = CountingAnalyzer()
+    _, stats = sessions.analyze('doc', analyzer, text=DOCUMENT)
+    assert stats == {'analyzed': 0, 'reused': len(first.sentences)}
+    assert analyzer.sentences == []
+
+
+def test_delta_updates_apply_to_the_stored_version():
+    sessions = AnalysisSessions()
+    first, _ = sessions.analyze('doc', find_friction, text=DOCUMENT)
+    start = DOCUMENT.index("ready")
+    delta = {'start': start, 'end': start + len("ready"), 'text': "not ready"}
+    session, stats = sessions.analyze('doc', find_friction, base_hash=first.hash, delta=delta)
+    assert session.text == DOCUMENT.replace("ready", "not ready")
+    assert stats['analyzed'] >= 1
+    _assert_matches_full_analysis(session)
+
+
+def test_stale_or_invalid_deltas_ask_for_the_full_text():
+    sessions = AnalysisSessions()
+    first, _ = sessions.analyze('doc', find_friction, text=DOCUMENT)
+    delta = {'start': 0, 'end': 2, 'text': "They"}
+    assert sessions.analyze('doc', find_friction, base_hash=text_hash("old"), delta=delta) == (None, None)
+    assert sessions.analyze('other', find_friction, base_hash=first.hash, delta=delta) == (None, None)
+    for bad in ({'start': 5, 'end': 2, 'text': ''}, {'start': 0, 'end': len(DOCUMENT) + 1, 'text': ''},
+                {'start': '0', 'end': 2, 'text': ''}, {'start': 0, 'end': 2}, None):
+        assert sessions.analyze('doc', find_friction, base_hash=first.hash, delta=bad) == (None, None)
+
+
+def test_without_a_document_id_nothing_is_stored():
+    sessions = AnalysisSessions()
+    sessions.analyze(None, find_friction, text=DOCUMENT)
+    assert sessions.stats()['size'] == 0
+
+
+def test_random_edits_match_a_full_analysis():
+    rng = random.Random(13)
+    pieces = ["We should go. ", "It is not done", ", but close", "... and more", ". ", "\n",
+              "Dr. ", "U.S. ", "ok", "! ", "could ", "yes? "]
+    sessions = AnalysisSessions()
+    text = DOCUMENT
+    session, _ = sessions.analyze('doc', find_friction, text=text)
+    for step in range(300):
+        start = rng.randrange(len(text) + 1)
+        end = min(len(text), start + rng.randrange(12))
+        insert = ''.join(rng.choice(pieces) for _ in range(rng.randrange(3)))
+        if step % 2:
+            delta = {'start': start, 'end': end, 'text': insert}
+            session, _ = sessions.analyze('doc', find_friction, base_hash=session.hash, delta=delta)
+        else:
+            session, _ = sessions.analyze('doc', find_friction, text=text[:start] + insert + text[end:])
+        text = session.text
+        _assert_matches_full_analysis(session)
@@ -0,0 +1,131 @@
+import sys
+import os
+import json
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('flask')
+pytest.importorskip('requests')
+# The app reads its Azure credentials from config.py, which is not checked in
+pytest.importorskip('config')
+
+import app as app_module
+from benchmarks.mock_azure_server import completion_for
+from processor.translators.azure_translator import AzureTranslator
+from processor.translators.circuit_breaker import breaker_stats
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client whose translators answer from the mock server's rules instead of Azure."""
+    def stub_llm(self, prompt_text, max_tokens=150, temperature=0.3, raw=False):
+        return completion_for(prompt_text)
+
+    monkeypatch.setattr(AzureTranslator, 'call_azure_openai_api', stub_llm)
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+def _stream_events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def test_translate_batch_reports_each_item(client):
+    response = client.post('/translate-batch', json={'items': ['You should plan it.', 42, '']})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['succeeded'], body['failed']) == (2, 1)
+    assert body['results'][0]['translated'] == 'You might plan it.'
+    assert body['results'][1]['success'] is False and body['results'][1]['error']
+    assert [result['index'] for result in body['results']] == [0, 1, 2]
+
+
+def test_translate_batch_rejects_bad_requests(client):
+    assert client.post('/translate-batch', json={'items': 'one text'}).status_code == 400
+    too_many = ['Text.'] * (app_module.MAX_BATCH_ITEMS + 1)
+    assert client.post('/translate-batch', json={'items': too_many}).status_code == 400
+
+
+def test_translate_stream_emits_sentences_then_a_summary(client):
+    response = client.post('/translate-stream', json={'sentences': ['You should plan it.', 'Fine.']})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    events = _stream_events(response)
+    sentences = sorted((event for event in events if event['event'] == 'sentence'), key=lambda e: e['index'])
+    assert [event['translated'] for event in sentences] == ['You might plan it.', 'Fine.']
+    assert events[-1] == {'event': 'summary', 'count': 2, 'changed': 1}
+
+
+def test_translate_stream_of_text_ends_with_the_translate_result(client):
+    response = client.post('/translate-stream', json={'text': 'We should go.'})
+    events = _stream_events(response)
+    assert events[-1]['event'] == 'summary'
+    assert events[-1]['translated'] == 'We might go.'
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    {'sentences': 'one sentence'},
+    {'sentences': ['fine', None]},
+    {'sentences': ['x'] * (app_module.MAX_BATCH_ITEMS + 1)},
+    {'text': 42},
+])
+def test_translate_stream_rejects_bad_requests_before_streaming(client, body):
+    response = client.post('/translate-stream', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_translate_stream_accepts_null_text(client):
+    response = client.post('/translate-stream', json={'text': None})
+    assert response.status_code == 200
+    assert _stream_events(response)[-1]['event'] == 'summary'
+
+
+def test_analyze_text_sessions_accept_deltas(client):
+    text = "We should plan. The budget is not final. The team is ready."
+    first = client.post('/analyze-text', json={'doc_id': 'doc-1', 'text': text}).get_json()
+    assert [point['original'] for point in first['friction_points']] == ['should', 'not']
+
+    start = text.index('ready')
+    delta = {'start': start, 'end': start + len('ready'), 'text': 'ready, but tired'}
+    second = client.post('/analyze-text', json={
+        'doc_id': 'doc-1', 'base_hash': first['text_hash'], 'delta': delta
+    }).get_json()
+    assert second['reused_sentences'] >= 1
+    assert [point['original'] for point in second['friction_points']] == ['should', 'not', 'but']
+
+    stale = client.post('/analyze-text', json={'doc_id': 'doc-1', 'base_hash': first['text_hash'], 'delta': delta})
+    assert stale.status_code == 409
+    assert stale.get_json()['resync'] is True
+
+
+def test_internal_endpoints_answer_loopback_only(client):
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/startup-report').status_code == 200
+    outside = {'REMOTE_ADDR': '203.0.113.7'}
+    assert client.get('/metrics', environ_base=outside).status_code == 403
+    assert client.get('/startup-report', environ_base=outside).status_code == 403
+
+
+def test_internal_endpoints_accept_the_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-token')
+    outside = {'REMOTE_ADDR': '203.0.113.7'}
+    assert client.get('/metrics', environ_base=outside,
+                      headers={'Authorization': 'Bearer scrape-token'}).status_code == 200
+    assert client.get('/metrics', environ_base=outside,
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+
+def test_breaker_metrics_are_labelled_by_deployment_only(client):
+    translator = AzureTranslator()
+    translator.breaker  # registers the breaker of the configured endpoint
+    body = client.get('/metrics').get_data(as_text=True)
+    breaker_lines = [line for line in body.splitlines() if line.startswith('llm_circuit_breaker_open{')]
+    assert any(f'deployment="{translator.deployment_name}"' in line for line in breaker_lines)
+    for key in breaker_stats():
+        assert key not in body
+    assert translator.endpoint not in body
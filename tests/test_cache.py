@@ -0,0 +1,98 @@
+import sys
+import os
+import sqlite3
+import threading
+import time
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.cache import TTLCache
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.1)
+    assert cache.get('a', 'missing') == 'missing'
+    assert cache.stats()['expirations'] == 1
+
+
+def test_size_zero_disables_the_cache():
+    cache = TTLCache(maxsize=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(maxsize=10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (1, 1, 0.5)
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    TTLCache(maxsize=10, ttl=None, disk_path=path).set('prompt', {'text': 'translated'})
+    reopened = TTLCache(maxsize=10, ttl=None, disk_path=path)
+    assert reopened.get('prompt') == {'text': 'translated'}
+    assert reopened.stats()['disk_hits'] == 1
+    # Promoted to memory: the second lookup does not touch the disk
+    assert reopened.get('prompt') == {'text': 'translated'}
+    assert reopened.stats()['disk_hits'] == 1
+
+
+def test_expired_disk_rows_are_ignored_and_swept(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = TTLCache(maxsize=10, ttl=0.05, disk_path=path, sweep_every=3, sweep_seconds=3600)
+    cache.set('old', 'value')
+    time.sleep(0.1)
+    reopened = TTLCache(maxsize=10, ttl=0.05, disk_path=path)
+    assert reopened.get('old') is None
+    assert reopened.stats()['expirations'] == 1
+
+    def keys():
+        with sqlite3.connect(path) as connection:
+            return {row[0] for row in connection.execute("SELECT key FROM cache")}
+
+    # Expired rows stay until sweep_every writes have been made
+    cache.set('new', 'value')
+    assert keys() == {'old', 'new'}
+    cache.set('newer', 'value')
+    assert keys() == {'new', 'newer'}
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = TTLCache(maxsize=10, ttl=None, disk_path=path)
+    cache.set('a', 1)
+    cache.clear()
+    assert cache.get('a') is None
+    assert TTLCache(maxsize=10, ttl=None, disk_path=path).get('a') is None
+
+
+def test_memory_hits_do_not_wait_for_the_disk(tmp_path):
+    cache = TTLCache(maxsize=10, ttl=None, disk_path=str(tmp_path / 'cache.sqlite'))
+    cache.set('hot', 'value')
+    result = []
+    with cache._disk_lock:
+        # A disk write or read is in progress; memory lookups still complete
+        reader = threading.Thread(target=lambda: result.append(cache.get('hot')))
+        reader.start()
+        reader.join(2)
+        assert result == ['value']
@@ -0,0 +1,194 @@
+import sys
+import os
+import threading
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.translators import circuit_breaker
+from processor.translators.circuit_breaker import (
+    CircuitBreaker, get_breaker, breaker_stats, hedged_call, CLOSED, OPEN, HALF_OPEN
+)
+
+
+def _breaker(**overrides):
+    settings = dict(failure_threshold=3, error_rate=0.5, slow_call_seconds=1.0,
+                    window_size=10, min_calls=4, open_seconds=60)
+    settings.update(overrides)
+    return CircuitBreaker(**settings)
+
+
+def test_consecutive_failures_open_the_breaker():
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+    assert breaker.stats()['opened'] == 1
+
+
+def test_a_success_resets_the_consecutive_failures():
+    breaker = _breaker(min_calls=100)
+    for _ in range(5):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_error_rate_in_the_window_opens_the_breaker():
+    breaker = _breaker(failure_threshold=100)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED  # fewer than min_calls so far
+    breaker.record_success(0.1)
+    assert breaker.state == OPEN
+    assert breaker.stats()['bad_call_rate'] == 0.5
+
+
+def test_slow_calls_count_as_bad():
+    breaker = _breaker(failure_threshold=100)
+    for _ in range(4):
+        breaker.record_success(5.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    # A probe is admitted once open_seconds have passed; others wait for its outcome
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_a_failed_probe_reopens_the_breaker():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['opened'] == 2
+
+
+def test_a_slow_probe_reopens_the_breaker():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_success(5.0)
+    assert breaker.state == OPEN
+
+
+def test_registry_shares_breakers_and_reports_the_deployment_name():
+    key = 'https://internal.example.com/test-registry-deployment'
+    breaker = get_breaker(key, name='test-registry-deployment')
+    assert get_breaker(key) is breaker
+    stats = breaker_stats()[key]
+    assert stats['deployment'] == 'test-registry-deployment'
+    assert stats['state'] == CLOSED
+
+
+def test_latency_percentile_needs_enough_samples(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'HEDGE_MIN_SAMPLES', 5)
+    breaker = _breaker()
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        breaker.record_success(latency)
+    assert breaker.latency_percentile(0.95) is None
+    breaker.record_success(0.5)
+    assert breaker.latency_percentile(0.95) == 0.5
+    assert breaker.latency_percentile(0.5) == 0.3
+
+
+def _hedging_breaker(monkeypatch, p95):
+    monkeypatch.setattr(circuit_breaker, 'HEDGE_ENABLED', True)
+    monkeypatch.setattr(circuit_breaker, 'HEDGE_MIN_DELAY', 0.0)
+    monkeypatch.setattr(circuit_breaker, 'HEDGE_MIN_SAMPLES', 1)
+    breaker = _breaker()
+    breaker.record_success(p95)
+    return breaker
+
+
+def test_hedging_is_off_without_latency_history(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'HEDGE_ENABLED', True)
+    calls = []
+    assert hedged_call(lambda: calls.append(1) or 'ok', _breaker()) == 'ok'
+    assert calls == [1]
+
+
+def test_a_fast_call_is_not_hedged(monkeypatch):
+    breaker = _hedging_breaker(monkeypatch, 1.0)
+    calls = []
+    assert hedged_call(lambda: calls.append(1) or 'ok', breaker) == 'ok'
+    assert calls == [1]
+
+
+def test_a_slow_call_is_hedged_and_the_first_answer_wins(monkeypatch):
+    breaker = _hedging_breaker(monkeypatch, 0.01)
+    release = threading.Event()
+    lock = threading.Lock()
+    calls = []
+
+    def send():
+        with lock:
+            calls.append(1)
+            attempt = len(calls)
+        if attempt == 1:
+            # The primary hangs until the test is over
+            release.wait(5)
+            return 'primary'
+        return 'hedge'
+
+    try:
+        assert hedged_call(send, breaker) == 'hedge'
+        assert len(calls) == 2
+    finally:
+        release.set()
+
+
+def test_no_hedge_without_spare_quota(monkeypatch):
+    breaker = _hedging_breaker(monkeypatch, 0.01)
+    calls = []
+
+    def send():
+        calls.append(1)
+        threading.Event().wait(0.1)
+        return 'primary'
+
+    assert hedged_call(send, breaker, allow_hedge=lambda: False) == 'primary'
+    assert calls == [1]
+
+
+def test_primary_error_is_raised_when_both_calls_fail(monkeypatch):
+    breaker = _hedging_breaker(monkeypatch, 0.01)
+    lock = threading.Lock()
+    calls = []
+
+    def send():
+        with lock:
+            calls.append(1)
+            attempt = len(calls)
+        if attempt == 1:
+            threading.Event().wait(0.2)
+            raise RuntimeError('primary failed')
+        raise ValueError('hedge failed')
+
+    with pytest.raises(RuntimeError, match='primary failed'):
+        hedged_call(send, breaker)
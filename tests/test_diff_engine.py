@@ -0,0 +1,137 @@
+import sys
+import os
+import random
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.diff_engine import DiffEngine, diff_opcodes, tokenize
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for item in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if item == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def _check_opcodes(a, b, opcodes):
+    """Opcodes cover both sequences in order and equal blocks really are equal."""
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2] and i2 - i1 > 0
+        elif tag == 'delete':
+            assert i2 > i1 and j2 == j1
+        elif tag == 'insert':
+            assert j2 > j1 and i2 == i1
+        else:
+            assert tag == 'replace' and i2 > i1 and j2 > j1
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+
+
+def _kept(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+
+
+def test_opcodes_are_minimal_on_random_sequences():
+    rng = random.Random(7)
+    for _ in range(300):
+        a = [rng.randrange(4) for _ in range(rng.randrange(15))]
+        b = [rng.randrange(4) for _ in range(rng.randrange(15))]
+        opcodes = diff_opcodes(a, b)
+        _check_opcodes(a, b, opcodes)
+        # Myers finds a shortest edit script, i.e. keeps a longest common subsequence
+        assert _kept(opcodes) == _lcs_length(a, b), (a, b)
+
+
+def test_edits_between_matches_form_one_block():
+    assert diff_opcodes(list('abcxd'), list('abyzd')) == [
+        ('equal', 0, 2, 0, 2), ('replace', 2, 4, 2, 4), ('equal', 4, 5, 4, 5)
+    ]
+    assert diff_opcodes([], list('ab')) == [('insert', 0, 0, 0, 2)]
+    assert diff_opcodes(list('ab'), []) == [('delete', 0, 2, 0, 0)]
+    assert diff_opcodes(list('ab'), list('ab')) == [('equal', 0, 2, 0, 2)]
+    assert diff_opcodes(list('ab'), list('cd')) == [('replace', 0, 2, 0, 2)]
+
+
+def test_tokenize_keeps_contractions_and_hyphenated_words():
+    assert tokenize("We shouldn't re-plan, ok?") == ['We', "shouldn't", 're-plan', ',', 'ok', '?']
+
+
+def test_diff_reports_the_changed_words():
+    engine = DiffEngine()
+    script = engine.diff("You should plan it, but later.", "You might plan it, and later.")
+    changes = [(script.original_text(i1, i2), script.rewritten_text(j1, j2))
+               for tag, i1, i2, j1, j2 in script.opcodes if tag != 'equal']
+    assert changes == [('should', 'might'), ('but', 'and')]
+    assert script.changed_blocks() == 2
+
+
+def test_text_slices_keep_the_original_spacing():
+    script = DiffEngine().diff("We  need to  go.", "We must go.")
+    tag, i1, i2, j1, j2 = [opcode for opcode in script.opcodes if opcode[0] != 'equal'][0]
+    assert script.original_text(i1, i2) == "need to"
+    assert script.rewritten_text(j1, j2) == "must"
+    assert script.original_text(0, 0) == ''
+
+
+def test_diffs_are_memoized():
+    engine = DiffEngine()
+    first = engine.diff("The plan is good.", "The plan is great.")
+    assert engine.diff("The plan is good.", "The plan is great.") is first
+    stats = engine.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_compose_of_one_or_no_rewrite():
+    engine = DiffEngine()
+    assert engine.compose(["Same text."]).opcodes == [('equal', 0, 3, 0, 3)]
+    single = engine.compose(["You should go.", "You might go."])
+    assert single is engine.diff("You should go.", "You might go.")
+
+
+def test_compose_combines_successive_rewrites():
+    engine = DiffEngine()
+    texts = [
+        "You should plan it, but later.",
+        "You might plan it, but later.",
+        "You might plan it, and later.",
+    ]
+    composed = engine.compose(texts)
+    assert (composed.original, composed.rewritten) == (texts[0], texts[-1])
+    _check_opcodes(composed.original_tokens, composed.rewritten_tokens, composed.opcodes)
+    changes = [(composed.original_text(i1, i2), composed.rewritten_text(j1, j2))
+               for tag, i1, i2, j1, j2 in composed.opcodes if tag != 'equal']
+    assert changes == [('should', 'might'), ('but', 'and')]
+
+
+def test_compose_marks_a_word_changed_and_restored_as_changed():
+    engine = DiffEngine()
+    composed = engine.compose(["We should go.", "We might go.", "We should go."])
+    # The direct diff sees no change, but no step kept "should"
+    assert engine.diff("We should go.", "We should go.").changed_blocks() == 0
+    assert composed.changed_blocks() == 1
+    assert ('replace', 1, 2, 1, 2) in composed.opcodes
+
+
+def test_compose_keeps_only_tokens_every_step_kept():
+    rng = random.Random(11)
+    engine = DiffEngine()
+    vocabulary = "the plan is good but slow and we should try it".split()
+    for _ in range(100):
+        texts = [' '.join(rng.choice(vocabulary) for _ in range(rng.randrange(1, 10)))]
+        for _ in range(rng.randrange(1, 4)):
+            words = texts[-1].split()
+            position = rng.randrange(len(words) + 1)
+            words[position:position + rng.randrange(2)] = [rng.choice(vocabulary)] * rng.randrange(2)
+            texts.append(' '.join(words) or 'empty')
+        composed = engine.compose(texts)
+        _check_opcodes(composed.original_tokens, composed.rewritten_tokens, composed.opcodes)
+        # Keeping a token in every step can never keep more than the direct diff does
+        assert _kept(composed.opcodes) <= _kept(engine.diff(texts[0], texts[-1]).opcodes)
@@ -0,0 +1,150 @@
+import sys
+import os
+import re
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.friction_patterns import FrictionPatterns, friction_patterns, TOKEN_RE
+
+# The per-translator regex lists the engine replaced, as they were before it existed.
+# Every category of the engine must find exactly what its old list found.
+LEGACY_PATTERNS = {
+    # TextProcessor / ShouldTranslator
+    'should': [
+        r'\bshould\b', r'\bshouldn\'?t\b', r'\bcould\b', r'\bcouldn\'?t\b',
+        r'\bwould\b', r'\bwouldn\'?t\b', r'\bwe\s+need\s+to\b'
+    ],
+    # TextProcessor / ButTranslator
+    'but': [r'\bbut\b', r'\byet\b'],
+    # TextProcessor
+    'not': [
+        r'\bnot\b', r'\bnever\b', r'\bwithout\b', r'\bno\b', r'\bnothing\b',
+        r'\bdon\'t\b', r'\bwon\'t\b', r'\bcan\'t\b', r'\bcannot\b',
+        r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b',
+        r'\bdoesn\'t\b', r'\bdidn\'t\b', r'\bhaven\'t\b', r'\bhasn\'t\b',
+        r'\bhadn\'t\b', r'\bcouldn\'t\b', r'\bwouldn\'t\b', r'\bshouldn\'t\b',
+        r'\bmustn\'t\b', r'\bain\'t\b', r'\bnone\b', r'\bnobody\b', r'\bnowhere\b'
+    ],
+    # NotTranslator.not_patterns
+    'negation': [
+        r'\bnot\b', r'\bnever\b', r'\bwithout\b',
+        r'\bno\b', r'\bnone\b', r'\bnobody\b', r'\bnothing\b', r'\bnowhere\b',
+        r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b',
+        r'\bdoesn\'t\b', r'\bdon\'t\b', r'\bdidn\'t\b',
+        r'\bhasn\'t\b', r'\bhaven\'t\b', r'\bhadn\'t\b',
+        r'\bcan\'t\b', r'\bcouldn\'t\b', r'\bwon\'t\b', r'\bwouldn\'t\b',
+        r'\bshan\'t\b', r'\bshouldn\'t\b', r'\bmustn\'t\b',
+        r'\bmightn\'t\b', r'\bmayn\'t\b', r'\bain\'t\b',
+        r'\bcannot\b', r'\bwill\s+not\b', r'\bshall\s+not\b', r'\bdo\s+not\b',
+        r'\bdoes\s+not\b', r'\bdid\s+not\b', r'\bis\s+not\b', r'\bare\s+not\b',
+        r'\bwas\s+not\b', r'\bwere\s+not\b', r'\bhas\s+not\b', r'\bhave\s+not\b',
+        r'\bhad\s+not\b', r'\bcould\s+not\b', r'\bwould\s+not\b', r'\bshould\s+not\b',
+        r'\bmust\s+not\b', r'\bmight\s+not\b', r'\bmay\s+not\b',
+        r'\bunable\b', r'\bimpossible\b', r'\bdifficult\s+to\b', r'\black\s+of\b',
+        r'\bfailing\s+to\b', r'\bfailed\s+to\b', r'\bfails\s+to\b',
+        r'\bhardly\b', r'\brarely\b', r'\bscarcely\b', r'\bseldom\b'
+    ],
+    # NotTranslator.state_patterns
+    'state': [
+        r'\bis\s+not\b', r'\bisn\'t\b', r'\bare\s+not\b', r'\baren\'t\b',
+        r'\bwas\s+not\b', r'\bwasn\'t\b', r'\bwere\s+not\b', r'\bweren\'t\b',
+        r'\bam\s+not\b', r'\bi\'m\s+not\b', r'\bthey\'re\s+not\b', r'\bhe\'s\s+not\b', r'\bshe\'s\s+not\b'
+    ],
+    # NotTranslator.output_check_patterns
+    'negative_output': [
+        r'\bnot\b', r'\bnever\b', r'\bwithout\b', r'\bno\b', r'\bnone\b', r'\bnobody\b', r'\bnothing\b', r'\bnowhere\b',
+        r'\bisn\'t\b', r'\baren\'t\b', r'\bwasn\'t\b', r'\bweren\'t\b', r'\bdoesn\'t\b', r'\bdon\'t\b', r'\bdidn\'t\b',
+        r'\bhasn\'t\b', r'\bhaven\'t\b', r'\bhadn\'t\b', r'\bcan\'t\b', r'\bcouldn\'t\b', r'\bwon\'t\b', r'\bwouldn\'t\b',
+        r'\bshouldn\'t\b', r'\bmustn\'t\b', r'\bunable\b', r'\bimpossible\b', r'\black\s+of\b'
+    ]
+}
+
+# Sentences built around contractions and clitics
+CONTRACTION_CORPUS = [
+    "You should've called.",
+    "Nobody's perfect.",
+    "Nothing's wrong with the plan.",
+    "I wouldn't've gone without you.",
+    "Nowhere's safe anymore.",
+    "She could've said no.",
+    "We'd rather not, but they'll insist.",
+    "They're not ready, and he's not either.",
+    "She's not coming; I'm not sure why.",
+    "It isn't what you'd expect, yet it's fine.",
+    "You shouldn't've done that.",
+    "We couldnt find it and wouldnt ask.",
+    "I can't believe it's not done.",
+    "Don't you think we'll need to talk?",
+    "We need to talk before it's too late.",
+    "Nobody'd have guessed it wasn't there.",
+    "He hasn't been told, hasn't he?",
+    "Y'all ain't seen nothing yet.",
+    "That's impossible, isn't it?",
+    "They've failed to deliver and we've no time.",
+]
+
+
+def _legacy_spans(text, patterns):
+    spans = set()
+    for pattern in patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            spans.add((match.start(), match.end()))
+    return spans
+
+
+def _engine_spans(engine, text, category):
+    return {(match.start, match.end) for match in engine.detect(text).of(category)}
+
+
+def test_engine_matches_legacy_patterns_on_contractions():
+    engine = FrictionPatterns()
+    for text in CONTRACTION_CORPUS:
+        for category, patterns in LEGACY_PATTERNS.items():
+            assert _engine_spans(engine, text, category) == _legacy_spans(text, patterns), (text, category)
+
+
+def test_clitics_are_separate_tokens():
+    assert TOKEN_RE.findall("should've") == ['should', "'ve"]
+    assert TOKEN_RE.findall("Nobody's") == ['Nobody', "'s"]
+    assert TOKEN_RE.findall("wouldn't've") == ["wouldn't", "'ve"]
+    # Negative contractions and "I'm" stay whole
+    assert TOKEN_RE.findall("don't I'm") == ["don't", "I'm"]
+
+
+def test_contractions_route_to_translators():
+    assert friction_patterns.contains("You should've called.", 'should')
+    assert friction_patterns.contains("Nobody's perfect.", 'not')
+    assert friction_patterns.contains("Nobody's perfect.", 'negation')
+    assert friction_patterns.first("They're not here.", 'state').text == "They're not"
+
+
+def test_phrase_words_must_be_whitespace_separated():
+    assert not friction_patterns.contains("we-need-to", 'should')
+    assert friction_patterns.contains("we\nneed  to", 'should')
+
+
+def test_update_matches_full_detection():
+    engine = FrictionPatterns()
+    before = engine.detect("Nobody's perfect, but we should've tried.")
+    after_text = "Nobody's perfect, and we should've tried harder."
+    updated = engine.update(before, after_text)
+    assert updated.matches == FrictionPatterns().detect(after_text).matches
+
+
+def test_curly_apostrophes_match():
+    detection = friction_patterns.detect("You should’ve called; it isn’t late.")
+    assert detection.contains('should')
+    assert detection.first('not').text == "isn’t"
+
+
+def test_by_priority_follows_registration_order():
+    matches = friction_patterns.by_priority("I could and I should.", 'should')
+    assert [match.subtype for match in matches] == ['should', 'could']
+
+
+def test_ability_and_not_just_but_regexes():
+    detection = friction_patterns.detect("I can't really find it; it is not just late but wrong.")
+    assert detection.first('ability').subtype == "can't"
+    assert detection.first('not_just_but').subtype == 'not just'
+    assert detection.negation_context() == 'ability'
@@ -0,0 +1,128 @@
+import sys
+import os
+import difflib
+import random
+import subprocess
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor import near_duplicates
+from processor.near_duplicates import NearDuplicateIndex, normalize, LINEAR_SCAN_LIMIT
+
+WORDS = ("team plan budget quarter review launch market client design report risk "
+         "schedule office meeting product feedback strategy hiring goal").split()
+
+
+def _sentence(rng, words=14):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _reference(seen, text, threshold=0.8):
+    """The pairwise check the index replaced."""
+    normalized = normalize(text)
+    for existing in seen:
+        existing = normalize(existing)
+        if normalized == existing or normalized in existing or existing in normalized:
+            return True
+        matcher = difflib.SequenceMatcher(None, normalized, existing)
+        # The quick ratios are upper bounds of ratio(), so they only skip hopeless pairs
+        if matcher.real_quick_ratio() > threshold and matcher.quick_ratio() > threshold \
+                and matcher.ratio() > threshold:
+            return True
+    return False
+
+
+def _large_index(rng, size=LINEAR_SCAN_LIMIT * 4):
+    index = NearDuplicateIndex()
+    sentences = [_sentence(rng) for _ in range(size)]
+    for sentence in sentences:
+        index.add(sentence)
+    return index, sentences
+
+
+def test_empty_index_contains_nothing():
+    assert not NearDuplicateIndex().contains_similar("Anything at all.")
+
+
+def test_exact_matches_ignore_case_and_spacing():
+    index = NearDuplicateIndex()
+    index.add("The  Plan is good.")
+    assert index.contains_similar("the plan   is GOOD.")
+
+
+def test_containment_both_ways_beyond_the_linear_scan():
+    rng = random.Random(1)
+    index, sentences = _large_index(rng)
+    index.add("Short clause")
+    # Contained in an indexed sentence
+    assert index.contains_similar(sentences[10][5:40])
+    # Contains an indexed sentence
+    assert index.contains_similar("Before. " + sentences[20] + " After.")
+    assert index.contains_similar("This has a short clause inside it.")
+
+
+def test_lightly_edited_copies_are_found_beyond_the_linear_scan():
+    rng = random.Random(2)
+    index, sentences = _large_index(rng)
+    edited = sentences[30].replace(' ', '  ', 1)[:-1] + ' indeed.'
+    assert index.contains_similar(edited)
+
+
+def test_unrelated_sentences_are_not_duplicates():
+    rng = random.Random(3)
+    index, _ = _large_index(rng)
+    assert not index.contains_similar("Quantum chromodynamics describes the strong interaction.")
+
+
+def test_agrees_with_the_pairwise_check():
+    rng = random.Random(4)
+    index = NearDuplicateIndex()
+    seen = []
+    missed = 0
+    duplicates = 0
+    for _ in range(150):
+        if seen and rng.random() < 0.5:
+            base = rng.choice(seen).split()
+            base[rng.randrange(len(base))] = rng.choice(WORDS)
+            text = ' '.join(base)
+        else:
+            text = _sentence(rng)
+        expected = _reference(seen, text)
+        found = index.contains_similar(text)
+        # Every candidate is confirmed with the pairwise check, so there are no false matches
+        assert not found or expected, text
+        duplicates += expected
+        missed += expected and not found
+        index.add(text)
+        seen.append(text)
+    # The buckets can miss a rare pair just above the threshold
+    assert duplicates > 50
+    assert missed <= 2
+
+
+def test_short_sentences_are_handled():
+    rng = random.Random(5)
+    index, _ = _large_index(rng)
+    index.add("Ok")
+    assert index.contains_similar("ok")
+    assert index.contains_similar("It is ok with me.")
+    assert index.contains_similar("")
+
+
+def test_bucket_keys_do_not_depend_on_the_hash_seed():
+    code = ("import sys; sys.path.insert(0, %r); "
+            "from processor.near_duplicates import _shingles, _band_keys; "
+            "print(sorted(_band_keys(_shingles('the quarterly plan is on track'))))"
+            % os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    outputs = set()
+    for seed in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        outputs.add(subprocess.run([sys.executable, '-c', code], env=env,
+                                   capture_output=True, text=True, check=True).stdout)
+    assert len(outputs) == 1
+
+
+def test_band_keys_have_one_key_per_band():
+    keys = near_duplicates._band_keys(near_duplicates._shingles('the plan is good'))
+    assert len(keys) == near_duplicates.BANDS
@@ -0,0 +1,64 @@
+import sys
+import os
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('requests')
+# The translators read their Azure credentials from config.py, which is not checked in
+pytest.importorskip('config')
+
+from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT
+from processor.translators.not_translator import NotTranslator
+from processor.text_processor import TextProcessor
+
+SENTENCE = "We are not late for the weekly planning meeting."
+# Still negative, so the translator retries it
+FIRST_ATTEMPT = "We are never late for the weekly planning meeting."
+
+
+def _scripted_llm(responses):
+    """LLM stand-in answering with the given responses in turn, then failing (empty response)."""
+    calls = []
+
+    def call(self, prompt_text, max_tokens=150, temperature=0.3, raw=False):
+        calls.append(prompt_text)
+        return responses[len(calls) - 1] if len(calls) <= len(responses) else ""
+
+    return call, calls
+
+
+def _text_processor():
+    return TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT,
+                         max_workers=1, batch_size=1, combined=False)
+
+
+def test_a_failed_retry_keeps_the_last_good_attempt(monkeypatch):
+    call, calls = _scripted_llm([FIRST_ATTEMPT])
+    monkeypatch.setattr(NotTranslator, 'call_azure_openai_api', call)
+    assert NotTranslator().translate(SENTENCE) == FIRST_ATTEMPT
+    assert len(calls) == 2
+
+
+def test_a_failed_first_call_keeps_the_original(monkeypatch):
+    call, _ = _scripted_llm([])
+    monkeypatch.setattr(NotTranslator, 'call_azure_openai_api', call)
+    assert NotTranslator().translate(SENTENCE) == SENTENCE
+
+
+def test_a_failed_retry_never_removes_the_sentence(monkeypatch):
+    call, _ = _scripted_llm([FIRST_ATTEMPT])
+    monkeypatch.setattr(NotTranslator, 'call_azure_openai_api', call)
+    processor = _text_processor()
+    result = processor.process_text(SENTENCE + " The agenda is ready.")
+    assert result.translated == FIRST_ATTEMPT + " The agenda is ready."
+
+
+def test_an_empty_stage_result_is_not_a_change():
+    processor = _text_processor()
+    changes, transformations = [], []
+    assert processor._record_stage_result('not', SENTENCE, "", changes, transformations) == SENTENCE
+    assert processor._record_stage_result('not', SENTENCE, "  ", changes, transformations) == SENTENCE
+    assert changes == [] and transformations == []
@@ -0,0 +1,123 @@
+import sys
+import os
+import time
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.translators import rate_limiter as rate_limiter_module
+from processor.translators.rate_limiter import (
+    RateLimiter, TokenBucket, estimate_tokens, parse_retry_after, DEFAULT_BACKOFF
+)
+
+
+def test_bucket_refills_at_its_per_minute_rate():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    # One unit per second comes back
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+    assert bucket.level == pytest.approx(1.0)
+
+
+def test_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(10)
+    assert bucket.wait_time(1, bucket.updated + 3600) == 0.0
+    assert bucket.level == 10
+
+
+def test_requests_larger_than_the_bucket_wait_for_a_full_one():
+    bucket = TokenBucket(100)
+    now = bucket.updated
+    assert bucket.wait_time(500, now) == 0.0
+    bucket.consume(500)
+    assert bucket.level == 0
+    assert bucket.wait_time(500, now) == pytest.approx(60.0)
+
+
+def test_clamp_and_resize_follow_the_service():
+    bucket = TokenBucket(100)
+    bucket.clamp(30, bucket.updated)
+    assert bucket.level == 30
+    bucket.resize(20)
+    assert (bucket.capacity, bucket.level) == (20, 20)
+
+
+def test_acquire_consumes_request_and_token_quota():
+    limiter = RateLimiter(rpm=2, tpm=1000, max_wait=0)
+    assert limiter.acquire('deployment', 400)
+    assert limiter.acquire('deployment', 400)
+    # Third request of the minute: no request quota left and no queueing allowed
+    assert not limiter.acquire('deployment', 1)
+    assert limiter.stats()['timeouts'] == 1
+
+
+def test_token_quota_limits_large_calls():
+    limiter = RateLimiter(rpm=0, tpm=1000, max_wait=0)
+    assert limiter.acquire('deployment', 900)
+    assert not limiter.acquire('deployment', 200)
+    assert limiter.acquire('deployment', 100)
+
+
+def test_deployments_have_separate_buckets():
+    limiter = RateLimiter(rpm=1, tpm=0, max_wait=0)
+    assert limiter.acquire('east', 10)
+    assert limiter.acquire('west', 10)
+    assert not limiter.acquire('east', 10)
+
+
+def test_acquire_queues_until_capacity_returns():
+    limiter = RateLimiter(rpm=600, tpm=0, max_wait=1)
+    for _ in range(600):
+        assert limiter.acquire('deployment', 1, max_wait=0)
+    started = time.monotonic()
+    # One request comes back every 0.1 seconds
+    assert limiter.acquire('deployment', 1)
+    assert 0.05 < time.monotonic() - started < 1
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_penalize_blocks_the_deployment():
+    limiter = RateLimiter(rpm=0, tpm=0, max_wait=0)
+    limiter.penalize('deployment', 30)
+    assert not limiter.acquire('deployment', 1)
+    assert limiter.acquire('other', 1)
+    assert limiter.stats()['throttled'] == 1
+
+
+def test_learns_quota_from_headers():
+    limiter = RateLimiter(rpm=0, tpm=0, max_wait=0)
+    limiter.update_from_headers('deployment', {
+        'x-ratelimit-limit-requests': '100',
+        'x-ratelimit-remaining-requests': '0',
+    })
+    assert not limiter.acquire('deployment', 1)
+
+
+def test_exhausted_unknown_quota_backs_off(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, 'DEFAULT_BACKOFF', 30)
+    limiter = RateLimiter(rpm=0, tpm=0, max_wait=0)
+    limiter.update_from_headers('deployment', {'x-ratelimit-remaining-tokens': '0'})
+    assert not limiter.acquire('deployment', 1)
+
+
+def test_headers_without_quota_information_are_ignored():
+    limiter = RateLimiter(rpm=0, tpm=0, max_wait=0)
+    limiter.update_from_headers('deployment', {'Content-Type': 'application/json'})
+    assert limiter.acquire('deployment', 10 ** 6)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({'retry-after-ms': '1500'}) == 1.5
+    assert parse_retry_after({'x-ms-retry-after-ms': '250', 'Retry-After': '9'}) == 0.25
+    assert parse_retry_after({'Retry-After': '7'}) == 7.0
+    assert parse_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+    assert parse_retry_after({'Retry-After': 'soon'}) == DEFAULT_BACKOFF
+    assert parse_retry_after({}, default=4) == 4
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('x' * 400, 150) == 250
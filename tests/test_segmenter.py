@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.segmenter import (
+    sentence_spans, iter_sentence_spans, split_sentences, ensure_sentence_endings
+)
+
+
+def test_splits_on_terminal_punctuation():
+    assert split_sentences("First one. Second one! Third one?") == ["First one.", "Second one!", "Third one?"]
+
+
+def test_spans_are_offsets_into_the_original_text():
+    text = "  Same.   Same.\n\nDifferent! "
+    spans = sentence_spans(text)
+    assert [text[start:end] for start, end in spans] == ["Same.", "Same.", "Different!"]
+    assert spans[0] != spans[1]
+
+
+def test_abbreviations_and_initials_do_not_end_a_sentence():
+    assert split_sentences("Dr. Smith met J. Doe, e.g. at noon. Then he left.") == [
+        "Dr. Smith met J. Doe, e.g. at noon.", "Then he left."
+    ]
+    # The pronoun "I" is not an initial
+    assert split_sentences("So did I. Then we left.") == ["So did I.", "Then we left."]
+
+
+def test_dotted_acronyms_do_not_end_a_sentence():
+    assert split_sentences("The U.S. is big.") == ["The U.S. is big."]
+    assert split_sentences("The U.S.A. is big. So is Canada.") == ["The U.S.A. is big.", "So is Canada."]
+
+
+def test_period_followed_by_lowercase_continues_the_sentence():
+    assert split_sentences("It costs approx. five dollars. Fine.") == ["It costs approx. five dollars.", "Fine."]
+    assert split_sentences("I waited... and waited. Then I left.") == ["I waited... and waited.", "Then I left."]
+
+
+def test_ellipsis_character_is_a_boundary():
+    assert split_sentences("I waited… Then I left.") == ["I waited…", "Then I left."]
+    assert split_sentences("I waited… and waited. Then I left.") == ["I waited… and waited.", "Then I left."]
+    assert ensure_sentence_endings("Wait…\nGo") == "Wait…\nGo."
+
+
+def test_closing_quotes_stay_with_their_sentence():
+    assert split_sentences('He said "stop." She stopped.') == ['He said "stop."', "She stopped."]
+
+
+def test_line_breaks_end_fragments():
+    assert split_sentences("A heading\nThe body text. More.") == ["A heading", "The body text.", "More."]
+
+
+def test_decimal_numbers_are_not_boundaries():
+    assert split_sentences("Version 2.0 is out. Good.") == ["Version 2.0 is out.", "Good."]
+
+
+def test_restarting_at_a_sentence_end_gives_the_same_spans():
+    text = "The U.S. is big. Dr. Who is here... and there. Done! Really? yes. End"
+    spans = sentence_spans(text)
+    for _, end in spans[:-1]:
+        assert list(iter_sentence_spans(text, end)) == [span for span in spans if span[0] >= end]
+
+
+def test_ensure_sentence_endings_only_adds_missing_periods():
+    assert ensure_sentence_endings("A heading\nDone.\nList item;  \n") == "A heading.\nDone.\nList item;  \n"
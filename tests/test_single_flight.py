@@ -0,0 +1,107 @@
+import sys
+import os
+import threading
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.single_flight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    """Start `callers` threads calling flight.do(key, fn); return their threads and outcomes."""
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = ('result', flight.do(key, fn))
+        except Exception as e:
+            outcomes[index] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flight, count):
+    """Wait until `count` callers are waiting on the leader's execution."""
+    for _ in range(1000):
+        if flight.shared >= count:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError("followers never joined the call in flight")
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def work():
+        executions.append(1)
+        release.wait(5)
+        return 'translated'
+
+    threads, outcomes = _run_concurrently(flight, 'prompt', work, 5)
+    _wait_for_followers(flight, 4)
+    assert flight.in_flight() == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert executions == [1]
+    assert outcomes == [('result', 'translated')] * 5
+    assert flight.shared == 4
+    assert flight.in_flight() == 0
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = RuntimeError('service unavailable')
+
+    def work():
+        release.wait(5)
+        raise error
+
+    threads, outcomes = _run_concurrently(flight, 'prompt', work, 3)
+    _wait_for_followers(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert outcomes == [('error', error)] * 3
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    release = threading.Event()
+    first = threading.Thread(target=flight.do, args=('a', lambda: release.wait(5)))
+    first.start()
+    try:
+        # 'b' completes while 'a' is still running
+        assert flight.do('b', lambda: 'b done') == 'b done'
+        assert flight.shared == 0
+    finally:
+        release.set()
+        first.join(5)
+
+
+def test_a_finished_call_is_not_reused():
+    flight = SingleFlight()
+    calls = []
+    assert flight.do('key', lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do('key', lambda: calls.append(1) or len(calls)) == 2
+    assert flight.shared == 0
+
+
+def test_a_failed_call_releases_its_key():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: (_ for _ in ()).throw(ValueError('bad')))
+    assert flight.in_flight() == 0
+    assert flight.do('key', lambda: 'retried') == 'retried'
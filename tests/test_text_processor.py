@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+
+import pytest
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('requests')
+# The translators read their Azure credentials from config.py, which is not checked in
+pytest.importorskip('config')
+
+from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT
+from processor.text_processor import TextProcessor
+from processor.translators import azure_translator
+from processor.translators.azure_translator import AzureTranslator
+from processor.translators.circuit_breaker import OPEN
+
+# Every sentence has friction for at least one translator, so each one needs the LLM
+TEXT = ("You should review the plan before Friday. The budget is fine, but the schedule is tight. "
+        "We are not ready for the launch. They could hire two more engineers.")
+
+
+class _NoNetwork:
+    def post(self, *args, **kwargs):
+        raise AssertionError("an open breaker must not let requests through")
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    """Open the breaker of the configured deployment and fail the test if a request is sent anyway."""
+    breaker = AzureTranslator(AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT).breaker
+    monkeypatch.setattr(breaker, 'state', OPEN)
+    monkeypatch.setattr(breaker, 'opened_at', time.monotonic())
+    monkeypatch.setattr(breaker, 'open_seconds', 3600)
+    monkeypatch.setattr(azure_translator, 'get_transport', lambda: _NoNetwork())
+    # Nothing may be answered from responses cached by other tests
+    azure_translator.response_cache.clear()
+    return breaker
+
+
+@pytest.mark.parametrize('batch_size', [1, 4], ids=['chained', 'batched'])
+def test_open_breaker_returns_the_original_text(open_breaker, batch_size):
+    processor = TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT,
+                              max_workers=1, batch_size=batch_size, combined=False)
+    rejected_before = open_breaker.rejected
+    result = processor.process_text(TEXT)
+    assert result.translated == TEXT
+    assert list(result.changes) == []
+    assert open_breaker.rejected > rejected_before
+    # Nothing is memoized, so the sentences are translated once the breaker closes
+    assert len(processor.sentence_cache) == 0
+
+
+@pytest.mark.parametrize('batch_size', [1, 4], ids=['chained', 'batched'])
+def test_open_breaker_keeps_every_batch_item(open_breaker, batch_size):
+    processor = TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT,
+                              max_workers=1, batch_size=batch_size, combined=False)
+    sentences = TEXT.split('. ')
+    sentences = [sentence if sentence.endswith('.') else sentence + '.' for sentence in sentences]
+    results = processor.process_batch(sentences)
+    assert [result.translated for result in results] == sentences
+    assert all(result.error is None for result in results)
+
+
+def test_friction_words_reuse_the_translation_detections(monkeypatch):
+    stub = {'You should review the plan before Friday.': 'You might review the plan before Friday.'}
+    monkeypatch.setattr(AzureTranslator, 'call_azure_openai_api',
+                        lambda self, prompt_text, **kwargs: next(
+                            (rewrite for original, rewrite in stub.items() if original in prompt_text), ""))
+    processor = TextProcessor(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT,
+                              max_workers=1, batch_size=1, combined=False)
+    extract = processor._extract_friction_words
+    misses = []
+
+    def counting_extract(changes):
+        before = processor.friction_patterns.stats()['misses']
+        words = extract(changes)
+        misses.append(processor.friction_patterns.stats()['misses'] - before)
+        return words
+
+    monkeypatch.setattr(processor, '_extract_friction_words', counting_extract)
+    result = processor.process_text('You should review the plan before Friday.')
+    assert result.changes
+    # Every change's original was recorded while it was translated, so nothing is scanned again
+    assert misses == [0]